@@ -2,22 +2,26 @@ import { getPineconeService } from './PineconeService';
 import { getPolicyTextForId } from '../data/ballotPolicies';
 import { UserDemographics, RetrievalContext } from '../types';
 
-/** Derive document ID from vector id (e.g. "pa-statute-t11-chunk42" -> "pa-statute-t11") */
+/**
+ * Derive document ID from vector id, e.g.
+ * "pa-statute-t11-chunk42" -> "pa-statute-t11",
+ * "pa-statute-t18-s2501-p0" -> "pa-statute-t18-s2501" (one statute section)
+ */
 function getDocumentId(vectorId: string): string {
-  const match = vectorId.match(/^(.+?)(?:[-_]chunk\d+)?$/);
+  const match = vectorId.match(/^(.+?)(?:[-_]chunk\d+|-p\d+)?$/);
   return match ? match[1] : vectorId;
 }
 
-/** Extract chunk index from vector id for sorting (e.g. "pa-statute-t11-chunk42" -> 42) */
+/** Extract chunk index from vector id for sorting (e.g. "pa-statute-t11-chunk42" -> 42, "...-s2501-p1" -> 1) */
 function getChunkIndex(vectorId: string): number {
-  const match = vectorId.match(/[-_]chunk(\d+)$/);
+  const match = vectorId.match(/(?:[-_]chunk|-p)(\d+)$/);
   return match ? parseInt(match[1], 10) : 0;
 }
 
 export class PolicyRetriever {
   /**
    * Retrieve relevant context for a policy using Pinecone semantic search.
-   * Schema: vectors have id (e.g. pa-statute-t11-chunk42), metadata: text, title, type, url, source, tags, summary
+   * Schema: vectors have id (e.g. pa-statute-t11-chunk42, pa-statute-t18-s2501-p0), metadata: text, title, type, url, source, tags, summary
    */
   async retrieveContext(
     policyId: string,
@@ -57,7 +61,11 @@ export class PolicyRetriever {
     const results = await pinecone.query(policyId, 30);
 
     const policyChunks = results.filter(
-      (r) => r.id.startsWith(policyId + '-chunk') || r.id.startsWith(policyId + '_chunk') || r.id === policyId
+      (r) =>
+        r.id.startsWith(policyId + '-chunk') ||
+        r.id.startsWith(policyId + '_chunk') ||
+        (r.id.startsWith(policyId + '-p') && /^\d+$/.test(r.id.slice(policyId.length + 2))) ||
+        r.id === policyId
     );
 
     const chunksToUse = policyChunks.length > 0 ? policyChunks : results;
@@ -0,0 +1,144 @@
+"""
+attachment_cache.py
+===================
+Persistent cache of text extracted from Legistar attachments.
+
+A matter's attachments rarely change once it is filed, yet every run used to
+download each PDF/DOCX again and re-parse it with pypdf.  This cache maps an
+attachment's identity (its Legistar GUID, or the hyperlink when there is
+none) plus a version (``MatterAttachmentLastModifiedUtc``) to the extracted
+text, so a re-run only touches attachments that are new or were replaced.
+Rows without a modification time are versioned by a SHA-256 of the
+downloaded file instead: those are fetched again, but a file whose bytes
+are unchanged is not parsed again.
+
+Text is stored zlib-compressed in SQLite (``.cache/attachments.sqlite``).
+The store is size-bounded and evicts least-recently-used entries.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional
+
+# ── Configuration ────────────────────────────────────────────────────────────
+DEFAULT_ATTACHMENT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "attachments.sqlite")
+
+# Total compressed bytes kept before LRU eviction kicks in
+ATTACHMENT_CACHE_MAX_BYTES = int(os.environ.get("ATTACHMENT_CACHE_MAX_BYTES",
+                                                str(512 * 1024 ** 2)))
+
+# After eviction the cache is trimmed to this fraction of the limit
+EVICT_TO = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS texts (
+    key       TEXT PRIMARY KEY,
+    version   TEXT NOT NULL,
+    text      BLOB NOT NULL,
+    size      INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS texts_last_used ON texts (last_used);
+"""
+
+
+def attachment_key(attachment: dict, digest: Optional[str] = None) -> tuple[str, str]:
+    """``(identity, version)`` for a Legistar MatterAttachment row.
+
+    The version is the row's modification time, else ``digest`` (the
+    ``content_digest`` of the downloaded file), else "" — unknown.
+    """
+    identity = (attachment.get("MatterAttachmentGuid")
+                or attachment.get("MatterAttachmentHyperlink") or "")
+    version = (attachment.get("MatterAttachmentLastModifiedUtc")
+               or attachment.get("MatterAttachmentLastModified")
+               or (f"sha256:{digest}" if digest else ""))
+    return identity, version
+
+
+def has_version(attachment: dict) -> bool:
+    """Whether the row alone says which version of the file it is."""
+    return bool(attachment_key(attachment)[1])
+
+
+def new_digest():
+    """Hash object ``download_attachment`` feeds; its hexdigest is a ``digest``."""
+    return hashlib.sha256()
+
+
+class AttachmentTextCache:
+    """SQLite-backed attachment → extracted-text store with LRU eviction."""
+
+    def __init__(self, path: str = DEFAULT_ATTACHMENT_CACHE_PATH,
+                 max_bytes: int = ATTACHMENT_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def get(self, attachment: dict, digest: Optional[str] = None) -> Optional[str]:
+        """Cached text for this version of the attachment, or None.
+
+        Rows without a modification time need the ``digest`` of the
+        downloaded file; without one they are never found.
+        """
+        key, version = attachment_key(attachment, digest)
+        if not key or not version:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT version, text FROM texts WHERE key = ?", (key,),
+            ).fetchone()
+            if row is None or row[0] != version:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE texts SET last_used = ? WHERE key = ?",
+                             (time.time(), key))
+            self._db.commit()
+        self.hits += 1
+        return zlib.decompress(row[1]).decode("utf-8")
+
+    def put(self, attachment: dict, text: str, digest: Optional[str] = None):
+        """Remember the text extracted from ``attachment`` ("" if none)."""
+        key, version = attachment_key(attachment, digest)
+        if not key or not version:
+            return
+        blob = zlib.compress(text.encode("utf-8"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO texts VALUES (?, ?, ?, ?, ?)",
+                (key, version, blob, len(blob), time.time()),
+            )
+            self._db.commit()
+        self._evict()
+
+    def _evict(self):
+        """Drop least-recently-used entries until under the size limit."""
+        with self._lock:
+            total = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM texts").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            target = self.max_bytes * EVICT_TO
+            victims = []
+            for key, size in self._db.execute(
+                    "SELECT key, size FROM texts ORDER BY last_used"):
+                if total <= target:
+                    break
+                victims.append((key,))
+                total -= size
+            self._db.executemany("DELETE FROM texts WHERE key = ?", victims)
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,151 @@
+"""
+batching.py
+===========
+Upsert batches sized by records, payload bytes and embedding tokens.
+
+A fixed 20-record batch is far too small for short bill summaries and can
+be too heavy for long statute sections.  ``UpsertBatcher`` fills each
+request until the next record would break any of three limits:
+
+    records   Pinecone accepts at most 96 records per upsert_records call
+    bytes     …and a 2 MB request body
+    tokens    keeps one request well inside the per-minute token budget
+
+Records wait in a deque, so taking a batch off the front costs only the
+records taken — no re-copying of the rest of a title with thousands of
+chunks.  The record limit also adapts to how long Pinecone takes: batches
+that come back quickly grow it, slow or failed ones shrink it again.
+"""
+
+import json
+import threading
+from collections import deque
+from typing import Iterable, Iterator, Optional
+
+from tokens import CharRatioEstimator, TokenEstimator
+
+# ── Configuration ────────────────────────────────────────────────────────────
+# Hard per-request limits (Pinecone upsert_records: 96 records, 2 MB body)
+MAX_BATCH_RECORDS = 96
+MAX_BATCH_BYTES   = 1_500_000
+MAX_BATCH_TOKENS  = 20_000
+
+# Adaptive record limit: start here, stay between the two bounds
+START_BATCH_RECORDS = 20
+MIN_BATCH_RECORDS   = 8
+
+# Aim for upsert calls of about this long (seconds); quicker batches grow
+# the record limit by GROW_FACTOR, slower or failed ones shrink it
+TARGET_UPSERT_SECONDS = 2.0
+GROW_FACTOR   = 1.25
+SHRINK_FACTOR = 0.6
+
+
+class RecordBatch(list):
+    """A batch of records that remembers its estimated tokens and bytes."""
+
+    def __init__(self, records: Iterable[dict] = (), tokens: int = 0,
+                 nbytes: int = 0):
+        super().__init__(records)
+        self.tokens = tokens
+        self.nbytes = nbytes
+
+
+def record_bytes(record: dict) -> int:
+    """Approximate JSON size of a record in the upsert request body."""
+    return len(json.dumps(record, ensure_ascii=False,
+                          separators=(",", ":")).encode("utf-8"))
+
+
+class UpsertBatcher:
+    """Buffer records and cut them into batches within every limit.
+
+    ``add`` and ``batches`` belong to the producing thread; ``observe`` may
+    be called from the upsert threads.
+    """
+
+    def __init__(self, estimator: Optional[TokenEstimator] = None,
+                 max_records: int = MAX_BATCH_RECORDS,
+                 max_bytes: int = MAX_BATCH_BYTES,
+                 max_tokens: int = MAX_BATCH_TOKENS,
+                 target_seconds: float = TARGET_UPSERT_SECONDS):
+        self.estimator = estimator or CharRatioEstimator()
+        self.max_records = max(1, max_records)
+        self.max_bytes = max_bytes
+        self.max_tokens = max_tokens
+        self.target_seconds = target_seconds
+        self.min_records = min(MIN_BATCH_RECORDS, self.max_records)
+        self.size = min(START_BATCH_RECORDS, self.max_records)   # adaptive
+        self.batches_made = 0
+        self.records_batched = 0
+        self._pending: deque = deque()     # (record, tokens, bytes)
+        self._tokens = 0                   # sums over _pending
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, records: Iterable[dict], counts: Optional[list[int]] = None):
+        """Queue records (tokenized together, in one estimator call).
+
+        Pass ``counts`` if the caller already counted the records' tokens.
+        """
+        records = list(records)
+        if not records:
+            return
+        if counts is None:
+            counts = self.estimator.count_batch([r.get("text", "") for r in records])
+        for record, tokens in zip(records, counts):
+            nbytes = record_bytes(record)
+            self._pending.append((record, tokens, nbytes))
+            self._tokens += tokens
+            self._bytes += nbytes
+
+    def _ready(self) -> bool:
+        return (len(self._pending) >= self.size
+                or self._tokens >= self.max_tokens
+                or self._bytes >= self.max_bytes)
+
+    def _take(self) -> RecordBatch:
+        batch = RecordBatch()
+        size = self.size
+        while self._pending and len(batch) < size:
+            record, tokens, nbytes = self._pending[0]
+            if batch and (batch.tokens + tokens > self.max_tokens
+                          or batch.nbytes + nbytes > self.max_bytes):
+                break
+            self._pending.popleft()
+            self._tokens -= tokens
+            self._bytes -= nbytes
+            batch.append(record)
+            batch.tokens += tokens
+            batch.nbytes += nbytes
+        self.batches_made += 1
+        self.records_batched += len(batch)
+        return batch
+
+    def batches(self, final: bool = False) -> Iterator[RecordBatch]:
+        """Yield every full batch; with ``final`` also the partial remainder."""
+        while self._pending and (final or self._ready()):
+            yield self._take()
+
+    def observe(self, batch: list, seconds: Optional[float]):
+        """Adapt the record limit to one upsert's latency (None = it failed)."""
+        with self._lock:
+            if seconds is None or seconds > self.target_seconds:
+                self.size = max(self.min_records, int(self.size * SHRINK_FACTOR))
+            elif (seconds < self.target_seconds / 2 and len(batch) >= self.size
+                  and self.size < self.max_records):
+                # Only batches cut by the record limit say anything about it
+                self.size = min(self.max_records,
+                                max(self.size + 1, int(self.size * GROW_FACTOR)))
+
+    def describe(self) -> str:
+        return (f"≤{self.max_records} records / {self.max_bytes // 1000:,} kB / "
+                f"{self.max_tokens:,} tokens per batch")
+
+    def summary(self) -> str:
+        average = self.records_batched / self.batches_made if self.batches_made else 0
+        return (f"{self.batches_made} batches, {average:.1f} records on average "
+                f"(record limit settled at {self.size})")
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+bench.py
+========
+Micro-benchmarks for the scrapers' hot paths, run on the checked-in
+fixtures in bench/fixtures (see bench_fixtures.py).
+
+Each benchmark is warmed up once, then timed in ROUNDS rounds that are
+interleaved — every round runs each benchmark in turn, for about
+MIN_SECONDS / ROUNDS — so a slow spell of the host is spread over all of
+them instead of landing on whichever ran at the time.  The fastest round
+is reported (noise only ever adds time) together with its throughput —
+MB/s of input and chunks, records or pages per second — and the peak
+memory of one extra run under tracemalloc.  Nothing touches the network
+or Pinecone.
+
+Baselines are JSON files in bench/baselines.  ``--compare`` reruns the
+suite and fails (exit status 1) when a benchmark is slower than the
+baseline by more than it is allowed to be: ``--threshold`` percent, or
+NOISE_FACTOR times the run-to-run noise both runs measured for it,
+whichever is larger.  Noise is the spread of a benchmark's fastest rounds
+((lower quartile − fastest) / fastest), so on a quiet machine the
+threshold decides and on a noisy one the gate widens instead of failing
+at random; the allowance is printed next to every change.  Benchmarks
+over it are measured a second time and only count as regressions if
+they are still over it.
+
+Usage
+-----
+    python bench.py                          # run everything
+    python bench.py --filter chunk           # only benchmarks matching "chunk"
+    python bench.py --save before            # …and save bench/baselines/before.json
+    python bench.py --compare before         # compare with a saved baseline
+    python bench.py --compare before --threshold 5
+    python bench.py --list                   # benchmark names only
+"""
+
+import argparse
+import gzip
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+from bench_fixtures import (BENCH_DIR, DOCX_FIXTURE, MATTER_FIXTURES, PDF_FIXTURE,
+                            RESERVED_FIXTURE, STATUTE_FIXTURE, fixture_path,
+                            fixture_source)
+from token_chunking import TokenChunker
+from tokens import get_estimator
+
+# ── Configuration ────────────────────────────────────────────────────────────
+BASELINE_DIR = os.path.join(BENCH_DIR, "baselines")
+
+# Timing: ROUNDS interleaved rounds, each repeating a benchmark for at least
+# MIN_SECONDS / ROUNDS (at most MAX_CALLS calls a round)
+MIN_SECONDS = float(os.environ.get("BENCH_MIN_SECONDS", "1.0"))
+ROUNDS      = int(os.environ.get("BENCH_ROUNDS", "15"))
+MAX_CALLS   = 1000
+
+# --compare: slowdown (percent of the baseline's fastest round) counted as
+# a regression — at least REGRESSION_THRESHOLD, widened to NOISE_FACTOR
+# times the noise the two runs measured
+REGRESSION_THRESHOLD = 10.0
+NOISE_FACTOR         = 2.0
+
+MB = 1_000_000
+
+
+class Benchmark:
+    """One timed function.
+
+    ``fn()`` does the work once and returns how many output items
+    (``unit``) it produced; ``nbytes`` is the input size per call.
+    """
+
+    def __init__(self, name: str, fn: Callable[[], int], nbytes: int = 0,
+                 unit: str = ""):
+        self.name = name
+        self.fn = fn
+        self.nbytes = nbytes
+        self.unit = unit
+
+
+# ── Fixtures ─────────────────────────────────────────────────────────────────
+def _read(name: str) -> bytes:
+    with open(fixture_path(name), "rb") as fh:
+        data = fh.read()
+    return gzip.decompress(data) if name.endswith(".gz") else data
+
+
+def _utf8(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+# ── Benchmarks ───────────────────────────────────────────────────────────────
+def legal_code_benchmarks() -> list[Benchmark]:
+    import scrape_legal_code as legal
+
+    html = _read(STATUTE_FIXTURE).decode("utf-8")
+    reserved = _read(RESERVED_FIXTURE).decode("utf-8")
+    text = legal.StatuteDocument(html).text
+    sections = [s["text"] for s in legal.iter_sections([text])]
+    nhtml, ntext = _utf8(html), _utf8(text)
+
+    def parse(parser: str) -> Callable[[], int]:
+        return lambda: len(legal.StatuteDocument(html, parser).text)
+
+    def stream_text() -> int:
+        return sum(1 for _ in legal.StatuteTextStream().iter_text(html))
+
+    token_chunker = TokenChunker(get_estimator("chars"))
+
+    def records(chunker: str, tokens: bool = False) -> Callable[[], int]:
+        return lambda: len(legal.title_to_records(
+            99, legal.StatuteDocument(html), chunker=chunker,
+            token_chunker=token_chunker if tokens else None))
+
+    def stream_records() -> int:
+        return sum(1 for _ in legal.iter_title_records(99, html))
+
+    def reserved_check() -> int:
+        return sum(legal.is_reserved_title(page) for page in (reserved, html))
+
+    benches = [
+        Benchmark("legal.html_to_text[html.parser]", parse("html.parser"), nhtml),
+        Benchmark("legal.stream_text", stream_text, nhtml),
+        Benchmark("legal.title_to_records[section]", records("section"), nhtml, "records"),
+        Benchmark("legal.title_to_records[window]", records("window"), nhtml, "records"),
+        Benchmark("legal.title_to_records[section,tokens]", records("section", True),
+                  nhtml, "records"),
+        Benchmark("legal.iter_title_records[stream]", stream_records, nhtml, "records"),
+        Benchmark("legal.iter_sections", lambda: sum(1 for _ in legal.iter_sections([text])),
+                  ntext, "sections"),
+        Benchmark("legal.chunk_text", lambda: len(legal.chunk_text(text)), ntext, "chunks"),
+        Benchmark("legal.chunk_text[tokens]", lambda: len(token_chunker.chunk(text)),
+                  ntext, "chunks"),
+        Benchmark("legal.assign_tags", lambda: sum(len(legal.assign_tags(s)) for s in sections),
+                  ntext, "tags"),
+        Benchmark("legal.is_reserved_title", reserved_check, unit="titles"),
+    ]
+    if legal.HTML_PARSER != "html.parser":
+        benches.insert(0, Benchmark(f"legal.html_to_text[{legal.HTML_PARSER}]",
+                                    parse(legal.HTML_PARSER), nhtml))
+    return benches
+
+
+def legislation_benchmarks() -> list[Benchmark]:
+    import scrape_legislation as leg
+    from matter_urls import MatterUrlResolver
+
+    pages = [json.loads(_read(name)) for name in MATTER_FIXTURES]
+    matters = [m for page in pages for m in page]
+    pdf, docx = _read(PDF_FIXTURE), _read(DOCX_FIXTURE)
+    pdf_text, docx_text = leg.extract_pdf_text(pdf), leg.extract_docx_text(docx)
+    # What matter_to_records chunks: title plus cleaned attachment text
+    documents = [leg.clean_text(m["MatterTitle"]) for m in matters]
+    documents += [leg.clean_text(pdf_text), leg.clean_text(docx_text)]
+    raw = [m["MatterTitle"] for m in matters] + [pdf_text, docx_text]
+    ndocs, nraw = sum(map(_utf8, documents)), sum(map(_utf8, raw))
+    # One long attachment, like a 200-page budget PDF
+    large = " ".join(documents[-2:] * 5)
+    resolver = MatterUrlResolver(None, lazy=True)
+    source = leg.SOURCES[0]
+    token_chunker = TokenChunker(get_estimator("chars"))
+
+    def matter_records() -> int:
+        return sum(len(leg.matter_to_records(m, source["client"], source["label"],
+                                             source["url_base"], skip_attachments=True,
+                                             resolver=resolver))
+                   for m in matters)
+
+    return [
+        Benchmark("legislation.clean_text", lambda: sum(len(leg.clean_text(t)) for t in raw),
+                  nraw),
+        Benchmark("legislation.chunk_text",
+                  lambda: sum(len(leg.chunk_text(d)) for d in documents), ndocs, "chunks"),
+        Benchmark("legislation.chunk_text[large]", lambda: len(leg.chunk_text(large)),
+                  _utf8(large), "chunks"),
+        Benchmark("legislation.chunk_text[tokens]",
+                  lambda: sum(map(len, token_chunker.chunk_batch(documents))), ndocs, "chunks"),
+        Benchmark("legislation.chunk_text[tokens,large]",
+                  lambda: len(token_chunker.chunk(large)), _utf8(large), "chunks"),
+        Benchmark("legislation.assign_tags",
+                  lambda: sum(len(leg.assign_tags(d)) for d in documents), ndocs, "tags"),
+        Benchmark("legislation.extract_pdf_text", lambda: len(leg.extract_pdf_text(pdf)),
+                  len(pdf)),
+        Benchmark("legislation.extract_docx_text", lambda: len(leg.extract_docx_text(docx)),
+                  len(docx)),
+        Benchmark("legislation.matter_to_records", matter_records,
+                  sum(len(_read(name)) for name in MATTER_FIXTURES), "records"),
+    ]
+
+
+def upsert_benchmarks() -> list[Benchmark]:
+    import scrape_legal_code as legal
+    from batching import UpsertBatcher
+    from rate_limiter import TokenRateLimiter
+    from tokens import CharRatioEstimator
+
+    html = _read(STATUTE_FIXTURE).decode("utf-8")
+    records = legal.title_to_records(99, legal.StatuteDocument(html))
+    nbytes = sum(_utf8(r["text"]) for r in records)
+    batches = [records[i:i + 20] for i in range(0, len(records), 20)]
+    estimator = CharRatioEstimator()
+
+    def limiter() -> int:
+        # A budget that is never reached: only the bookkeeping is timed
+        limit = TokenRateLimiter(10 ** 12, estimator=estimator)
+        for batch in batches:
+            limit.wait_if_needed(batch)
+        return len(records)
+
+    def batcher() -> int:
+        b = UpsertBatcher(estimator)
+        for batch in batches:
+            b.add(batch)
+            for out in b.batches():
+                b.observe(out, 0.5)
+        return sum(len(out) for out in b.batches(final=True)) + b.records_batched
+
+    return [
+        Benchmark("tokens.count_batch[chars]",
+                  lambda: len(estimator.count_batch([r["text"] for r in records])),
+                  nbytes, "records"),
+        Benchmark("rate_limiter.wait_if_needed", limiter, nbytes, "records"),
+        Benchmark("batching.UpsertBatcher", batcher, nbytes, "records"),
+    ]
+
+
+SUITES = [legal_code_benchmarks, legislation_benchmarks, upsert_benchmarks]
+
+
+# ── Running ──────────────────────────────────────────────────────────────────
+def measure(benches: list[Benchmark], progress: bool = True) -> dict:
+    """Fastest seconds per call, noise, throughput and tracemalloc peak of
+    each benchmark, timed in interleaved rounds (see module docstring)."""
+    items, calls = {}, {}
+    for bench in benches:
+        start = time.perf_counter()
+        items[bench.name] = bench.fn()   # warm-up (imports, regexes, caches)
+        once = time.perf_counter() - start
+        calls[bench.name] = max(1, min(MAX_CALLS,
+                                       math.ceil(MIN_SECONDS / ROUNDS / max(once, 1e-6))))
+
+    times: dict[str, list[float]] = {bench.name: [] for bench in benches}
+    for r in range(ROUNDS):
+        if progress:
+            print(f"  round {r + 1}/{ROUNDS} …", end="\r", flush=True)
+        # Start each round at a different benchmark so none always runs first
+        shift = r % len(benches)
+        for bench in benches[shift:] + benches[:shift]:
+            n = calls[bench.name]
+            start = time.perf_counter()
+            for _ in range(n):
+                bench.fn()
+            times[bench.name].append((time.perf_counter() - start) / n)
+    if progress:
+        print(" " * 24, end="\r")
+
+    results = {}
+    for bench in benches:
+        tracemalloc.start()
+        try:
+            bench.fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        rounds = sorted(times[bench.name])
+        best = rounds[0]
+        result = {
+            "seconds":    best,
+            "median":     statistics.median(rounds),
+            "noise":      rounds[len(rounds) // 4] / best - 1 if best else 0.0,
+            "rounds":     len(rounds),
+            "calls":      calls[bench.name],
+            "peak_bytes": peak,
+            "bytes":      bench.nbytes,
+            "mb_per_s":   bench.nbytes / MB / best if best else 0.0,
+        }
+        if bench.unit:
+            result["unit"] = bench.unit
+            result["items"] = items[bench.name]
+            result["items_per_s"] = items[bench.name] / best if best else 0.0
+        results[bench.name] = result
+    return results
+
+
+def collect(pattern: Optional[str] = None) -> list[Benchmark]:
+    benches = [b for suite in SUITES for b in suite()]
+    if pattern:
+        benches = [b for b in benches if pattern.lower() in b.name.lower()]
+    return benches
+
+
+def _row(name: str, result: dict) -> str:
+    rate = (f"{result['items_per_s']:>11,.0f} {result['unit']}/s"
+            if "unit" in result else "")
+    speed = f"{result['mb_per_s']:>8.2f} MB/s" if result["bytes"] else f"{'—':>13}"
+    return (f"  {name:<38} {result['seconds'] * 1000:>9.2f} ms "
+            f"{result['noise'] * 100:>6.1f}% {speed} {result['peak_bytes'] / MB:>8.2f} MB  "
+            f"{rate}")
+
+
+def run(pattern: Optional[str] = None) -> dict:
+    benches = collect(pattern)
+    if not benches:
+        sys.exit(f"❌  No benchmark matches {pattern!r}")
+    print(f"\n  Timing {len(benches)} benchmarks in {ROUNDS} interleaved rounds")
+    results = measure(benches)
+    print(f"  {'benchmark':<38} {'fastest':>12} {'noise':>7} {'throughput':>13} "
+          f"{'peak mem':>11}")
+    for name, result in results.items():
+        print(_row(name, result))
+    return results
+
+
+def environment() -> dict:
+    import scrape_legal_code as legal
+    return {
+        "python":   platform.python_version(),
+        "platform": platform.platform(),
+        "machine":  platform.machine(),
+        "cpus":     os.cpu_count(),
+        "parser":   legal.HTML_PARSER,
+        "fixtures": fixture_source(),
+        "saved":    time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def baseline_path(name: str) -> str:
+    if os.sep in name or name.endswith(".json"):
+        return name
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def save(name: str, results: dict):
+    path = baseline_path(name)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"environment": environment(), "results": results}, fh, indent=2)
+        fh.write("\n")
+    print(f"\n💾  Baseline saved to {path}")
+
+
+def load_baseline(name: str) -> dict:
+    path = baseline_path(name)
+    try:
+        with open(path, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+    except (OSError, ValueError) as exc:
+        sys.exit(f"❌  Can't read baseline {path}: {exc}")
+    baseline["path"] = path
+    return baseline
+
+
+def allowance(old: dict, now: dict, threshold: float) -> float:
+    """Percent slowdown tolerated before a benchmark counts as regressed."""
+    noise = (old.get("noise", 0.0) + now.get("noise", 0.0)) * 100
+    return max(threshold, NOISE_FACTOR * noise)
+
+
+def regressions(baseline: dict, results: dict, threshold: float) -> list[str]:
+    """Names of the benchmarks slower than the baseline allows."""
+    out = []
+    for bench_name, now in results.items():
+        old = baseline["results"].get(bench_name)
+        if old and old["seconds"] and \
+                (now["seconds"] / old["seconds"] - 1) * 100 > allowance(old, now, threshold):
+            out.append(bench_name)
+    return out
+
+
+def compare(baseline: dict, results: dict, threshold: float) -> bool:
+    """Print the change against a baseline; True if nothing regressed."""
+    env = baseline.get("environment", {})
+    print(f"\n  Compared with {baseline['path']} (Python {env.get('python', '?')}, "
+          f"{env.get('machine', '?')}, saved {env.get('saved', '?')})")
+    if env.get("python") != platform.python_version() or env.get("parser") != \
+            environment()["parser"]:
+        print("  ⚠️  Different Python or HTML parser — the numbers are not comparable")
+    if env.get("fixtures", "unknown") != fixture_source():
+        print(f"  ⚠️  Baseline fixtures: {env.get('fixtures', 'unknown')}; "
+              f"now: {fixture_source()} — the numbers are not comparable")
+    print(f"\n  {'benchmark':<38} {'baseline':>12} {'now':>12} {'time':>8} "
+          f"{'allowed':>8} {'memory':>8}")
+    slower = set(regressions(baseline, results, threshold))
+    for bench_name, now in results.items():
+        old = baseline["results"].get(bench_name)
+        if old is None:
+            print(f"  {bench_name:<38} {'—':>12} {now['seconds'] * 1000:>9.2f} ms    (new)")
+            continue
+        change = (now["seconds"] / old["seconds"] - 1) * 100 if old["seconds"] else 0.0
+        allowed = allowance(old, now, threshold)
+        memory = ((now["peak_bytes"] / old["peak_bytes"] - 1) * 100
+                  if old["peak_bytes"] else 0.0)
+        flag = ""
+        if bench_name in slower:
+            flag = "  ❌ slower"
+        elif change < -allowed:
+            flag = "  🚀 faster"
+        print(f"  {bench_name:<38} {old['seconds'] * 1000:>9.2f} ms "
+              f"{now['seconds'] * 1000:>9.2f} ms {change:>+7.1f}% {allowed:>7.1f}% "
+              f"{memory:>+7.1f}%{flag}")
+
+    if slower:
+        print(f"\n❌  {len(slower)} benchmark(s) slower than {baseline['path']} allows: "
+              f"{', '.join(sorted(slower))}")
+        return False
+    print(f"\n✅  No benchmark slower than {baseline['path']} allows "
+          f"(≥{threshold:g}%, or {NOISE_FACTOR:g}× the measured noise)")
+    return True
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────────
+def main():
+    global MIN_SECONDS
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers' hot paths.")
+    parser.add_argument("--filter", metavar="TEXT",
+                        help="Only run benchmarks whose name contains TEXT")
+    parser.add_argument("--save", metavar="NAME",
+                        help="Save the results as bench/baselines/NAME.json (or a path)")
+    parser.add_argument("--compare", metavar="NAME",
+                        help="Compare with a saved baseline; exit 1 on a regression")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help=f"Smallest percent slowdown counted as a regression; "
+                             f"noisy benchmarks are allowed {NOISE_FACTOR:g}× their "
+                             f"measured noise (default {REGRESSION_THRESHOLD:g})")
+    parser.add_argument("--min-seconds", type=float, default=MIN_SECONDS,
+                        help=f"Time each benchmark for at least this long in all, "
+                             f"over {ROUNDS} rounds (default {MIN_SECONDS:g})")
+    parser.add_argument("--list", action="store_true", help="List benchmark names")
+    args = parser.parse_args()
+
+    if args.list:
+        for bench in collect(args.filter):
+            print(bench.name)
+        return
+
+    MIN_SECONDS = args.min_seconds
+    results = run(args.filter)
+    if args.save:
+        save(args.save, results)
+    if args.compare:
+        baseline = load_baseline(args.compare)
+        flagged = regressions(baseline, results, args.threshold)
+        if flagged:
+            # A slow spell can outlast a round: measure the suspects again
+            # and keep each one's faster run
+            print(f"\n  🔁  Re-measuring {len(flagged)} benchmark(s) over the allowance")
+            again = measure([b for b in collect(args.filter) if b.name in flagged])
+            for bench_name, result in again.items():
+                if result["seconds"] < results[bench_name]["seconds"]:
+                    results[bench_name] = result
+        if not compare(baseline, results, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
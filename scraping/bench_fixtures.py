@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+bench_fixtures.py
+=================
+Fixtures for bench.py: the inputs the scrapers' hot paths see in a real run.
+
+    bench/fixtures/statute_title.html.gz   a large statute title (~1.5 MB of HTML)
+    bench/fixtures/reserved_title.html     a "(RESERVED)" placeholder title
+    bench/fixtures/matters_page{1,2,3}.json  Legistar /matters pages (100 each)
+    bench/fixtures/attachment.pdf          a multi-page text PDF
+    bench/fixtures/attachment.docx         a Word attachment
+    bench/fixtures/SOURCE.json             where the files above came from
+
+The checked-in files are the fixtures; this module only (re)creates them.
+By default they are generated from a fixed seed, so they are identical on
+every machine and shaped like the live pages: nav preamble, TITLE / PART /
+CHAPTER / § headings, statute citations, Legistar field names.  With
+``--record`` they are downloaded from the live sites instead — into a
+scratch directory first, so a download that fails halfway leaves the old
+set untouched.  SOURCE.json says which kind is checked in (seed, or date,
+title and Legistar client), bench.py saves that with every baseline and
+warns when a comparison crosses kinds.  Re-recording changes every
+number, so save a fresh baseline after doing it.
+
+Usage
+-----
+    python bench_fixtures.py                       # regenerate (deterministic)
+    python bench_fixtures.py --record              # record from the live sites
+    python bench_fixtures.py --record --title 42   # …with a different title
+"""
+
+import argparse
+import gzip
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+
+# ── Configuration ────────────────────────────────────────────────────────────
+BENCH_DIR   = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench")
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+
+STATUTE_FIXTURE  = "statute_title.html.gz"
+RESERVED_FIXTURE = "reserved_title.html"
+MATTER_FIXTURES  = ["matters_page1.json", "matters_page2.json", "matters_page3.json"]
+PDF_FIXTURE      = "attachment.pdf"
+DOCX_FIXTURE     = "attachment.docx"
+SOURCE_FIXTURE   = "SOURCE.json"
+
+SEED = 2025
+
+# Generated statute title: HTML size to stop at, chapters per part,
+# sections per chapter
+STATUTE_BYTES        = 1_500_000
+CHAPTERS_PER_PART    = 6
+SECTIONS_PER_CHAPTER = 12
+
+# Generated attachments
+PDF_PAGES       = 24
+DOCX_PARAGRAPHS = 180
+
+# Title recorded with --record (Crimes and Offenses, ~7 MB)
+RECORD_TITLE = 18
+
+
+def fixture_path(name: str) -> str:
+    return os.path.join(FIXTURE_DIR, name)
+
+
+def fixture_source() -> str:
+    """One line saying how the checked-in fixtures were made."""
+    try:
+        with open(fixture_path(SOURCE_FIXTURE), encoding="utf-8") as fh:
+            source = json.load(fh)
+    except (OSError, ValueError):
+        return "unknown"
+    if source.get("source") == "generated":
+        return f"generated (seed {source.get('seed')})"
+    line = (f"recorded {source.get('recorded', '?')} (title {source.get('title')}, "
+            f"{source.get('client')})")
+    if source.get("kept"):
+        line += f", kept {', '.join(source['kept'])}"
+    return line
+
+
+# ── Deterministic text ───────────────────────────────────────────────────────
+# Plain words plus keywords from both scrapers' tag tables, so tagging does
+# real work instead of scanning text that never matches.
+_WORDS = (
+    "the a of to and in any or by shall be such person who under this section "
+    "subsection paragraph provided that within days after notice written upon "
+    "application department commission board authority may not less than more "
+    "including without limitation pursuant thereto hereof therein except where "
+    "defined purposes chapter part title act amended effective date provisions "
+    "same manner required prescribed regulations information report filed made "
+    "offense penalty felony misdemeanor imprisonment conviction court judge jury "
+    "appeal evidence property deed mortgage lien tenant landlord lease tax "
+    "revenue bond debt budget appropriation municipal borough township county "
+    "ordinance vehicle driver highway traffic license registration water "
+    "conservation wildlife health hospital medical school student employment "
+    "wage union compensation election ballot voter police emergency safety "
+    "corporation partnership commerce utility electric contract agreement "
+    "vendor procurement zoning housing rental infrastructure sewer paving grant "
+    "maintenance demolition construction transit pedestrian library"
+).split()
+
+_HEADING_WORDS = (
+    "GENERAL PROVISIONS DEFINITIONS ADMINISTRATION ENFORCEMENT PENALTIES "
+    "PROCEDURE RECORDS LICENSES FEES OFFENSES PROPERTY ELECTIONS COURTS "
+    "FINANCE OFFICERS POWERS DUTIES PROCEEDINGS MISCELLANEOUS"
+).split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(_WORDS) for _ in range(words))
+    if rng.random() < 0.15:
+        text += f" as provided in {rng.randint(1, 75)} Pa.C.S. § {rng.randint(101, 9999)}"
+    return text[0].upper() + text[1:] + "."
+
+
+def _paragraph(rng: random.Random, sentences: int) -> str:
+    return " ".join(_sentence(rng, rng.randint(8, 40)) for _ in range(sentences))
+
+
+def _heading(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_HEADING_WORDS) for _ in range(words))
+
+
+def _roman(n: int) -> str:
+    out = ""
+    for value, numeral in ((10, "X"), (9, "IX"), (5, "V"), (4, "IV"), (1, "I")):
+        while n >= value:
+            out += numeral
+            n -= value
+    return out
+
+
+# ── Generated fixtures ───────────────────────────────────────────────────────
+def generate_statute_html(rng: random.Random, ttl: int = 99,
+                          target_bytes: int = STATUTE_BYTES) -> str:
+    """A statute title laid out like the PA General Assembly's pages."""
+    name = f"Title {ttl} - {_heading(rng, 3)}"
+    out = [
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">",
+        f"<title>{name}</title>",
+        "<style>p { margin: 0 }</style><script>var nav = 1;</script></head><body>",
+        "<header>Pennsylvania General Assembly</header>",
+        "<nav>Home | Legislation | Statutes | Consolidated Statutes</nav>",
+        "<p>Unofficial Purdon's &nbsp; Consolidated Statutes</p>",
+        f"<p class=\"title\">TITLE {ttl}<br>{_heading(rng, 3)}</p>",
+    ]
+    size = sum(len(s) for s in out)
+    part = chapter = 0
+    while size < target_bytes:
+        part += 1
+        block = [f"<p class=\"part\">PART {_roman(part)}<br>{_heading(rng, 2)}</p>"]
+        for _ in range(CHAPTERS_PER_PART):
+            chapter += 1
+            block.append(f"<p class=\"chapter\">CHAPTER {chapter}<br>{_heading(rng, 2)}</p>")
+            for s in range(1, SECTIONS_PER_CHAPTER + 1):
+                number = chapter * 100 + s
+                block.append(f"<p class=\"section\">§ {number}. "
+                             f"{_heading(rng, 2).capitalize()}.</p>")
+                # Mostly short sections, now and then one long enough to split
+                for _ in range(rng.choice((1, 1, 2, 3, 6, 12))):
+                    block.append(f"<p>&nbsp;&nbsp;({chr(97 + rng.randint(0, 5))}) "
+                                 f"{_paragraph(rng, rng.randint(2, 7))}</p>")
+        block.append(f"<p>(Dec. 6, 1972, P.L.{rng.randint(1000, 1600)}, "
+                     f"No.{rng.randint(100, 400)}, eff. 6 months)</p>")
+        text = "\n".join(block) + "\n"
+        out.append(text)
+        size += len(text)
+    out.append("<footer>Last updated</footer></body></html>\n")
+    return "\n".join(out)
+
+
+def generate_reserved_html(ttl: int = 14) -> str:
+    return ("<!DOCTYPE html>\n<html><head>"
+            f"<title>Title {ttl} - (RESERVED)</title></head><body>\n"
+            "<nav>Home | Legislation | Statutes | Consolidated Statutes</nav>\n"
+            f"<p class=\"title\">TITLE {ttl}<br>(RESERVED)</p>\n"
+            "</body></html>\n")
+
+
+def generate_matter_pages(rng: random.Random, pages: int = 3,
+                          per_page: int = 100) -> list[list[dict]]:
+    types = [("Resolution", 0.55), ("Ordinance", 0.25), ("Report", 0.12),
+             ("Communication", 0.08)]
+    statuses = ["Adopted", "Passed Finally", "In Committee", "Read and referred",
+                "Held for Cablecast Public Hearing", "Signed by the Mayor"]
+    bodies = ["City Council", "Committee on Finance and Law",
+              "Committee on Public Works and Infrastructure",
+              "Committee on Land Use and Economic Development",
+              "Committee on Public Safety and Wellness"]
+    result = []
+    matter_id = 27000
+    for page in range(pages):
+        matters = []
+        for i in range(per_page):
+            matter_id += rng.randint(1, 4)
+            kind = rng.choices([t for t, _ in types], [w for _, w in types])[0]
+            month, day = rng.randint(1, 12), rng.randint(1, 28)
+            title = _paragraph(rng, rng.randint(1, 4))
+            if rng.random() < 0.2:
+                title = f"<p>{title}</p>"
+            matters.append({
+                "MatterId":             matter_id,
+                "MatterGuid":           f"{rng.getrandbits(128):032X}",
+                "MatterLastModifiedUtc": f"2025-{month:02d}-{day:02d}T"
+                                         f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00.51",
+                "MatterFile":           f"2025-{page * per_page + i + 1:04d}",
+                "MatterName":           title[:60],
+                "MatterTitle":          title,
+                "MatterTypeId":         30 + [t for t, _ in types].index(kind),
+                "MatterTypeName":       kind,
+                "MatterStatusName":     rng.choice(statuses),
+                "MatterBodyName":       rng.choice(bodies),
+                "MatterIntroDate":      f"2025-{month:02d}-{day:02d}T00:00:00",
+                "MatterAgendaDate":     None,
+                "MatterPassedDate":     None,
+                "MatterEnactmentNumber": None,
+                "MatterRequester":      None,
+                "MatterNotes":          None,
+                "MatterVersion":        str(rng.randint(1, 3)),
+            })
+        result.append(matters)
+    return result
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def generate_pdf(rng: random.Random, pages: int = PDF_PAGES) -> bytes:
+    """A plain multi-page text PDF (Helvetica, one content stream per page)."""
+    objects: list[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")                  # filled in once the pages exist
+    pages_obj = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    kids = []
+    for _ in range(pages):
+        lines = []
+        while len(lines) < 48:
+            words = _paragraph(rng, 1).split()
+            line: list[str] = []
+            for word in words:
+                if sum(len(w) + 1 for w in line) + len(word) > 90:
+                    lines.append(" ".join(line))
+                    line = []
+                line.append(word)
+            lines.append(" ".join(line))
+        ops = ["BT", "/F1 9 Tf", "11 TL", "54 750 Td"]
+        ops += [f"({_pdf_escape(line)}) '" for line in lines[:48]]
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream
+                      + b"\nendstream")
+        kids.append(add(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+                        b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+                        % (pages_obj, font, content)))
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_obj
+    objects[pages_obj - 1] = (b"<< /Type /Pages /Kids [%s] /Count %d >>"
+                              % (b" ".join(b"%d 0 R" % k for k in kids), len(kids)))
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+              % (len(objects) + 1, catalog, xref))
+    return out.getvalue()
+
+
+def generate_docx(rng: random.Random, paragraphs: int = DOCX_PARAGRAPHS) -> bytes:
+    from docx import Document
+    doc = Document()
+    doc.core_properties.author = "Office of the City Clerk"
+    doc.add_heading(f"Fiscal Note — {_heading(rng, 3).title()}", level=1)
+    for i in range(paragraphs):
+        if i % 20 == 0:
+            doc.add_heading(_heading(rng, 2).title(), level=2)
+        doc.add_paragraph(_paragraph(rng, rng.randint(2, 6)))
+    out = io.BytesIO()
+    doc.save(out)
+    return _fixed_zip_times(out.getvalue())
+
+
+def _fixed_zip_times(data: bytes) -> bytes:
+    """Re-pack a zip with every entry dated 1980-01-01 (cf. gzip's mtime=0)."""
+    out = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(data)) as src, \
+            zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            dst.writestr(zipfile.ZipInfo(info.filename, (1980, 1, 1, 0, 0, 0)),
+                         src.read(info), zipfile.ZIP_DEFLATED)
+    return out.getvalue()
+
+
+def generate():
+    rng = random.Random(SEED)
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    html = generate_statute_html(rng)
+    _write(FIXTURE_DIR, STATUTE_FIXTURE, gzip.compress(html.encode("utf-8"), mtime=0))
+    _write(FIXTURE_DIR, RESERVED_FIXTURE, generate_reserved_html().encode("utf-8"))
+    for name, page in zip(MATTER_FIXTURES, generate_matter_pages(rng, len(MATTER_FIXTURES))):
+        _write(FIXTURE_DIR, name, json.dumps(page, indent=1).encode("utf-8"))
+    _write(FIXTURE_DIR, PDF_FIXTURE, generate_pdf(rng))
+    _write(FIXTURE_DIR, DOCX_FIXTURE, generate_docx(rng))
+    _write_source(FIXTURE_DIR, {"source": "generated", "seed": SEED})
+
+
+# ── Recorded fixtures ────────────────────────────────────────────────────────
+def record(ttl: int = RECORD_TITLE):
+    """Download every fixture from the live PA and Legistar sites.
+
+    Everything lands in a scratch directory and is moved into place only
+    once the whole set is down, so a failure keeps the old fixtures.
+    """
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".record-", dir=BENCH_DIR)
+    try:
+        source = _record_into(staging, ttl)
+        for name in os.listdir(staging):
+            os.replace(os.path.join(staging, name), fixture_path(name))
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    print(f"\n✅  Fixtures {fixture_source()} — save a fresh baseline "
+          f"(python bench.py --save reference)")
+    return source
+
+
+def _record_into(directory: str, ttl: int) -> dict:
+    import scrape_legal_code as legal
+    import scrape_legislation as leg
+    import http_client
+
+    html = legal.fetch_title_html(ttl)
+    if not html or legal.is_reserved_title(html):
+        sys.exit(f"❌  Title {ttl} could not be downloaded or is reserved")
+    _write(directory, STATUTE_FIXTURE, gzip.compress(html.encode("utf-8"), mtime=0))
+
+    kept = []
+    for candidate in legal.TITLE_RANGE:
+        html = legal.fetch_title_html(candidate)
+        if html and legal.is_reserved_title(html):
+            _write(directory, RESERVED_FIXTURE, html.encode("utf-8"))
+            break
+    else:
+        print("⚠️  No reserved title found — keeping the existing fixture")
+        kept.append(RESERVED_FIXTURE)
+
+    client = leg.SOURCES[0]["client"]
+    matters: list[dict] = []
+    after = None
+    for name in MATTER_FIXTURES:
+        page = leg.fetch_matters(client, after=after)
+        if not page:
+            sys.exit(f"❌  Legistar ({client}) returned an empty /matters page")
+        _write(directory, name, json.dumps(page, indent=1).encode("utf-8"))
+        matters.extend(page)
+        after = leg.matter_cursor(page[-1])
+
+    wanted = {"pdf": PDF_FIXTURE, "docx": DOCX_FIXTURE}
+    for matter in matters:
+        for att in leg.fetch_attachments(client, matter["MatterId"]):
+            link = att.get("MatterAttachmentHyperlink") or ""
+            kind = leg.attachment_kind(link)
+            if kind in wanted:
+                resp = http_client.get(link, timeout=60)
+                if resp.status_code == 200 and len(resp.content) < leg.MAX_ATTACHMENT_BYTES:
+                    _write(directory, wanted.pop(kind), resp.content)
+        if not wanted:
+            break
+    for name in wanted.values():
+        print(f"⚠️  No {name} attachment found — keeping the existing fixture")
+        kept.append(name)
+
+    source = {"source": "recorded", "recorded": time.strftime("%Y-%m-%d"),
+              "title": ttl, "client": client, "kept": kept}
+    _write_source(directory, source)
+    return source
+
+
+def _write(directory: str, name: str, data: bytes):
+    with open(os.path.join(directory, name), "wb") as fh:
+        fh.write(data)
+    print(f"  📄  {name:<24} {len(data):>10,} bytes")
+
+
+def _write_source(directory: str, source: dict):
+    _write(directory, SOURCE_FIXTURE, (json.dumps(source, indent=2) + "\n").encode("utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="(Re)create the benchmark fixtures.")
+    parser.add_argument("--record", action="store_true",
+                        help="Download the fixtures from the live sites")
+    parser.add_argument("--title", type=int, default=RECORD_TITLE,
+                        help=f"Statute title to record (default {RECORD_TITLE})")
+    args = parser.parse_args()
+    if args.record:
+        record(args.title)
+    else:
+        generate()
+
+
+if __name__ == "__main__":
+    main()
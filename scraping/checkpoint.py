@@ -0,0 +1,133 @@
+"""
+checkpoint.py
+=============
+Durable progress markers so an interrupted scraper run can ``--resume``.
+
+A unit of work (a statute title, a Legistar matter) only counts as done once
+every record it produced has been upserted.  ``FlushTracker`` works that out
+from the order records enter the upsert buffer and the batches that leave
+it; ``Checkpoint`` persists the newest fully-flushed unit as JSON, written
+atomically so a crash mid-write never leaves a corrupt file.
+
+Files live under ``.cache/checkpoints/<name>.json``.
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from typing import Any, Iterable, Iterator, Optional
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                      ".cache", "checkpoints")
+
+
+class Checkpoint:
+    """JSON progress file for one scraper, tied to the run's parameters.
+
+    ``signature`` describes what the run covers (date range, title list …);
+    a saved checkpoint with a different signature is ignored on resume.
+    """
+
+    def __init__(self, name: str, signature: dict,
+                 directory: str = DEFAULT_CHECKPOINT_DIR):
+        self.path = os.path.join(directory, f"{name}.json")
+        self.signature = signature
+        self.state: dict = {}
+        self._lock = threading.Lock()   # saved from the upsert thread too
+
+    def load(self) -> dict:
+        """Return the saved state for this signature, or {} to start fresh."""
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                saved = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+        if saved.get("signature") != self.signature:
+            print(f"  ⚠️  Checkpoint {self.path} is for different run "
+                  f"parameters — starting from the beginning.")
+            return {}
+        self.state = saved.get("state", {})
+        return self.state
+
+    def save(self, **updates: Any):
+        """Merge ``updates`` into the state and write it atomically."""
+        with self._lock:
+            self.state.update(updates)
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump({"signature": self.signature, "state": self.state}, fh,
+                          indent=2)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp, self.path)
+
+    @property
+    def last_flushed_id(self) -> Optional[str]:
+        """``_id`` of the final record in the last upserted batch."""
+        last_batch = self.state.get("last_batch")
+        return last_batch[-1] if last_batch else None
+
+    def clear(self):
+        """Forget all progress (run finished, or a fresh run is starting)."""
+        with self._lock:
+            self.state = {}
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+class FlushTracker:
+    """Report which work units are fully upserted as batches are flushed.
+
+    Call ``added(unit, n)`` once a unit's ``n`` records are all in the
+    buffer and ``flushed(n)`` after every upsert of ``n`` records; both
+    return the newest unit whose records have all been flushed (or None).
+    Safe to call from the producer and the upsert thread at once.
+    """
+
+    def __init__(self):
+        self._marks: deque = deque()   # (buffer end offset, unit)
+        self._added = 0
+        self._flushed = 0
+        self._lock = threading.Lock()
+
+    def added(self, unit: Any, count: int) -> Optional[Any]:
+        with self._lock:
+            self._added += count
+            self._marks.append((self._added, unit))
+        return self.flushed(0)
+
+    def flushed(self, count: int) -> Optional[Any]:
+        with self._lock:
+            self._flushed += count
+            done = None
+            while self._marks and self._marks[0][0] <= self._flushed:
+                done = self._marks.popleft()[1]
+            return done
+
+
+def skip_flushed(records: Iterable[dict], last_id: Optional[str],
+                 prefix: str) -> Iterator[dict]:
+    """Drop the leading records of a unit that was partly upserted.
+
+    ``last_id`` is the final ``_id`` of the last flushed batch.  If it belongs
+    to this unit (starts with ``prefix``), every record up to and including
+    it is already in Pinecone.  Should the id no longer appear (the source
+    changed since), nothing is dropped.
+    """
+    if not last_id or not last_id.startswith(prefix):
+        yield from records
+        return
+    held = []
+    it = iter(records)
+    for record in it:
+        if record["_id"] == last_id:
+            break
+        held.append(record)
+    else:
+        yield from held
+        return
+    yield from it
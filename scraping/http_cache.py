@@ -0,0 +1,225 @@
+"""
+http_cache.py
+=============
+On-disk HTTP cache with conditional revalidation, used by ``http_client``.
+
+Response bodies are stored content-addressed (``objects/ab/<sha256>``) and
+indexed by URL in a small SQLite database together with their ``ETag`` and
+``Last-Modified`` validators.  A later GET for the same URL is sent with
+``If-None-Match`` / ``If-Modified-Since``; on ``304 Not Modified`` the body
+is served from disk, so unchanged statute titles and Legistar responses cost
+one round trip and no transfer.
+
+Only responses that carry a validator are cached — without one there is no
+way to revalidate, so the body would have to be downloaded again anyway.
+``stream=True`` downloads are left to the caller and not stored, so large
+bodies are never pulled into memory just to be cached.  The cache is
+size-bounded and evicts least-recently-used entries.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# ── Configuration ────────────────────────────────────────────────────────────
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 ".cache", "http")
+
+# Total bytes of cached bodies before LRU eviction kicks in
+HTTP_CACHE_MAX_BYTES = int(os.environ.get("HTTP_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+
+# After eviction the cache is trimmed to this fraction of the limit
+EVICT_TO = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url           TEXT PRIMARY KEY,
+    digest        TEXT NOT NULL,
+    size          INTEGER NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    content_type  TEXT,
+    last_used     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+"""
+
+
+class HttpCache:
+    """Content-addressed body store + URL index with LRU eviction."""
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR,
+                 max_bytes: int = HTTP_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0          # served from disk after a 304
+        self.misses = 0        # downloaded (and stored when possible)
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite"),
+                                   check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        # Running size of the bodies in the index, so a store doesn't have to
+        # sum the whole table; re-summed exactly only when it passes the limit
+        self._total = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    # ── Object store ─────────────────────────────────────────────────────
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def _write_object(self, body: bytes) -> str:
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as fh:
+                fh.write(body)
+            os.replace(tmp, path)
+        return digest
+
+    def _read_object(self, digest: str) -> Optional[bytes]:
+        try:
+            with open(self._path(digest), "rb") as fh:
+                return fh.read()
+        except OSError:
+            return None
+
+    # ── Index ────────────────────────────────────────────────────────────
+    def lookup(self, url: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest, etag, last_modified, content_type "
+                "FROM entries WHERE url = ?", (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        digest, etag, last_modified, content_type = row
+        return {"digest": digest, "etag": etag, "last_modified": last_modified,
+                "content_type": content_type}
+
+    def store(self, url: str, resp: requests.Response):
+        """Cache a 200 response body if it carries a validator."""
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        body = resp.content
+        digest = self._write_object(body)
+        with self._lock:
+            old = self._db.execute("SELECT size FROM entries WHERE url = ?",
+                                   (url,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, digest, len(body), etag, last_modified,
+                 resp.headers.get("Content-Type"), time.time()),
+            )
+            self._db.commit()
+            self._total += len(body) - (old[0] if old else 0)
+        if self._total > self.max_bytes:
+            self._evict()
+
+    def _touch(self, url: str):
+        with self._lock:
+            self._db.execute("UPDATE entries SET last_used = ? WHERE url = ?",
+                             (time.time(), url))
+            self._db.commit()
+
+    def _forget(self, url: str):
+        with self._lock:
+            old = self._db.execute("SELECT size FROM entries WHERE url = ?",
+                                   (url,)).fetchone()
+            self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+            self._db.commit()
+            if old:
+                self._total -= old[0]
+
+    def _evict(self):
+        """Drop least-recently-used entries until under the size limit."""
+        with self._lock:
+            # Exact total: other processes may share the cache directory
+            total = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            self._total = total
+            if total <= self.max_bytes:
+                return
+            target = self.max_bytes * EVICT_TO
+            victims = []
+            for url, digest, size in self._db.execute(
+                    "SELECT url, digest, size FROM entries ORDER BY last_used"):
+                if total <= target:
+                    break
+                victims.append((url, digest))
+                total -= size
+            for url, _ in victims:
+                self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+            self._db.commit()
+            self._total = total
+            # Bodies are shared by digest — only unlink unreferenced ones
+            for _, digest in victims:
+                still_used = self._db.execute(
+                    "SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,),
+                ).fetchone()
+                if not still_used:
+                    try:
+                        os.remove(self._path(digest))
+                    except OSError:
+                        pass
+
+    # ── Conditional GET ──────────────────────────────────────────────────
+    def get(self, session: requests.Session, url: str, **kwargs) -> requests.Response:
+        """GET ``url`` with revalidation, serving the body from disk on 304."""
+        entry = self.lookup(url)
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        resp = session.get(url, headers=headers, **kwargs)
+
+        if resp.status_code == 304 and entry:
+            body = self._read_object(entry["digest"])
+            if body is not None:
+                self.hits += 1
+                self._touch(url)
+                return _cached_response(url, body, entry, resp)
+            # Body vanished from disk — fetch it again unconditionally
+            self._forget(url)
+            for name in ("If-None-Match", "If-Modified-Since"):
+                headers.pop(name, None)
+            resp = session.get(url, headers=headers, **kwargs)
+
+        self.misses += 1
+        if resp.status_code == 200 and not kwargs.get("stream"):
+            self.store(url, resp)
+        return resp
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def _cached_response(url: str, body: bytes, entry: dict,
+                     revalidation: requests.Response) -> requests.Response:
+    """Build a 200 response from a cached body."""
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.url = url
+    resp._content = body
+    resp._content_consumed = True     # lets iter_content() serve the body
+    resp.headers = CaseInsensitiveDict(revalidation.headers)
+    if entry["content_type"]:
+        resp.headers["Content-Type"] = entry["content_type"]
+    resp.headers["Content-Length"] = str(len(body))
+    resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+    resp.request = revalidation.request
+    return resp
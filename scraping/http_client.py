@@ -0,0 +1,125 @@
+"""
+http_client.py
+==============
+Shared HTTP layer for the scrapers.
+
+Every request goes through one ``requests.Session`` per process, so
+connections to legis.state.pa.us, webapi.legistar.com and
+pittsburgh.legistar.com are pooled and kept alive instead of paying a new
+TCP + TLS handshake per call.  Browser-like headers and default timeouts
+are applied here rather than at each call site.
+
+Usage
+-----
+    import http_client
+
+    resp = http_client.get(url)                  # pooled, default timeout
+    resp = http_client.head(url, allow_redirects=True, timeout=10)
+
+    # Larger pools for highly concurrent runs (before the first request)
+    http_client.configure(pool_maxsize=32)
+
+    # Revalidating on-disk cache for GETs (see http_cache.py)
+    http_client.enable_cache(".cache/http")
+"""
+
+import os
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_cache import HttpCache
+
+# ── Configuration ────────────────────────────────────────────────────────────
+# Distinct hosts kept in the pool, and connections kept alive per host
+POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", "8"))
+POOL_MAXSIZE     = int(os.environ.get("HTTP_POOL_MAXSIZE", "16"))
+
+# Seconds to wait for a response unless the caller passes its own timeout
+DEFAULT_TIMEOUT = 30
+
+# Browser-like headers (the PA website blocks bare requests)
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+}
+
+_session: Optional[requests.Session] = None
+_cache: Optional[HttpCache] = None
+_lock = threading.Lock()
+
+
+# ── Session management ───────────────────────────────────────────────────────
+def _build_session(pool_connections: int, pool_maxsize: int) -> requests.Session:
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def configure(pool_connections: int = POOL_CONNECTIONS,
+              pool_maxsize: int = POOL_MAXSIZE):
+    """(Re)create the shared session with the given pool sizes."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = _build_session(pool_connections, pool_maxsize)
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session(POOL_CONNECTIONS, POOL_MAXSIZE)
+    return _session
+
+
+# ── Response cache ───────────────────────────────────────────────────────────
+def enable_cache(cache_dir: str, max_bytes: Optional[int] = None) -> HttpCache:
+    """Serve GETs through a revalidating on-disk cache rooted at ``cache_dir``."""
+    global _cache
+    with _lock:
+        if _cache is not None:
+            _cache.close()
+        _cache = (HttpCache(cache_dir) if max_bytes is None
+                  else HttpCache(cache_dir, max_bytes=max_bytes))
+        return _cache
+
+
+def disable_cache():
+    """Send every GET straight to the network."""
+    global _cache
+    with _lock:
+        if _cache is not None:
+            _cache.close()
+        _cache = None
+
+
+def get_cache() -> Optional[HttpCache]:
+    """The active response cache, if any."""
+    return _cache
+
+
+# ── Requests ─────────────────────────────────────────────────────────────────
+def get(url: str, timeout: float = DEFAULT_TIMEOUT, **kwargs) -> requests.Response:
+    """GET through the shared session (and the response cache, if enabled)."""
+    cache = _cache
+    if cache is not None:
+        return cache.get(get_session(), url, timeout=timeout, **kwargs)
+    return get_session().get(url, timeout=timeout, **kwargs)
+
+
+def head(url: str, timeout: float = DEFAULT_TIMEOUT, **kwargs) -> requests.Response:
+    """HEAD through the shared session."""
+    return get_session().head(url, timeout=timeout, **kwargs)
@@ -0,0 +1,100 @@
+"""
+manifest.py
+===========
+Local record of what has already been upserted to Pinecone.
+
+Maps each ``(namespace, _id)`` to a SHA-256 of the record's text and
+metadata.  Before a record is buffered for upsert the scrapers ask
+``is_changed``; identical records are skipped so Pinecone's integrated
+inference never re-embeds text it has already seen.  Hashes are written
+only after a batch is upserted successfully, so a failed run never marks
+records as done.
+
+Stored as SQLite next to the HTTP cache (``.cache/manifest.sqlite``).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                     ".cache", "manifest.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    namespace TEXT NOT NULL,
+    id        TEXT NOT NULL,
+    hash      TEXT NOT NULL,
+    updated   REAL NOT NULL,
+    PRIMARY KEY (namespace, id)
+);
+"""
+
+
+def record_hash(record: dict) -> str:
+    """Stable hash of everything that gets embedded or stored with a record."""
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False,
+                         separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class UpsertManifest:
+    """SQLite-backed ``_id`` → content-hash map for one or more namespaces."""
+
+    def __init__(self, path: str = DEFAULT_MANIFEST_PATH, force: bool = False):
+        self.path = path
+        self.force = force        # treat every record as changed
+        self.changed = 0
+        self.skipped = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def is_changed(self, namespace: str, record: dict) -> bool:
+        """True if ``record`` differs from what was last upserted."""
+        digest = record_hash(record)
+        if not self.force:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT hash FROM records WHERE namespace = ? AND id = ?",
+                    (namespace, record["_id"]),
+                ).fetchone()
+            if row is not None and row[0] == digest:
+                self.skipped += 1
+                return False
+        self.changed += 1
+        return True
+
+    def mark_upserted(self, namespace: str, records: list[dict]):
+        """Remember the hashes of a batch Pinecone has accepted."""
+        now = time.time()
+        rows = [(namespace, r["_id"], record_hash(r), now) for r in records]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)", rows)
+            self._db.commit()
+
+    def ids_with_prefix(self, namespace: str, prefix: str) -> list[str]:
+        """All recorded ids in ``namespace`` that start with ``prefix``."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id FROM records WHERE namespace = ? AND id >= ? AND id < ?",
+                (namespace, prefix, prefix + "\uffff"),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def forget(self, namespace: str, ids: list[str]):
+        """Remove ids that were deleted from the index."""
+        with self._lock:
+            self._db.executemany(
+                "DELETE FROM records WHERE namespace = ? AND id = ?",
+                [(namespace, i) for i in ids])
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,130 @@
+"""
+matter_urls.py
+==============
+Cached, concurrent resolution of Legistar gateway URLs.
+
+The public link for a matter comes from following the 302 redirect of
+``gateway.aspx?M=L&ID=<MatterId>`` to its ``LegislationDetail.aspx`` page —
+one blocking HEAD request per matter.  ``MatterUrlResolver`` keeps resolved
+URLs in SQLite keyed by ``(client, MatterId)`` (``.cache/matter_urls.sqlite``)
+and resolves a whole page of cache misses on a thread pool in the background
+while the scraper works through the page, so the hot loop normally finds
+the URL already there.
+
+With ``lazy=True`` nothing is resolved: records keep the gateway URL (which
+redirects correctly in a browser) and a later non-lazy run fills the cache.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, Optional
+
+import http_client
+
+# ── Configuration ────────────────────────────────────────────────────────────
+DEFAULT_MATTER_URL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                       ".cache", "matter_urls.sqlite")
+
+# Concurrent HEAD requests against the Legistar web UI
+RESOLVE_WORKERS = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS matter_urls (
+    client    TEXT NOT NULL,
+    matter_id INTEGER NOT NULL,
+    url       TEXT NOT NULL,
+    resolved  REAL NOT NULL,
+    PRIMARY KEY (client, matter_id)
+);
+"""
+
+
+def gateway_url(url_base: str, matter_id: int) -> str:
+    return f"{url_base}/gateway.aspx?M=L&ID={matter_id}"
+
+
+def resolve_gateway(url_base: str, matter_id: int) -> Optional[str]:
+    """Follow the gateway redirect; None if it doesn't land on a detail page."""
+    try:
+        resp = http_client.head(gateway_url(url_base, matter_id),
+                                allow_redirects=True, timeout=10)
+        if resp.status_code == 200 and "LegislationDetail" in resp.url:
+            return resp.url
+    except Exception:
+        pass
+    return None
+
+
+class MatterUrlResolver:
+    """Persistent ``(client, MatterId)`` → LegislationDetail URL map.
+
+    ``path=None`` keeps the map in memory for this run only.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_MATTER_URL_PATH,
+                 workers: int = RESOLVE_WORKERS, lazy: bool = False):
+        self.lazy = lazy
+        self.hits = 0
+        self.resolved = 0
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._pending: dict[tuple[str, int], Future] = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers,
+                                        thread_name_prefix="matter-url")
+
+    def _lookup(self, client: str, matter_id: int) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url FROM matter_urls WHERE client = ? AND matter_id = ?",
+                (client, matter_id),
+            ).fetchone()
+        return row[0] if row else None
+
+    def _resolve(self, client: str, url_base: str, matter_id: int) -> Optional[str]:
+        url = resolve_gateway(url_base, matter_id)
+        if url:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO matter_urls VALUES (?, ?, ?, ?)",
+                    (client, matter_id, url, time.time()),
+                )
+                self._db.commit()
+                self.resolved += 1
+        return url
+
+    def prefetch(self, client: str, url_base: str, matter_ids: Iterable[int]):
+        """Start resolving every uncached id in the background."""
+        if self.lazy:
+            return
+        for matter_id in matter_ids:
+            key = (client, matter_id)
+            if key in self._pending or self._lookup(client, matter_id):
+                continue
+            self._pending[key] = self._pool.submit(
+                self._resolve, client, url_base, matter_id)
+
+    def url(self, client: str, url_base: str, matter_id: int) -> str:
+        """Public URL for a matter, falling back to the gateway URL."""
+        future = self._pending.pop((client, matter_id), None)
+        if future is not None:
+            return future.result() or gateway_url(url_base, matter_id)
+        cached = self._lookup(client, matter_id)
+        if cached:
+            self.hits += 1
+            return cached
+        if self.lazy:
+            return gateway_url(url_base, matter_id)
+        return (self._resolve(client, url_base, matter_id)
+                or gateway_url(url_base, matter_id))
+
+    def close(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pending.clear()
+        with self._lock:
+            self._db.close()
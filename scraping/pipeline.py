@@ -0,0 +1,219 @@
+"""
+pipeline.py
+===========
+Building blocks for running the scrapers' stages concurrently.
+
+Both scrapers are a chain of fetch → extract/chunk → upsert steps.  Run one
+after another, every wait adds up: nothing is parsed while Pinecone (or the
+token limiter) is blocking, and nothing is upserted while a page downloads.
+These helpers connect the stages with bounded queues instead, so network,
+CPU and rate-limit waits overlap and throughput is set by the slowest stage.
+Every queue is bounded — a stage that gets ahead blocks until the next one
+catches up, which keeps memory flat on large runs.
+
+    prefetch(items, depth)            producer on a background thread
+    ordered_map(fn, items, workers)   parallel map, results in input order
+    BackgroundUpserter(fn, ...)       concurrent upserts, ordered completion
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# ── Configuration ────────────────────────────────────────────────────────────
+# Items (pages, batches …) allowed to wait between two stages
+STAGE_QUEUE_DEPTH = 4
+
+# Upserts: batches sent concurrently, retries per batch (with exponential
+# backoff from RETRY_BACKOFF seconds), and failed batches tolerated before
+# the run is aborted
+UPSERTS_IN_FLIGHT  = 4
+UPSERT_RETRIES     = 2
+RETRY_BACKOFF      = 2.0
+MAX_FAILED_BATCHES = 10
+
+# How often a blocked producer re-checks whether the consumer went away
+_POLL = 0.1
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def prefetch(items: Iterable[T], depth: int = STAGE_QUEUE_DEPTH) -> Iterator[T]:
+    """Iterate ``items`` on a background thread, ``depth`` items ahead.
+
+    Exceptions raised by the producer are re-raised in the consumer at the
+    point it would have received the next item.  If the consumer stops
+    early the producer is told to stop at its next item.
+    """
+    q: queue.Queue = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=_POLL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as exc:
+            put(_Failure(exc))
+
+    thread = threading.Thread(target=produce, name="prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
+
+
+def ordered_map(fn: Callable[[T], R], items: Iterable[T], workers: int,
+                ahead: Optional[int] = None,
+                name: str = "stage") -> Iterator[tuple[T, R]]:
+    """Yield ``(item, fn(item))`` in input order, computed on ``workers`` threads.
+
+    At most ``ahead`` (default ``2 * workers``) items are in flight or
+    finished-but-unconsumed, so a slow consumer holds back the producer.
+    Work still queued when the consumer stops early is cancelled.
+    """
+    ahead = max(1, ahead or 2 * workers)
+    with ThreadPoolExecutor(max_workers=max(1, workers),
+                            thread_name_prefix=name) as pool:
+        pending: list[tuple[T, Future]] = []
+        source = iter(items)
+        try:
+            for item in source:
+                pending.append((item, pool.submit(fn, item)))
+                if len(pending) >= ahead:
+                    break
+            while pending:
+                item, fut = pending.pop(0)
+                for nxt in source:
+                    pending.append((nxt, pool.submit(fn, nxt)))
+                    break
+                yield item, fut.result()
+        finally:
+            for _, fut in pending:
+                fut.cancel()
+
+
+class BackgroundUpserter:
+    """Keep several upsert batches in flight on a thread pool.
+
+    ``submit`` returns as soon as the batch is handed over and blocks only
+    when ``in_flight + depth`` batches are already running or waiting.
+    Each batch is tried up to ``1 + retries`` times with exponential
+    backoff; one that still fails is kept in ``failures`` instead of
+    aborting the run, and ``close`` gives every failure one last try.
+
+    ``on_flushed(batch)`` is called in submission order, serialised, for
+    every batch that succeeded — and never past a failed one — so callers
+    can advance checkpoints exactly as if upserts ran one at a time.
+    More than ``max_failures`` failed batches means something systemic
+    (bad credentials, index gone) and the failure is raised instead.
+    """
+
+    def __init__(self, upsert: Callable[[list[dict]], None],
+                 on_flushed: Optional[Callable[[list[dict]], None]] = None,
+                 depth: int = STAGE_QUEUE_DEPTH,
+                 in_flight: int = UPSERTS_IN_FLIGHT,
+                 retries: int = UPSERT_RETRIES,
+                 max_failures: int = MAX_FAILED_BATCHES):
+        self._upsert = upsert
+        self._on_flushed = on_flushed
+        self._retries = retries
+        self._max_failures = max_failures
+        self._pool = ThreadPoolExecutor(max_workers=max(1, in_flight),
+                                        thread_name_prefix="upsert")
+        self._slots = threading.Semaphore(max(1, in_flight) + max(0, depth))
+        self._lock = threading.Lock()
+        self._next = 0                 # sequence number of the next submit
+        self._committed = 0            # batches passed to on_flushed (or failed)
+        self._finished: dict[int, tuple[list[dict], bool]] = {}
+        self._blocked = False          # an earlier batch failed for good
+        self._error: Optional[BaseException] = None
+        self.failures: list[tuple[list[dict], BaseException]] = []
+
+    def _attempt(self, batch: list[dict]) -> Optional[BaseException]:
+        error = None
+        for attempt in range(self._retries + 1):
+            try:
+                self._upsert(batch)
+                return None
+            except Exception as exc:
+                error = exc
+                if attempt < self._retries:
+                    time.sleep(RETRY_BACKOFF * 2 ** attempt)
+        return error
+
+    def _run(self, seq: int, batch: list[dict]):
+        try:
+            if self._error is not None:
+                return      # run is aborting: leave queued batches for --resume
+            error = self._attempt(batch)
+            with self._lock:
+                if error is not None:
+                    self.failures.append((batch, error))
+                    if len(self.failures) > self._max_failures:
+                        self._error = error
+                self._finished[seq] = (batch, error is None)
+                # Report completions in order, stopping for good at a failure
+                while self._committed in self._finished:
+                    done, ok = self._finished.pop(self._committed)
+                    self._committed += 1
+                    if not ok:
+                        self._blocked = True
+                    elif not self._blocked and self._on_flushed is not None:
+                        self._on_flushed(done)
+        except BaseException as exc:
+            self._error = exc
+        finally:
+            self._slots.release()
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def submit(self, batch: list[dict]):
+        """Start upserting a batch (blocks while too many are pending)."""
+        self._raise_error()
+        while not self._slots.acquire(timeout=_POLL):
+            self._raise_error()
+        seq = self._next
+        self._next += 1
+        self._pool.submit(self._run, seq, batch)
+
+    def close(self) -> list[tuple[list[dict], BaseException]]:
+        """Wait for every batch, retry failures once, return what still fails."""
+        self._pool.shutdown(wait=True)
+        self._raise_error()
+        remaining = []
+        for batch, _ in self.failures:
+            error = self._attempt(batch)
+            if error is not None:
+                remaining.append((batch, error))
+        self.failures = remaining
+        return remaining
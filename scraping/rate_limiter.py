@@ -0,0 +1,182 @@
+"""
+rate_limiter.py
+===============
+Sliding-window limiter for Pinecone embedding tokens, shared by both scrapers.
+
+Integrated inference is capped in tokens per minute (250k on the free tier).
+``TokenRateLimiter`` keeps a deque of ``(time, tokens)`` entries plus a
+running sum, so admitting a batch costs O(1) amortised instead of rescanning
+the window.  Token counts come from a pluggable estimator (see tokens.py);
+with a real tokenizer the budget defaults much closer to the ceiling.
+
+The budget also adapts: a 429 from Pinecone shrinks it and pauses every
+caller for the ``Retry-After`` period, and each full window without another
+429 wins a little of it back (additive increase, multiplicative decrease).
+
+Given a ``SharedTokenLedger`` (token_ledger.py) the window is shared with
+every other scraper process on the host, and 429 pauses reach them too.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from token_ledger import SharedTokenLedger
+from tokens import CharRatioEstimator, TokenEstimator, record_tokens
+
+# ── Configuration ────────────────────────────────────────────────────────────
+# Budgets under the 250k tokens/min free-tier ceiling.  With estimated
+# counts, stay well under it:
+PINECONE_TPM_LIMIT = int(os.environ.get("PINECONE_TPM_LIMIT", "200000"))
+# …with counts from a real tokenizer, run close to it:
+EXACT_TPM_LIMIT = 240_000
+
+BACKOFF_FACTOR    = 0.8    # budget multiplier on every 429
+RECOVER_STEP      = 0.05   # fraction of the budget regained per clean window
+MIN_BUDGET        = 0.25   # never shrink below this fraction of the budget
+DEFAULT_PAUSE     = 10.0   # seconds to pause on a 429 without Retry-After
+
+
+def rate_limit_info(exc: BaseException) -> tuple[bool, Optional[float]]:
+    """``(is_429, retry_after_seconds)`` for an exception from an HTTP client.
+
+    Understands Pinecone's ``PineconeApiException`` (``.status``/``.headers``)
+    and ``requests`` errors (``.response``).
+    """
+    response = getattr(exc, "response", None)
+    status = (getattr(exc, "status", None) or getattr(exc, "status_code", None)
+              or getattr(response, "status_code", None))
+    if status != 429:
+        return False, None
+    headers = getattr(exc, "headers", None) or getattr(response, "headers", None) or {}
+    raw = headers.get("Retry-After") or headers.get("retry-after")
+    if not raw:
+        return True, None
+    try:
+        return True, max(0.0, float(raw))
+    except ValueError:
+        pass
+    try:
+        return True, max(0.0, parsedate_to_datetime(raw).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return True, None
+
+
+class TokenRateLimiter:
+    """Rolling-window rate limiter that estimates Pinecone embedding tokens.
+
+    Thread-safe: concurrent upserts share one budget, and with a ``ledger``
+    so do other processes.
+    """
+
+    def __init__(self, tpm_limit: Optional[int] = None, window: float = 60.0,
+                 estimator: Optional[TokenEstimator] = None,
+                 ledger: Optional[SharedTokenLedger] = None):
+        self.estimator = estimator or CharRatioEstimator()
+        self.ledger = ledger
+        self.max_limit = tpm_limit or (EXACT_TPM_LIMIT if self.estimator.exact
+                                       else PINECONE_TPM_LIMIT)
+        self.tpm_limit = self.max_limit     # current (adaptive) budget
+        self.window = window                # seconds
+        self.throttles = 0                  # 429s seen
+        self.tokens = 0                     # tokens admitted in total
+        self._log: deque = deque()          # (monotonic time, tokens)
+        self._used = 0                      # sum of tokens in _log
+        self._reserved = 0                  # held while asking the ledger
+        self._paused_until = 0.0
+        self._last_change = 0.0             # last 429 or budget increase
+        self._cond = threading.Condition()
+
+    def _prune(self, now: float):
+        """Drop entries older than the rolling window."""
+        cutoff = now - self.window
+        while self._log and self._log[0][0] <= cutoff:
+            self._used -= self._log.popleft()[1]
+
+    def tokens_used(self) -> int:
+        with self._cond:
+            self._prune(time.monotonic())
+            return self._used
+
+    def wait_if_needed(self, records: list[dict], verbose: bool = False,
+                       tokens: Optional[int] = None) -> int:
+        """Block until there is room under the token budget, then record.
+
+        ``tokens`` skips re-counting a batch whose size is already known.
+        Returns the estimated tokens charged for ``records``.
+        """
+        est = record_tokens(self.estimator, records) if tokens is None else tokens
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                # A batch bigger than the whole budget can only ever run alone
+                charge = min(est, self.tpm_limit)
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                    reason = "Pinecone returned 429"
+                else:
+                    self._prune(now)
+                    if self._used + self._reserved + charge <= self.tpm_limit:
+                        if self.ledger is None:
+                            break
+                        # The ledger's transaction can block on other
+                        # processes: ask it without holding the lock, with
+                        # the room reserved so other threads can't take it
+                        self._reserved += charge
+                        self._cond.release()
+                        try:
+                            wait = self.ledger.acquire(charge, self.tpm_limit)
+                        finally:
+                            self._cond.acquire()
+                            self._reserved -= charge
+                            self._cond.notify_all()
+                        if not wait:
+                            now = time.monotonic()
+                            break
+                        reason = "shared budget in use by other scrapers"
+                    elif self._log:
+                        wait = self._log[0][0] + self.window - now
+                        reason = f"~{self._used:,} tokens used"
+                    else:
+                        # Only reservations in the way: woken when they settle
+                        wait = self.window
+                        reason = "other upserts asking the shared budget"
+                if verbose:
+                    print(f"    ⏳ rate-limit: {reason}, sleeping {wait:.1f}s …")
+                # Releases the lock, so a 429 elsewhere can extend the pause
+                self._cond.wait(timeout=max(wait, 0.01))
+            self._log.append((now, charge))
+            self._used += charge
+            self.tokens += est
+        return est
+
+    def throttled(self, retry_after: Optional[float] = None, verbose: bool = False):
+        """Pinecone rejected a request with 429: back off and pause everyone."""
+        with self._cond:
+            now = time.monotonic()
+            self.throttles += 1
+            self.tpm_limit = max(int(self.max_limit * MIN_BUDGET),
+                                 int(self.tpm_limit * BACKOFF_FACTOR))
+            pause = DEFAULT_PAUSE if retry_after is None else retry_after
+            self._paused_until = max(self._paused_until, now + pause)
+            self._last_change = now
+            self._cond.notify_all()
+        if self.ledger is not None:
+            self.ledger.pause(pause)
+        if verbose:
+            print(f"    🚦 429 from Pinecone — budget now {self.tpm_limit:,} "
+                  f"tokens/min, pausing {pause:.1f}s")
+
+    def succeeded(self):
+        """A request went through; regain budget after a clean window."""
+        with self._cond:
+            if self.tpm_limit >= self.max_limit:
+                return
+            now = time.monotonic()
+            if now - self._last_change >= self.window:
+                self.tpm_limit = min(self.max_limit, self.tpm_limit
+                                     + int(self.max_limit * RECOVER_STEP))
+                self._last_change = now
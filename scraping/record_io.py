@@ -0,0 +1,336 @@
+"""
+record_io.py
+============
+Record files: scrape once with ``--export``, upsert later with ``--import``.
+
+An export holds every record a run produced, exactly as it would have been
+upserted, so scraping and embedding can run on different machines and a
+corpus can be replayed into a fresh index without touching the sources.
+The format follows the file name:
+
+    records.ndjson            one JSON record per line (.jsonl works too)
+    records.ndjson.gz         …gzip-compressed
+    records.ndjson.zst        …zstd-compressed (pip install zstandard)
+    records.parquet           columnar, zstd-compressed (pip install pyarrow)
+
+Writes are buffered and go to ``<path>.part`` first; the file only appears
+under its real name once the export finished, so a crashed run never
+leaves a truncated file that looks complete.  Reading streams too — an
+import never holds the whole corpus in memory.
+"""
+
+import gzip
+import io
+import json
+import os
+import sys
+import time
+from typing import Callable, Iterable, Iterator, Optional
+
+from batching import MAX_BATCH_BYTES, MAX_BATCH_RECORDS, MAX_BATCH_TOKENS, UpsertBatcher
+from manifest import DEFAULT_MANIFEST_PATH, UpsertManifest
+from pipeline import STAGE_QUEUE_DEPTH, UPSERTS_IN_FLIGHT, BackgroundUpserter
+from rate_limiter import TokenRateLimiter
+from sinks import DEFAULT_SINK, open_sink, state_path
+from token_ledger import DEFAULT_LEDGER_PATH, SharedTokenLedger
+from tokens import DEFAULT_TOKENIZER, get_estimator
+
+# ── Configuration ────────────────────────────────────────────────────────────
+# Encoded records collected before each write to the (compressed) file
+WRITE_BUFFER_BYTES = 1 << 20
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Parquet: records per row group (the writer holds one group in memory)
+PARQUET_ROW_GROUP = 10_000
+
+# Records read from a file per manifest check / batcher hand-off on import
+IMPORT_CHUNK = 1_000
+
+
+def _format(path: str) -> tuple[str, Optional[str]]:
+    """``(kind, compression)`` for a record file name."""
+    name = path.lower()
+    compression = None
+    for suffix, codec in ((".gz", "gzip"), (".zst", "zstd"), (".zstd", "zstd")):
+        if name.endswith(suffix):
+            name, compression = name[:-len(suffix)], codec
+            break
+    if name.endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson", compression
+    if name.endswith(".parquet"):
+        if compression:
+            raise ValueError("Parquet files are compressed internally — drop "
+                             f"the {compression} suffix")
+        return "parquet", None
+    raise ValueError(f"can't tell the format of {path!r} (use .ndjson[.gz|.zst] "
+                     "or .parquet)")
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("zstd record files need the zstandard package "
+                         "(pip install zstandard)")
+    return zstandard
+
+
+def _arrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("Parquet record files need pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+class RecordWriter:
+    """Append records to an NDJSON or Parquet file (see module docstring)."""
+
+    def __init__(self, path: str):
+        self.kind, self.compression = _format(path)
+        self.path = path
+        self.count = 0
+        self._tmp = f"{path}.part"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._pending: list = []        # encoded lines, or rows for Parquet
+        self._pending_bytes = 0
+        self._file = None
+        self._stream = None
+        self._parquet = None
+        if self.kind == "ndjson":
+            self._file = open(self._tmp, "wb")
+            if self.compression == "gzip":
+                self._stream = gzip.GzipFile(fileobj=self._file, mode="wb",
+                                             compresslevel=GZIP_LEVEL, mtime=0)
+            elif self.compression == "zstd":
+                cctx = _zstd().ZstdCompressor(level=ZSTD_LEVEL, threads=-1)
+                self._stream = cctx.stream_writer(self._file, closefd=False)
+            else:
+                self._stream = self._file
+        else:
+            self._pa = _arrow()
+
+    def write(self, records: Iterable[dict]):
+        if self.kind == "parquet":
+            for record in records:
+                self._pending.append(record)
+                self.count += 1
+                if len(self._pending) >= PARQUET_ROW_GROUP:
+                    self._write_row_group()
+            return
+        for record in records:
+            line = json.dumps(record, ensure_ascii=False,
+                              separators=(",", ":")).encode("utf-8") + b"\n"
+            self._pending.append(line)
+            self._pending_bytes += len(line)
+            self.count += 1
+            if self._pending_bytes >= WRITE_BUFFER_BYTES:
+                self._flush_lines()
+
+    def _flush_lines(self):
+        self._stream.write(b"".join(self._pending))
+        self._pending.clear()
+        self._pending_bytes = 0
+
+    def _schema(self, rows: list[dict]):
+        """Column types from the first row group: lists of strings, numbers,
+        booleans, and strings for everything else."""
+        pa = self._pa
+        fields = {}
+        for row in rows:
+            for key, value in row.items():
+                if value is None:
+                    fields.setdefault(key, pa.string())
+                elif isinstance(value, (list, tuple)):
+                    fields[key] = pa.list_(pa.string())
+                elif isinstance(value, bool):
+                    fields[key] = pa.bool_()
+                elif isinstance(value, int):
+                    fields[key] = pa.int64()
+                elif isinstance(value, float):
+                    fields[key] = pa.float64()
+                else:
+                    fields[key] = pa.string()
+        return pa.schema(list(fields.items()))
+
+    def _write_row_group(self):
+        pa = self._pa
+        if self._parquet is None:
+            schema = self._schema(self._pending)
+            self._parquet = pa.parquet.ParquetWriter(self._tmp, schema,
+                                                     compression="zstd")
+        schema = self._parquet.schema
+        extra = {k for row in self._pending for k in row} - set(schema.names)
+        if extra:
+            raise ValueError(f"records gained field(s) {', '.join(sorted(extra))} "
+                             "after the first Parquet row group — export to NDJSON")
+        self._parquet.write_table(pa.Table.from_pylist(self._pending, schema=schema))
+        self._pending.clear()
+
+    def close(self):
+        """Finish the file and move it into place."""
+        if self.kind == "parquet":
+            if self._pending or self._parquet is None:
+                self._write_row_group()
+            self._parquet.close()
+        else:
+            if self._pending:
+                self._flush_lines()
+            if self._stream is not self._file:
+                self._stream.close()
+            self._file.close()
+        os.replace(self._tmp, self.path)
+
+    def size(self) -> int:
+        return os.path.getsize(self.path)
+
+
+def iter_records(path: str, chunk: int = IMPORT_CHUNK) -> Iterator[list[dict]]:
+    """Yield the records of a record file in lists of up to ``chunk``.
+
+    The file is opened (and its format checked) before this returns.
+    """
+    kind, compression = _format(path)
+    if kind == "parquet":
+        return _iter_parquet(_arrow().parquet.ParquetFile(path), chunk)
+    raw = open(path, "rb")
+    if compression == "gzip":
+        stream = gzip.GzipFile(fileobj=raw, mode="rb")
+    elif compression == "zstd":
+        stream = _zstd().ZstdDecompressor().stream_reader(raw)
+    else:
+        stream = raw
+    return _iter_ndjson(path, raw, stream, chunk)
+
+
+def _iter_parquet(parquet, chunk: int) -> Iterator[list[dict]]:
+    for batch in parquet.iter_batches(batch_size=chunk):
+        # Parquet fills fields a record didn't have with nulls
+        yield [{k: v for k, v in row.items() if v is not None}
+               for row in batch.to_pylist()]
+
+
+def _iter_ndjson(path: str, raw, stream, chunk: int) -> Iterator[list[dict]]:
+    out: list[dict] = []
+    with raw, io.TextIOWrapper(stream, encoding="utf-8") as text:
+        for lineno, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                out.append(json.loads(line))
+            except ValueError as exc:
+                raise ValueError(f"{path}:{lineno}: {exc}") from None
+            if len(out) >= chunk:
+                yield out
+                out = []
+    if out:
+        yield out
+
+
+# ── Import ───────────────────────────────────────────────────────────────────
+def import_records(
+    path: str,
+    *,
+    name: str,
+    namespace: str,
+    upsert_batch: Callable,
+    api_key: str = "",
+    index_name: str = "",
+    verbose: bool = False,
+    manifest_path: Optional[str] = DEFAULT_MANIFEST_PATH,
+    force: bool = False,
+    queue_depth: int = STAGE_QUEUE_DEPTH,
+    upserts_in_flight: int = UPSERTS_IN_FLIGHT,
+    tokenizer: str = DEFAULT_TOKENIZER,
+    tpm_limit: Optional[int] = None,
+    shared_budget: Optional[str] = DEFAULT_LEDGER_PATH,
+    batch_records: int = MAX_BATCH_RECORDS,
+    batch_bytes: int = MAX_BATCH_BYTES,
+    batch_tokens: int = MAX_BATCH_TOKENS,
+    sink: str = DEFAULT_SINK,
+):
+    """Upsert every record in a record file into ``namespace``.
+
+    ``upsert_batch`` is the scraper's own (index, records, limiter, …)
+    function, so imports are rate-limited, batched and recorded in the
+    manifest exactly like a scraping run.  There is no checkpoint: with the
+    manifest on, re-running a failed import skips what already made it.
+    """
+    print(f"\n{'='*60}")
+    print(f"  Import {path} → {namespace}")
+    print(f"  Pipeline       : queue depth {queue_depth}, "
+          f"{upserts_in_flight} upserts in flight")
+    print(f"{'='*60}\n")
+
+    try:
+        estimator = get_estimator(tokenizer)
+    except (ImportError, ValueError) as exc:
+        print(f"❌  --tokenizer {tokenizer}: {exc}")
+        sys.exit(1)
+    try:
+        idx = open_sink(sink, api_key=api_key, index_name=index_name)
+        chunks = iter_records(path)
+    except (OSError, ValueError) as exc:
+        print(f"❌  {exc}")
+        sys.exit(1)
+    ledger = SharedTokenLedger(name, shared_budget) if shared_budget else None
+    limiter = TokenRateLimiter(tpm_limit, estimator=estimator, ledger=ledger)
+    batcher = UpsertBatcher(estimator, max_records=batch_records,
+                            max_bytes=batch_bytes, max_tokens=batch_tokens)
+    print(f"✅  Connected to {idx.label}")
+    print(f"     Token budget: {limiter.tpm_limit:,} tokens/min"
+          f"{' (shared)' if ledger is not None else ''}, counted "
+          f"with {limiter.estimator.name}")
+    print(f"     Batches: {batcher.describe()}\n")
+
+    manifest_path = state_path(sink, manifest_path)
+    manifest = UpsertManifest(manifest_path, force=force) if manifest_path else None
+
+    def upsert(batch: list[dict]):
+        upsert_batch(idx, batch, limiter, verbose=verbose, manifest=manifest,
+                     batcher=batcher)
+
+    upserter = BackgroundUpserter(upsert, depth=queue_depth,
+                                  in_flight=upserts_in_flight)
+    total = 0
+    started = time.monotonic()
+    for records in chunks:
+        total += len(records)
+        if manifest is not None:
+            records = [r for r in records if manifest.is_changed(namespace, r)]
+        batcher.add(records)
+        for batch in batcher.batches():
+            upserter.submit(batch)
+        if not verbose:
+            print(f"  Read {total:,} records...", end="\r")
+    for batch in batcher.batches(final=True):
+        upserter.submit(batch)
+    failed_batches = upserter.close()
+    idx.close()
+    elapsed = time.monotonic() - started
+
+    print(f"\n{'='*60}")
+    print(f"  DONE in {elapsed:,.1f}s")
+    print(f"  Records read     : {total:,}")
+    if manifest is not None:
+        print(f"  Records skipped  : {manifest.skipped}")
+        print(f"  Records upserted : {manifest.changed}")
+    if failed_batches:
+        print(f"  ⚠️  Failed batches : {len(failed_batches)} "
+              f"({sum(len(b) for b, _ in failed_batches)} records) — "
+              f"last error: {failed_batches[-1][1]}")
+        print(f"     Re-run the import to retry them.")
+    print(f"  Embedding tokens : ~{limiter.tokens:,} ({limiter.throttles} × 429, "
+          f"budget {limiter.tpm_limit:,}/min)")
+    print(f"  Upsert batches   : {batcher.summary()}")
+    if idx.summary():
+        print(f"  Sink             : {idx.summary()}")
+    if ledger is not None:
+        shared = ledger.metrics()
+        ledger.close()
+        print(f"  Shared budget    : {shared['waits']} waits for other scrapers "
+              f"({shared['wait_seconds']:,.1f}s)")
+    print(f"{'='*60}\n")
@@ -13,9 +13,18 @@ Data source:
 
 Strategy:
   • Downloads each title's full HTML (~3 KB for reserved titles up to ~7 MB)
+    concurrently, capped per host and paced by a token bucket
   • Skips reserved/placeholder titles
-  • Parses HTML → clean text via BeautifulSoup
-  • Splits into overlapping ~1 000-character chunks
+  • Parses each title once → name + clean text via BeautifulSoup (lxml if installed)
+  • Splits on TITLE/PART/CHAPTER/§ headings — one record per section with a
+    stable id (pa-statute-t18-s2501-p0); only oversized sections are split
+    into overlapping ~1 000-character parts.  TITLE/PART/CHAPTER headings
+    open the following section's text and are listed in every section's
+    "structure" metadata rather than becoming records of their own
+  • Tags every record with the topics found in its own text
+  • Deletes the ids a re-scraped title no longer produces (a section that
+    shrank, the old fixed-window pa-statute-t18-chunkN ids) once its new
+    records are upserted
   • Upserts to Pinecone with rich metadata (title number, name, source URL, tags)
 
 Prerequisites
@@ -37,20 +46,71 @@ Usage
 
     # Only specific titles (space-separated)
     python scrape_legal_code.py --titles 18 42 53 75
+
+    # Topic tags from your own taxonomy ({"tag": ["keyword", ...]} JSON)
+    python scrape_legal_code.py --taxonomy taxonomy.json
+
+    # Chunks of ~384 embedding tokens instead of 1000 characters, counted
+    # with the model's own tokenizer
+    python scrape_legal_code.py --chunk-tokens --tokenizer hf:intfloat/multilingual-e5-large
+
+    # …and print how many tokens the chunks came out at
+    python scrape_legal_code.py --chunk-tokens --chunk-histogram
+
+    # Bounded-memory streaming parse (large titles, small hosts)
+    python scrape_legal_code.py --stream
+
+    # Continue an interrupted run after the last fully upserted title
+    python scrape_legal_code.py --resume
+
+    # Scrape to a file here, embed it elsewhere (also .ndjson, .ndjson.gz, .parquet)
+    python scrape_legal_code.py --export statutes.ndjson.zst
+    python scrape_legal_code.py --import statutes.ndjson.zst
+
+    # Wider pipeline: 4 parse threads, up to 8 batches queued for upsert
+    python scrape_legal_code.py --parse-workers 4 --queue-depth 8
+
+    # Ignore the on-disk HTTP cache (.cache/http) and re-download everything
+    python scrape_legal_code.py --no-cache
+
+    # No Pinecone: a local vector store (.cache/vectors), or a mock index
+    python scrape_legal_code.py --sink local
+    python scrape_legal_code.py --sink mock:latency=0.3,tpm=50000
 """
 
 import argparse
+import itertools
 import json
 import os
 import re
 import sys
+import threading
 import time
-from typing import Optional
+from collections import deque
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, Optional, Union
+from urllib.parse import urlparse
 
-import requests
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 
+import http_client
+from batching import (MAX_BATCH_BYTES, MAX_BATCH_RECORDS, MAX_BATCH_TOKENS,
+                      UpsertBatcher)
+from checkpoint import DEFAULT_CHECKPOINT_DIR, Checkpoint, FlushTracker, skip_flushed
+from http_cache import DEFAULT_CACHE_DIR
+from manifest import DEFAULT_MANIFEST_PATH, UpsertManifest
+from pipeline import (STAGE_QUEUE_DEPTH, UPSERTS_IN_FLIGHT, BackgroundUpserter,
+                      ordered_map, prefetch)
+from rate_limiter import TokenRateLimiter, rate_limit_info
+from record_io import RecordWriter, import_records
+from sinks import DEFAULT_SINK, open_sink, state_path
+from tagging import TopicTagger, load_taxonomy
+from token_chunking import (DEFAULT_CHUNK_TOKENS, MAX_CHUNK_TOKENS, TokenChunker,
+                            TokenHistogram)
+from token_ledger import DEFAULT_LEDGER_PATH, SharedTokenLedger
+from tokens import DEFAULT_TOKENIZER, get_estimator
+
 load_dotenv()
 
 # ── Configuration ────────────────────────────────────────────────────────────
@@ -64,29 +124,41 @@ PINECONE_NAMESPACE = os.environ.get("PINECONE_NAMESPACE", "legal-code")
 # Chunking parameters
 CHUNK_SIZE    = 1000   # characters per chunk
 CHUNK_OVERLAP = 200    # overlap between consecutive chunks
+# --chunk-tokens sizes chunks in tokens instead (token_chunking.py); the
+# sentences of this many sections are tokenized in one call
+TOKEN_CHUNK_SECTIONS = 64
 
-# Pinecone batch size
-UPSERT_BATCH = 20
+# Chunking strategy: "section" splits on TITLE/PART/CHAPTER/§ headings and
+# only windows inside oversized sections; "window" is plain fixed-size windows
+CHUNKERS        = ("section", "window")
+DEFAULT_CHUNKER = "section"
 
-# Rate-limiting: seconds between PA website requests
-REQUEST_DELAY = 0.5
+# Streaming mode: HTML characters fed to the incremental parser per step
+STREAM_FEED_SIZE = 64 * 1024
 
-# Pinecone token rate-limit (free tier: 250 000 tokens / minute)
-PINECONE_TPM_LIMIT = 200_000   # stay under the 250k ceiling with headroom
-TOKENS_PER_CHAR    = 0.30      # conservative estimate (~3.3 chars/token)
+# Streaming mode: records a title is parsed ahead of the upsert batcher, and
+# handed to it at a time — memory is bounded by this, not by the title size
+STREAM_SLICE_RECORDS = 64
+
+# Characters at the start of a title kept as its preview; the streaming
+# parser reads this far before labelling a title's first records
+TITLE_HEAD_CHARS = 5000
+
+# Concurrent fetching of title HTML from the PA website
+FETCH_WORKERS        = 8     # download threads
+PER_HOST_CONCURRENCY = 4     # max simultaneous requests to one host
+REQUEST_RATE         = 2.0   # politeness: requests/second per host (token bucket)
+REQUEST_BURST        = 4     # requests allowed back-to-back before throttling
+
+# Titles parsed and chunked concurrently while earlier batches upsert
+PARSE_WORKERS = 2
+
+# Most ids per delete request when stale records are removed
+DELETE_BATCH = 1000
 
 # Minimum bytes for a title to be "real" (reserved titles are ~3800 bytes)
 MIN_TITLE_BYTES = 5000
 
-# Browser-like headers (the PA website blocks bare requests)
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/120.0.0.0 Safari/537.36"
-    ),
-}
-
 # Title range to scan (PA Consolidated Statutes run from Title 1 to ~75)
 TITLE_RANGE = range(1, 76)
 
@@ -121,13 +193,13 @@ TAG_KEYWORDS: dict[str, list[str]] = {
 }
 
 
+# Default tagger; ``--taxonomy`` swaps in one loaded from a file
+TAGGER = TopicTagger(TAG_KEYWORDS)
+
+
 def assign_tags(text: str) -> list[str]:
     """Return topic tags based on keyword matches."""
-    lower = text.lower()
-    return sorted({
-        tag for tag, keywords in TAG_KEYWORDS.items()
-        if any(kw in lower for kw in keywords)
-    })
+    return TAGGER.tags(text)
 
 
 # ── Text chunking ────────────────────────────────────────────────────────────
@@ -148,19 +220,303 @@ def chunk_text(text: str, size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP)
     return [c for c in chunks if c]
 
 
+def iter_window_chunks(pieces: Iterable[str], size: int = CHUNK_SIZE,
+                       overlap: int = CHUNK_OVERLAP) -> Iterator[str]:
+    """Streaming ``chunk_text`` over already-stripped text arriving in pieces.
+
+    Yields exactly the windows ``chunk_text("".join(pieces))`` would, while
+    buffering no more than one window of text.
+    """
+    step = size - overlap
+    buf = ""          # text from buf_start onward
+    buf_start = 0
+    nxt = 0           # start offset of the next window
+    for piece in pieces:
+        buf += piece
+        end = buf_start + len(buf)
+        # Only once the text is known to exceed one window do we cut it
+        if end <= size:
+            continue
+        while nxt + size <= end:
+            lo = nxt - buf_start
+            chunk = buf[lo:lo + size].strip()
+            if chunk:
+                yield chunk
+            nxt += step
+        buf = buf[nxt - buf_start:]
+        buf_start = nxt
+
+    end = buf_start + len(buf)
+    if end <= size:
+        # Short text is a single chunk, exactly like chunk_text
+        if buf.strip():
+            yield buf.strip()
+        return
+    while nxt < end:
+        lo = nxt - buf_start
+        chunk = buf[lo:lo + size].strip()
+        if chunk:
+            yield chunk
+        nxt += step
+
+
+# ── Section-aware chunking ───────────────────────────────────────────────────
+# Structural headings in the cleaned statute text.  Section headings look like
+# "§ 2501. Criminal homicide." — citations such as "18 Pa.C.S. § 2501." are
+# excluded so a reference ending a sentence does not start a new section.
+_HEADING_RE = re.compile(
+    r"(?<!\S)(?:"
+    r"(?P<kind>TITLE|PART|SUBPART|CHAPTER|SUBCHAPTER) (?:[0-9]+[A-Z]?|[IVXLC]+|[A-Z])\b"
+    r"|(?<!C\.S\. )(?<!P\.S\. )(?<!U\.S\.C\. )§ \d+(?:\.\d+)*[A-Za-z]?\. (?=[A-Z(])"
+    r")"
+)
+_SECTION_HEAD_RE = re.compile(r"§ (\d+(?:\.\d+)*[A-Za-z]?)\. (.{0,200}?)(?:\.(?=\s|$)|$)")
+_STRUCTURE_HEAD_RE = re.compile(r"(TITLE|PART|SUBPART|CHAPTER|SUBCHAPTER) (\S+)")
+
+
+def _structure_heading(rest: str) -> str:
+    """Leading all-caps words, e.g. "CRIMINAL HOMICIDE" from
+    "CRIMINAL HOMICIDE Sec. 2501. Criminal homicide. ..."."""
+    words = []
+    for word in rest.split(" ", 20)[:20]:
+        if not word or word != word.upper() or not any(c.isalpha() for c in word):
+            break
+        words.append(word)
+    return " ".join(words)
+
+
+def _make_section(text: str, ctx: dict) -> dict:
+    """Describe one heading-delimited segment of a statute title.
+
+    ``ctx`` carries the enclosing PART/CHAPTER across calls so that
+    subchapter keys (which repeat per chapter) stay unique, plus the keys
+    already issued so duplicates get a ``-vN`` suffix.
+    """
+    kind, number, heading = "intro", "", ""
+    m = _SECTION_HEAD_RE.match(text)
+    if m:
+        kind, number, heading = "section", m.group(1), m.group(2).strip()
+        key = f"s{number}"
+    else:
+        m = _STRUCTURE_HEAD_RE.match(text)
+        if m:
+            kind, number = m.group(1).lower(), m.group(2)
+            heading = _structure_heading(text[m.end():].lstrip())
+            label = number.lower()
+            if kind == "title":
+                key = "title"
+            elif kind == "part":
+                ctx["part"], ctx["chapter"] = label, ""
+                key = f"pt{label}"
+            elif kind == "subpart":
+                key = f"pt{ctx.get('part', '')}-sp{label}"
+            elif kind == "chapter":
+                ctx["chapter"] = label
+                key = f"ch{label}"
+            else:
+                key = f"ch{ctx.get('chapter', '')}-sch{label}"
+        else:
+            key = "intro"
+
+    seen = ctx.setdefault("seen", {})
+    seen[key] = seen.get(key, 0) + 1
+    if seen[key] > 1:
+        key = f"{key}-v{seen[key]}"
+
+    return {
+        "key":     key,
+        "kind":    kind,
+        "number":  number,
+        "heading": heading,
+        "text":    text,
+    }
+
+
+def iter_sections(pieces: Iterable[str]) -> Iterator[dict]:
+    """Split cleaned statute text on TITLE/PART/CHAPTER/§ headings.
+
+    Accepts the text in pieces (a single string in a list works too) and
+    yields one dict per segment: key, kind, number, heading, text.  Only the
+    section currently being read is buffered.
+    """
+    ctx: dict = {}
+    buf = ""
+    scanned = 0
+    for piece in pieces:
+        buf += piece
+        start = 0
+        # Re-check a little before the old end so headings split across
+        # pieces are found; position 0 is the current segment's own heading.
+        for m in _HEADING_RE.finditer(buf, max(scanned - 40, 1)):
+            if m.end() >= len(buf):
+                break   # may still grow (e.g. "CHAPTER 2" + "5")
+            segment = buf[start:m.start()].strip()
+            if segment:
+                yield _make_section(segment, ctx)
+            start = m.start()
+        buf = buf[start:]
+        scanned = len(buf)
+    segment = buf.strip()
+    if segment:
+        yield _make_section(segment, ctx)
+
+
+def _section_label(section: dict) -> str:
+    if section["kind"] == "section":
+        return f"§ {section['number']}. {section['heading']}".rstrip()
+    if section["kind"] == "intro":
+        return ""
+    return f"{section['kind'].upper()} {section['number']} {section['heading']}".rstrip()
+
+
+# Structural levels, outermost first; a heading closes every level below it
+_STRUCTURE_LEVELS = ("title", "part", "subpart", "chapter", "subchapter")
+
+
+def _attach_structure(sections: Iterable[dict]) -> Iterator[dict]:
+    """Fold TITLE/PART/CHAPTER segments into the section after them.
+
+    A structure heading carries no statute text of its own, so instead of
+    becoming a record it opens the next section's text, and every section
+    gets the headings it sits under as ``structure`` ("PART I … › CHAPTER
+    25 CRIMINAL HOMICIDE").  Headings at the very end of a title, with no
+    section to attach to, are yielded as they are.
+    """
+    open_levels: dict[str, str] = {}
+    held: list[dict] = []
+
+    def structure() -> str:
+        return " › ".join(open_levels[level] for level in _STRUCTURE_LEVELS
+                          if level in open_levels)
+
+    for section in sections:
+        kind = section["kind"]
+        if kind in _STRUCTURE_LEVELS:
+            for level in _STRUCTURE_LEVELS[_STRUCTURE_LEVELS.index(kind):]:
+                open_levels.pop(level, None)
+            open_levels[kind] = _section_label(section)
+            held.append(section)
+            continue
+        text = " ".join([s["text"] for s in held] + [section["text"]])
+        held = []
+        yield dict(section, text=text, structure=structure())
+    for section in held:
+        yield dict(section, structure=structure())
+
+
+def _section_parts(sections: Iterable[dict],
+                   token_chunker: Optional[TokenChunker] = None
+                   ) -> Iterator[tuple[dict, list[str]]]:
+    """``(section, chunks)`` pairs; with a ``token_chunker`` sections are
+    chunked TOKEN_CHUNK_SECTIONS at a time so their sentences share one
+    tokenizer call."""
+    if token_chunker is None:
+        for section in sections:
+            yield section, chunk_text(section["text"])
+        return
+    group: list[dict] = []
+    for section in sections:
+        group.append(section)
+        if len(group) >= TOKEN_CHUNK_SECTIONS:
+            yield from zip(group, token_chunker.chunk_batch([s["text"] for s in group]))
+            group = []
+    if group:
+        yield from zip(group, token_chunker.chunk_batch([s["text"] for s in group]))
+
+
+def section_records(ttl: int, title_name: str, sections: Iterable[dict],
+                    tagger: Optional[TopicTagger] = None,
+                    token_chunker: Optional[TokenChunker] = None) -> Iterator[dict]:
+    """Turn statute sections into records with stable per-section ids.
+
+    Each section becomes ``pa-statute-t{ttl}-{key}-p0``; a section longer
+    than CHUNK_SIZE (or the ``token_chunker`` target) is split into ``-p1``,
+    ``-p2`` …, so overlap is only spent inside oversized sections.  Every
+    record is tagged from its own text.  Structure headings are folded into
+    the section after them (``_attach_structure``).
+    """
+    tagger = tagger or TAGGER
+    url = title_url(ttl)
+    summary = f"Pennsylvania Consolidated Statutes, {title_name}."
+    for section, parts in _section_parts(_attach_structure(sections), token_chunker):
+        label = _section_label(section)
+        base_title = f"{title_name} — {label}" if label else title_name
+        for i, part in enumerate(parts):
+            yield {
+                "_id":     f"pa-statute-t{ttl}-{section['key']}-p{i}",
+                "text":    part,
+                "title":   (base_title if len(parts) == 1
+                            else f"{base_title} [part {i+1}/{len(parts)}]"),
+                "type":    "legal-code",
+                "date":    "",
+                "url":     url,
+                "source":  "Pennsylvania General Assembly",
+                "tags":    tagger.tags(part),
+                "summary": summary,
+                "section": section["number"] if section["kind"] == "section" else "",
+                "heading": section["heading"],
+                "structure": section["structure"],
+            }
+
+
 # ── HTML parsing ─────────────────────────────────────────────────────────────
-def html_to_text(html: str) -> str:
-    """Convert PA statute HTML to clean readable text."""
-    soup = BeautifulSoup(html, "html.parser")
+def _default_parser() -> str:
+    """Prefer lxml when it is installed — it parses large titles several
+    times faster than the pure-Python html.parser backend."""
+    try:
+        import lxml  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+
+HTML_PARSER = _default_parser()
+
+
+class StatuteDocument:
+    """A statute title's HTML, parsed exactly once.
+
+    The title name, the cleaned text and the reserved-title check are all
+    derived from the same BeautifulSoup tree, so a 7 MB title costs one
+    parse instead of one per helper.
+    """
+
+    def __init__(self, html: str, parser: Optional[str] = None):
+        self.html = html
+        self.parser = parser or HTML_PARSER
+        self.soup = BeautifulSoup(html, self.parser)
+        self._title_name: Optional[str] = None
+        self._text: Optional[str] = None
+
+    @property
+    def title_name(self) -> str:
+        """Title name from the <title> tag, e.g. "Title 18 - CRIMES AND OFFENSES"."""
+        if self._title_name is None:
+            title_tag = self.soup.find("title")
+            self._title_name = title_tag.get_text().strip() if title_tag else ""
+        return self._title_name
+
+    @property
+    def text(self) -> str:
+        """Clean readable text of the title body."""
+        if self._text is None:
+            # Read the name first — stripping navigation mutates the tree
+            _ = self.title_name
+
+            # Remove scripts, styles, navigation
+            for tag in self.soup(["script", "style", "nav", "header", "footer"]):
+                tag.decompose()
 
-    # Remove scripts, styles, navigation
-    for tag in soup(["script", "style", "nav", "header", "footer"]):
-        tag.decompose()
+            self._text = _clean_statute_text(self.soup.get_text(separator="\n"))
+        return self._text
 
-    # Get text
-    text = soup.get_text(separator="\n")
+    def is_reserved(self) -> bool:
+        """Check if the title is just a '(RESERVED)' placeholder."""
+        return is_reserved_title(self.html)
 
-    # Clean up
+
+def _clean_statute_text(text: str) -> str:
+    """Normalize whitespace and drop the PA site's navigation preamble."""
     text = text.replace("\xa0", " ")          # &nbsp;
     text = re.sub(r"\n+", " ", text)           # replace all newlines with spaces
     text = re.sub(r"[ \t]+", " ", text)        # collapse horizontal whitespace
@@ -177,15 +533,236 @@ def html_to_text(html: str) -> str:
     return text
 
 
+def html_to_text(html: str) -> str:
+    """Convert PA statute HTML to clean readable text."""
+    return StatuteDocument(html).text
+
+
 def extract_title_name(html: str) -> str:
     """Extract the title name from the HTML <title> tag or first heading."""
-    soup = BeautifulSoup(html, "html.parser")
-    title_tag = soup.find("title")
-    if title_tag:
-        name = title_tag.get_text().strip()
-        # Format: "Title 18 - CRIMES AND OFFENSES"
-        return name
-    return ""
+    return StatuteDocument(html).title_name
+
+
+# ── Streaming HTML parsing ───────────────────────────────────────────────────
+_PREAMBLE_MARKERS = ["TITLE ", "Title ", "PART ", "CHAPTER "]
+_PREAMBLE_WINDOW  = 500 + max(len(m) for m in _PREAMBLE_MARKERS)
+_SKIP_TAGS        = {"script", "style", "nav", "header", "footer"}
+
+
+class StatuteTextStream(HTMLParser):
+    """Incremental statute HTML → normalized text pieces.
+
+    Produces the same text as ``StatuteDocument.text`` without ever building
+    a parse tree or holding the whole cleaned text: pieces are handed on as
+    soon as each text node is complete, so memory stays bounded by the
+    chunker consuming them, not by the size of the title.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title_name = ""
+        self.head = ""              # first TITLE_HEAD_CHARS of cleaned text
+        self.chars = 0              # cleaned characters emitted so far
+        self._skip_depth = 0
+        self._in_title = False
+        self._title_parts: list[str] = []
+        self._node: list[str] = []  # pending pieces of the current text node
+        self._seen_data = False
+        self._last_space = True     # collapses leading whitespace
+        self._preamble: Optional[str] = ""   # None once the preamble is resolved
+        self._held = ""             # trailing space, dropped if text ends here
+        self._ready: list[str] = []
+
+    # ── HTMLParser callbacks ─────────────────────────────────────────────
+    # HTMLParser may split one text node across feed() calls, so data is
+    # collected until the next markup event and handled as a whole node.
+    def handle_starttag(self, tag, attrs):
+        self._flush_node()
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+
+    def handle_endtag(self, tag):
+        self._flush_node()
+        if tag in _SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "title" and self._in_title:
+            self._in_title = False
+            self.title_name = "".join(self._title_parts).strip()
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush_node()
+
+    def handle_comment(self, data):
+        self._flush_node()
+
+    def handle_decl(self, decl):
+        self._flush_node()
+
+    def handle_pi(self, data):
+        self._flush_node()
+
+    def handle_data(self, data):
+        self._node.append(data)
+
+    def _flush_node(self):
+        if not self._node:
+            return
+        data = "".join(self._node)
+        self._node = []
+        if self._in_title:
+            self._title_parts.append(data)
+        if self._skip_depth:
+            return
+        # get_text(separator="\n") puts a newline between text nodes
+        if self._seen_data:
+            data = "\n" + data
+        self._seen_data = True
+        data = data.replace("\xa0", " ")
+        data = re.sub(r"\n+", " ", data)
+        data = re.sub(r"[ \t]+", " ", data)
+        if self._last_space and data.startswith(" "):
+            data = data[1:]
+        if not data:
+            return
+        self._last_space = data.endswith(" ")
+        self._push(data)
+
+    # ── Text output ──────────────────────────────────────────────────────
+    def _push(self, data: str):
+        if self._preamble is not None:
+            self._preamble += data
+            if len(self._preamble) < _PREAMBLE_WINDOW:
+                return
+            data = self._strip_preamble(self._preamble)
+            self._preamble = None
+        self._emit(data)
+
+    @staticmethod
+    def _strip_preamble(text: str) -> str:
+        """Drop the PA site's navigation text before the title content."""
+        for marker in _PREAMBLE_MARKERS:
+            idx = text.find(marker)
+            if idx != -1 and idx < 500:
+                return text[idx:]
+        return text
+
+    def _emit(self, data: str):
+        # Hold back a trailing space so the text ends stripped
+        data = self._held + data
+        self._held = ""
+        if data.endswith(" "):
+            data, self._held = data[:-1], " "
+        if not data:
+            return
+        if len(self.head) < TITLE_HEAD_CHARS:
+            self.head += data[:TITLE_HEAD_CHARS - len(self.head)]
+        self.chars += len(data)
+        self._ready.append(data)
+
+    def close(self):
+        super().close()
+        self._flush_node()
+        if self._preamble is not None:
+            text = self._strip_preamble(self._preamble)
+            self._preamble = None
+            self._emit(text)
+
+    # ── Public API ───────────────────────────────────────────────────────
+    def iter_text(self, html: Union[str, Iterable[str]],
+                  feed_size: int = STREAM_FEED_SIZE) -> Iterator[str]:
+        """Feed ``html`` (a string or an iterable of string pieces) and yield
+        cleaned text pieces as they become available."""
+        if isinstance(html, str):
+            pieces: Iterable[str] = (
+                html[i:i + feed_size] for i in range(0, len(html), feed_size)
+            )
+        else:
+            pieces = html
+        for piece in pieces:
+            self.feed(piece)
+            if self._ready:
+                yield from self._ready
+                self._ready = []
+        self.close()
+        yield from self._ready
+        self._ready = []
+
+    def iter_chunks(self, html: Union[str, Iterable[str]],
+                    feed_size: int = STREAM_FEED_SIZE) -> Iterator[str]:
+        """Yield fixed-size overlapping chunks, identical to ``chunk_text``."""
+        return iter_window_chunks(self.iter_text(html, feed_size))
+
+
+def iter_title_records(ttl: int, html: Union[str, Iterable[str]],
+                       stream: Optional[StatuteTextStream] = None,
+                       chunker: str = DEFAULT_CHUNKER,
+                       tagger: Optional[TopicTagger] = None,
+                       token_chunker: Optional[TokenChunker] = None) -> Iterator[dict]:
+    """Lazily convert a PA statute title into Pinecone records.
+
+    Streaming counterpart of ``title_to_records``.  With the window chunker
+    the total chunk count is unknown until the title is fully parsed, so
+    multi-chunk titles are labelled "[part N]" rather than "[part N/M]".
+    """
+    stream = stream or StatuteTextStream()
+    if chunker == "section":
+        units: Iterator = iter_sections(stream.iter_text(html))
+    elif token_chunker is not None:
+        units = token_chunker.iter_chunks(stream.iter_text(html))
+    else:
+        units = stream.iter_chunks(html)
+
+    # Buffer the head of the title: enough to know its name, and whether
+    # the whole title fits in what was read
+    pending: list = []
+    exhausted = True
+    for unit in units:
+        pending.append(unit)
+        if len(stream.head) >= TITLE_HEAD_CHARS:
+            exhausted = False
+            break
+
+    if exhausted and stream.chars < 100:
+        return
+
+    title_name = stream.title_name
+    tagger = tagger or TAGGER
+
+    if chunker == "section":
+        # One pass, so a heading at the end of the buffered head still
+        # reaches the section after it
+        yield from section_records(ttl, title_name, itertools.chain(pending, units),
+                                   tagger, token_chunker)
+        return
+
+    url = title_url(ttl)
+    summary = f"Pennsylvania Consolidated Statutes, {title_name}."
+    single = exhausted and len(pending) == 1
+
+    def _records(texts: Iterable[str], first: int) -> Iterator[dict]:
+        for i, chunk in enumerate(texts, start=first):
+            if single:
+                chunk_title = title_name
+            elif exhausted:
+                chunk_title = f"{title_name} [part {i+1}/{len(pending)}]"
+            else:
+                chunk_title = f"{title_name} [part {i+1}]"
+            yield {
+                "_id":     f"pa-statute-t{ttl}-chunk{i}",
+                "text":    chunk,
+                "title":   chunk_title,
+                "type":    "legal-code",
+                "date":    "",
+                "url":     url,
+                "source":  "Pennsylvania General Assembly",
+                "tags":    tagger.tags(chunk),
+                "summary": summary,
+            }
+
+    yield from _records(pending, 0)
+    yield from _records(units, len(pending))
 
 
 # ── PA Statutes fetching ────────────────────────────────────────────────────
@@ -193,7 +770,7 @@ def fetch_title_html(ttl: int) -> Optional[str]:
     """Download the full HTML for a PA statute title. Returns None on failure."""
     url = f"{PA_STATUTES_BASE}/{ttl}/{ttl}.HTM"
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=60)
+        resp = http_client.get(url, timeout=60)
         if resp.status_code == 200:
             return resp.text
         return None
@@ -201,6 +778,74 @@ def fetch_title_html(ttl: int) -> Optional[str]:
         return None
 
 
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` requests/second, bursts of ``burst``."""
+
+    def __init__(self, rate: float = REQUEST_RATE, burst: int = REQUEST_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst,
+                                   self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class PoliteFetcher:
+    """Download title HTML on a thread pool while staying polite per host.
+
+    Each host gets its own concurrency cap and token bucket, so requests are
+    paced by rate rather than by fixed sleeps after every response (404s
+    included).
+    """
+
+    def __init__(self, workers: int = FETCH_WORKERS,
+                 per_host: int = PER_HOST_CONCURRENCY,
+                 rate: float = REQUEST_RATE, burst: int = REQUEST_BURST):
+        self.workers = workers
+        self.per_host = per_host
+        self.rate = rate
+        self.burst = burst
+        self._hosts: dict[str, tuple[threading.Semaphore, TokenBucket]] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url: str) -> tuple[threading.Semaphore, TokenBucket]:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = (threading.Semaphore(self.per_host),
+                                     TokenBucket(self.rate, self.burst))
+            return self._hosts[host]
+
+    def _fetch(self, ttl: int) -> Optional[str]:
+        slots, bucket = self._host(title_url(ttl))
+        with slots:
+            bucket.acquire()
+            return fetch_title_html(ttl)
+
+    def iter_titles(self, titles: list[int]) -> Iterator[tuple[int, Optional[str]]]:
+        """Yield ``(ttl, html)`` for every title, in the order given.
+
+        Downloads finish in whatever order the network allows; results are
+        handed back in title order so the output is deterministic.  At most
+        ``2 * workers`` titles are in flight or waiting, which bounds how many
+        finished documents sit in memory ahead of the consumer.
+        """
+        return ordered_map(self._fetch, titles, self.workers, name="fetch")
+
+
 def title_url(ttl: int) -> str:
     """Public URL for a statute title."""
     return f"{PA_STATUTES_BASE}/{ttl}/{ttl}.HTM"
@@ -216,10 +861,20 @@ def is_reserved_title(html: str) -> bool:
 
 
 # ── Build records ────────────────────────────────────────────────────────────
-def title_to_records(ttl: int, html: str) -> list[dict]:
-    """Convert a PA statute title into Pinecone records."""
-    title_name = extract_title_name(html)
-    text = html_to_text(html)
+def title_to_records(ttl: int, doc: StatuteDocument,
+                     chunker: str = DEFAULT_CHUNKER,
+                     tagger: Optional[TopicTagger] = None,
+                     token_chunker: Optional[TokenChunker] = None) -> list[dict]:
+    """Convert a parsed PA statute title into Pinecone records.
+
+    ``chunker="section"`` (default) emits one record per § / heading with
+    ids like ``pa-statute-t18-s2501-p0``; ``"window"`` keeps the legacy
+    fixed-size ``pa-statute-t18-chunkN`` windows.  Each record's tags come
+    from its own text (``tagger``, default ``TAGGER``).  A ``token_chunker``
+    sizes chunks in tokens instead of characters.
+    """
+    title_name = doc.title_name
+    text = doc.text
 
     if not text or len(text) < 100:
         return []
@@ -227,14 +882,18 @@ def title_to_records(ttl: int, html: str) -> list[dict]:
     url = title_url(ttl)
     source = "Pennsylvania General Assembly"
 
-    # Assign tags based on the full text (sample first 5000 chars for speed)
-    tags = assign_tags(text[:5000])
+    tagger = tagger or TAGGER
+
+    if chunker == "section":
+        return list(section_records(ttl, title_name, iter_sections([text]), tagger,
+                                    token_chunker))
 
     # Determine type from title name
     summary = f"Pennsylvania Consolidated Statutes, {title_name}."
 
     # Chunk the text
-    chunks = chunk_text(text)
+    chunks = (token_chunker.chunk(text) if token_chunker is not None
+              else chunk_text(text))
     if not chunks:
         return []
 
@@ -252,68 +911,83 @@ def title_to_records(ttl: int, html: str) -> list[dict]:
             "date":    "",  # statutes are current/living law — no single date
             "url":     url,
             "source":  source,
-            "tags":    tags,
+            "tags":    tagger.tags(chunk),
             "summary": summary,
         }
         records.append(record)
     return records
 
 
-# ── Token-aware rate limiter ──────────────────────────────────────────────────
-class TokenRateLimiter:
-    """Rolling-window rate limiter that estimates Pinecone embedding tokens."""
-
-    def __init__(self, tpm_limit: int = PINECONE_TPM_LIMIT, window: float = 60.0):
-        self.tpm_limit = tpm_limit
-        self.window = window          # seconds
-        self._log: list[tuple[float, int]] = []   # (timestamp, tokens)
-
-    def _estimate_tokens(self, records: list[dict]) -> int:
-        """Estimate how many embedding tokens a batch will use."""
-        total_chars = sum(len(r.get("text", "")) for r in records)
-        return int(total_chars * TOKENS_PER_CHAR)
-
-    def _prune(self):
-        """Drop entries older than the rolling window."""
-        cutoff = time.time() - self.window
-        self._log = [(t, n) for t, n in self._log if t > cutoff]
-
-    def _tokens_used(self) -> int:
-        self._prune()
-        return sum(n for _, n in self._log)
-
-    def wait_if_needed(self, records: list[dict], verbose: bool = False):
-        """Block until there is room under the token ceiling, then record."""
-        est = self._estimate_tokens(records)
-        while True:
-            self._prune()
-            used = self._tokens_used()
-            if used + est <= self.tpm_limit:
-                break
-            wait = self._log[0][0] + self.window - time.time() + 0.5
-            if wait > 0:
-                if verbose:
-                    print(f"        ⏳ rate-limit: ~{used:,} tokens used, "
-                          f"sleeping {wait:.1f}s …")
-                time.sleep(wait)
-        self._log.append((time.time(), est))
-
-
 # ── Pinecone upsert ─────────────────────────────────────────────────────────
-def get_pinecone_index():
-    from pinecone import Pinecone
-    pc = Pinecone(api_key=PINECONE_API_KEY)
-    return pc.Index(PINECONE_INDEX)
-
-
 def upsert_batch(index, records: list[dict], limiter: TokenRateLimiter,
-                 verbose: bool = False):
-    """Upsert a batch of records, respecting the token rate limit."""
-    limiter.wait_if_needed(records, verbose=verbose)
-    index.upsert_records(
-        namespace=PINECONE_NAMESPACE,
-        records=records,
-    )
+                 verbose: bool = False,
+                 manifest: Optional[UpsertManifest] = None,
+                 batcher: Optional[UpsertBatcher] = None):
+    """Upsert a batch of records to ``index`` (any sink from sinks.py),
+    respecting the token rate limit.
+
+    A 429 tightens the limiter's budget and pauses other upserts before the
+    error propagates to the caller's retry logic.  The request's latency
+    (not counting the rate-limit wait) tunes the ``batcher``'s batch size.
+    """
+    limiter.wait_if_needed(records, verbose=verbose,
+                           tokens=getattr(records, "tokens", None))
+    started = time.monotonic()
+    try:
+        index.upsert_records(
+            namespace=PINECONE_NAMESPACE,
+            records=records,
+        )
+    except Exception as exc:
+        limited, retry_after = rate_limit_info(exc)
+        if limited:
+            limiter.throttled(retry_after, verbose=verbose)
+        elif batcher is not None:
+            batcher.observe(records, None)
+        raise
+    if batcher is not None:
+        batcher.observe(records, time.monotonic() - started)
+    limiter.succeeded()
+    if manifest is not None:
+        manifest.mark_upserted(PINECONE_NAMESPACE, records)
+
+
+def stored_title_ids(index, manifest: Optional[UpsertManifest], ttl: int,
+                     legacy: bool = False) -> set[str]:
+    """Ids already stored for a statute title.
+
+    Read from the manifest when there is one; otherwise the index is listed
+    by the title's id prefix.  ``legacy`` also lists the fixed-window
+    ``-chunkN`` ids, which older runs upserted without a manifest — once
+    they are deleted that listing comes back empty.
+    """
+    prefix = f"pa-statute-t{ttl}-"
+    if manifest is None:
+        return {i for page in index.list(prefix=prefix, namespace=PINECONE_NAMESPACE)
+                for i in page}
+    ids = set(manifest.ids_with_prefix(PINECONE_NAMESPACE, prefix))
+    if legacy:
+        ids.update(i for page in index.list(prefix=f"{prefix}chunk",
+                                            namespace=PINECONE_NAMESPACE)
+                   for i in page)
+    return ids
+
+
+def delete_records(index, ids: list[str],
+                   manifest: Optional[UpsertManifest] = None):
+    """Remove stale records from the index (and the manifest)."""
+    for start in range(0, len(ids), DELETE_BATCH):
+        batch = ids[start:start + DELETE_BATCH]
+        index.delete(ids=batch, namespace=PINECONE_NAMESPACE)
+        if manifest is not None:
+            manifest.forget(PINECONE_NAMESPACE, batch)
+
+
+def _note_ids(records: Iterable[dict], ids: set[str]) -> Iterator[dict]:
+    """Pass ``records`` through, adding each ``_id`` to ``ids``."""
+    for record in records:
+        ids.add(record["_id"])
+        yield record
 
 
 # ── Main pipeline ───────────────────────────────────────────────────────────
@@ -323,95 +997,413 @@ def run(
     limit: Optional[int] = None,
     verbose: bool = False,
     titles: Optional[list[int]] = None,
+    parser: Optional[str] = None,
+    stream: bool = False,
+    chunker: str = DEFAULT_CHUNKER,
+    workers: int = FETCH_WORKERS,
+    per_host: int = PER_HOST_CONCURRENCY,
+    rate: float = REQUEST_RATE,
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+    manifest_path: Optional[str] = DEFAULT_MANIFEST_PATH,
+    force: bool = False,
+    resume: bool = False,
+    parse_workers: int = PARSE_WORKERS,
+    queue_depth: int = STAGE_QUEUE_DEPTH,
+    upserts_in_flight: int = UPSERTS_IN_FLIGHT,
+    tokenizer: str = DEFAULT_TOKENIZER,
+    tpm_limit: Optional[int] = None,
+    shared_budget: Optional[str] = DEFAULT_LEDGER_PATH,
+    batch_records: int = MAX_BATCH_RECORDS,
+    batch_bytes: int = MAX_BATCH_BYTES,
+    batch_tokens: int = MAX_BATCH_TOKENS,
+    sink: str = DEFAULT_SINK,
+    export_path: Optional[str] = None,
+    import_path: Optional[str] = None,
+    taxonomy: Optional[str] = None,
+    chunk_tokens: Optional[int] = None,
+    chunk_histogram: bool = False,
 ):
+    if import_path:
+        # Upsert the records of an earlier --export instead of scraping
+        import_records(
+            import_path, name="legal-code", namespace=PINECONE_NAMESPACE,
+            upsert_batch=upsert_batch, api_key=PINECONE_API_KEY,
+            index_name=PINECONE_INDEX, verbose=verbose,
+            manifest_path=manifest_path, force=force, queue_depth=queue_depth,
+            upserts_in_flight=upserts_in_flight, tokenizer=tokenizer,
+            tpm_limit=tpm_limit, shared_budget=shared_budget,
+            batch_records=batch_records, batch_bytes=batch_bytes,
+            batch_tokens=batch_tokens, sink=sink,
+        )
+        return
+
+    tagger = TAGGER
+    if taxonomy:
+        try:
+            tagger = TopicTagger(load_taxonomy(taxonomy))
+        except ValueError as exc:
+            print(f"❌  {exc}")
+            sys.exit(1)
+    if chunk_tokens is not None and not 0 < chunk_tokens <= MAX_CHUNK_TOKENS:
+        print(f"❌  --chunk-tokens must be between 1 and the embedding model's "
+              f"{MAX_CHUNK_TOKENS}-token limit (MAX_CHUNK_TOKENS)")
+        sys.exit(1)
+
+    # An export streams every record to a file and upserts nothing
+    writer = None
+    if export_path:
+        try:
+            writer = RecordWriter(export_path)
+        except ValueError as exc:
+            print(f"❌  {exc}")
+            sys.exit(1)
+        dry_run = True
+
+    if cache_dir:
+        http_client.enable_cache(cache_dir)
+
     title_range = titles if titles else list(TITLE_RANGE)
 
+    # Progress is only meaningful for runs that upsert, and is kept per sink
+    checkpoint = None
+    checkpoint_dir = state_path(sink, DEFAULT_CHECKPOINT_DIR)
+    if not dry_run and checkpoint_dir:
+        signature = {
+            "titles": title_range, "chunker": chunker,
+            "namespace": PINECONE_NAMESPACE,
+        }
+        if chunk_tokens:
+            # Token-sized chunks reuse the chunk ids with different text
+            signature["chunk_tokens"] = chunk_tokens
+        checkpoint = Checkpoint("legal-code", signature, directory=checkpoint_dir)
+        last_title = checkpoint.load().get("last_title") if resume else None
+        if last_title in title_range:
+            title_range = title_range[title_range.index(last_title) + 1:]
+        elif not resume:
+            checkpoint.clear()
+        if not title_range:
+            print("✅  Previous run already completed every title.")
+            checkpoint.clear()
+            return
+
     print(f"\n{'='*60}")
     print(f"  PA Consolidated Statutes → Pinecone")
     print(f"  Titles to scan : {len(title_range)} "
           f"({title_range[0]}–{title_range[-1]})")
-    print(f"  Dry run        : {dry_run}")
+    if writer is not None:
+        print(f"  Export         : {export_path}")
+    else:
+        print(f"  Dry run        : {dry_run}")
     print(f"  Limit          : {limit or 'none (all)'}")
+    print(f"  HTML parser    : {'streaming' if stream else parser or HTML_PARSER}")
+    chunk_size = (f"{chunk_tokens} tokens ({tokenizer})" if chunk_tokens
+                  else f"{CHUNK_SIZE} characters")
+    print(f"  Chunker        : {chunker}, ~{chunk_size}")
+    print(f"  Taxonomy       : {taxonomy or 'built-in'} ({len(tagger.taxonomy)} tags)")
+    print(f"  Fetching       : {workers} workers, ≤{per_host}/host, "
+          f"{rate:g} req/s")
+    print(f"  Pipeline       : {parse_workers} parse workers, "
+          f"queue depth {queue_depth}, {upserts_in_flight} upserts in flight")
+    print(f"  HTTP cache     : {cache_dir or 'off'}")
+    if checkpoint is not None and checkpoint.state.get("last_title"):
+        print(f"  Resuming after : Title {checkpoint.state['last_title']}")
     print(f"{'='*60}\n")
 
-    limiter = TokenRateLimiter()
+    try:
+        estimator = get_estimator(tokenizer)
+    except (ImportError, ValueError) as exc:
+        print(f"❌  --tokenizer {tokenizer}: {exc}")
+        sys.exit(1)
+    # Draw on the token window shared with other scraper processes
+    ledger = (SharedTokenLedger("legal-code", shared_budget)
+              if shared_budget and not dry_run else None)
+    token_chunker = TokenChunker(estimator, chunk_tokens) if chunk_tokens else None
+    # Counting every chunk costs a tokenizer pass of its own: only on request
+    histogram = TokenHistogram() if chunk_histogram else None
+    limiter = TokenRateLimiter(tpm_limit, estimator=estimator, ledger=ledger)
+    batcher = UpsertBatcher(estimator, max_records=batch_records,
+                            max_bytes=batch_bytes, max_tokens=batch_tokens)
 
     if not dry_run:
-        if not PINECONE_API_KEY or not PINECONE_INDEX:
-            print("❌  Set PINECONE_API_KEY and PINECONE_INDEX_NAME in .env first.")
+        try:
+            idx = open_sink(sink, api_key=PINECONE_API_KEY, index_name=PINECONE_INDEX)
+        except ValueError as exc:
+            print(f"❌  {exc}")
             sys.exit(1)
-        idx = get_pinecone_index()
-        print(f"✅  Connected to Pinecone index '{PINECONE_INDEX}'")
-        print(f"     Token budget: {PINECONE_TPM_LIMIT:,} tokens/min "
-              f"(batch size {UPSERT_BATCH})\n")
+        print(f"✅  Connected to {idx.label}")
+        print(f"     Token budget: {limiter.tpm_limit:,} tokens/min"
+              f"{' (shared)' if ledger is not None else ''}, counted "
+              f"with {limiter.estimator.name}")
+        print(f"     Batches: {batcher.describe()}\n")
     else:
         idx = None
 
+    # Dry runs never upsert, so they neither consult nor update the manifest
+    manifest_path = state_path(sink, manifest_path)
+    manifest = (UpsertManifest(manifest_path, force=force)
+                if manifest_path and not dry_run else None)
+
     total_titles_processed = 0
     total_titles_skipped   = 0
     total_records          = 0
-    buffer: list[dict]     = []
-
-    for ttl in title_range:
-        if limit and total_titles_processed >= limit:
-            break
-
-        print(f"  Title {ttl:2d}: ", end="", flush=True)
+    total_stale            = 0
+    tracker                = FlushTracker()
+    completed              = True
+
+    # Checkpoint saves come from this thread and the upsert thread; keep
+    # each "which title is done" decision and its save together
+    progress = threading.Lock()
+
+    # Ids each title produced, until all its records are upserted; then
+    # anything else stored under its prefix is stale
+    emitted: deque = deque()         # (ttl, ids or None), in title order
+    prunable: list = []              # (ttl, ids) ready for stale deletion
+
+    def titles_done(done: Optional[int]):
+        """Every title up to ``done`` is upserted (called under ``progress``)."""
+        while done is not None and emitted:
+            ttl, ids = emitted.popleft()
+            if ids is not None:
+                prunable.append((ttl, ids))
+            if ttl == done:
+                break
 
-        html = fetch_title_html(ttl)
+    def prune_stale():
+        """Delete what upserted titles no longer produce — sections that
+        shrank or went away, and the legacy ``-chunkN`` windows."""
+        nonlocal total_stale
+        with progress:
+            ready = prunable[:]
+            prunable.clear()
+        for ttl, ids in ready:
+            stale = sorted(stored_title_ids(idx, manifest, ttl,
+                                            legacy=chunker == "section") - ids)
+            if stale:
+                delete_records(idx, stale, manifest)
+                total_stale += len(stale)
+                if verbose:
+                    print(f"        🗑  Title {ttl}: removed {len(stale)} stale records")
+
+    def upsert(batch: list[dict]):
+        """Upsert stage — several batches run at once."""
+        upsert_batch(idx, batch, limiter, verbose=verbose, manifest=manifest,
+                     batcher=batcher)
+
+    def flushed(batch: list[dict]):
+        """Batches succeed in order: advance the checkpoint past finished titles."""
+        with progress:
+            done = tracker.flushed(len(batch))
+            titles_done(done)
+            if checkpoint is not None:
+                last_batch = [batch[0]["_id"], batch[-1]["_id"]]
+                if done is not None:
+                    checkpoint.save(last_title=done, last_batch=last_batch)
+                else:
+                    checkpoint.save(last_batch=last_batch)
+
+    upserter = (BackgroundUpserter(upsert, on_flushed=flushed, depth=queue_depth,
+                                   in_flight=upserts_in_flight)
+                if not dry_run else None)
+    failed_batches: list = []
+
+    def flush(final: bool = False):
+        """Hand every full batch (with ``final``, everything) to the upserter."""
+        for batch in batcher.batches(final=final):
+            if verbose:
+                print(f"        → upserting {len(batch)} records "
+                      f"(~{batch.tokens:,} tokens)")
+            upserter.submit(batch)
+
+    def title_finished(ttl: int, count: int, ids: Optional[set[str]] = None):
+        """All of a title's new records are buffered (count may be 0);
+        ``ids`` are all the records it produced, unchanged ones included."""
+        with progress:
+            emitted.append((ttl, ids))
+            done = tracker.added(ttl, count)
+            titles_done(done)
+            if checkpoint is not None and done is not None:
+                checkpoint.save(last_title=done)
+
+    def extract(fetched: tuple[int, Optional[str]]) -> dict:
+        """Parse/chunk stage: HTML → records for one title."""
+        ttl, html = fetched
         if html is None:
-            print("not found (404)")
-            total_titles_skipped += 1
-            time.sleep(REQUEST_DELAY)
-            continue
-
+            return {"status": "missing"}
         if is_reserved_title(html):
-            name = extract_title_name(html)
-            print(f"skipped — {name or 'reserved/empty'} ({len(html)} bytes)")
-            total_titles_skipped += 1
-            time.sleep(REQUEST_DELAY)
-            continue
+            # Reserved placeholders are tiny — a tree parse is cheap here
+            name = StatuteDocument(html, parser=parser).title_name
+            return {"status": "reserved", "name": name, "bytes": len(html)}
+        if stream:
+            # The title keeps parsing on a producer thread, at most
+            # STREAM_SLICE_RECORDS records ahead of the main loop; pulling
+            # the first record starts it and settles the title's name
+            text_stream = StatuteTextStream()
+            records = prefetch(iter_title_records(ttl, html, stream=text_stream,
+                                                  chunker=chunker, tagger=tagger,
+                                                  token_chunker=token_chunker),
+                               depth=STREAM_SLICE_RECORDS)
+            first = next(records, None)
+            return {"status": "ok", "name": text_stream.title_name,
+                    "text_stream": text_stream,
+                    "records": [] if first is None else itertools.chain([first], records)}
+        doc = StatuteDocument(html, parser=parser)
+        text = doc.text
+        return {"status": "ok", "name": doc.title_name, "chars": len(text),
+                "preview": text[:120],
+                "records": title_to_records(ttl, doc, chunker=chunker,
+                                            tagger=tagger,
+                                            token_chunker=token_chunker)}
+
+    if workers > http_client.POOL_MAXSIZE:
+        # Keep one pooled keep-alive connection per download thread
+        http_client.configure(pool_maxsize=workers)
+    fetcher = PoliteFetcher(workers=workers, per_host=per_host, rate=rate)
+
+    # fetch (PoliteFetcher) → parse/chunk (extract) → batcher → upsert threads
+    parsed = ordered_map(extract, fetcher.iter_titles(title_range),
+                         workers=parse_workers, ahead=queue_depth, name="parse")
+    try:
+        for (ttl, _), title in parsed:
+            if not dry_run:
+                prune_stale()
+            if limit and total_titles_processed >= limit:
+                completed = False
+                break
 
-        name = extract_title_name(html)
-        text = html_to_text(html)
-        records = title_to_records(ttl, html)
-        total_titles_processed += 1
-        total_records += len(records)
+            print(f"  Title {ttl:2d}: ", end="", flush=True)
 
-        print(f"✅ {name} — {len(text):,} chars → {len(records)} chunks")
+            if title["status"] == "missing":
+                print("not found (404)")
+                total_titles_skipped += 1
+                title_finished(ttl, 0)
+                continue
 
-        if verbose:
-            print(f"        Text preview: {text[:120]}...")
-            if records:
-                print(f"        Tags: {records[0].get('tags', [])}")
+            if title["status"] == "reserved":
+                print(f"skipped — {title['name'] or 'reserved/empty'} "
+                      f"({title['bytes']} bytes)")
+                total_titles_skipped += 1
+                title_finished(ttl, 0)
+                continue
 
-        if dry_run:
-            for r in records[:3]:  # only print first 3 chunks per title in dry-run
-                print(json.dumps(r, indent=2))
-            if len(records) > 3:
-                print(f"        ... ({len(records) - 3} more chunks)")
-        else:
-            buffer.extend(records)
-            while len(buffer) >= UPSERT_BATCH:
-                batch = buffer[:UPSERT_BATCH]
-                buffer = buffer[UPSERT_BATCH:]
-                upsert_batch(idx, batch, limiter, verbose=verbose)
+            total_titles_processed += 1
+            records = title["records"]
+
+            if not stream:
+                print(f"✅ {title['name']} — {title['chars']:,} chars → "
+                      f"{len(records)} chunks")
                 if verbose:
-                    print(f"        → upserted {len(batch)} records")
+                    print(f"        Text preview: {title['preview']}...")
+                    if records:
+                        print(f"        Tags: {records[0].get('tags', [])}")
+            elif verbose:
+                # Records are produced lazily; report once the title is drained
+                print("streaming …")
+
+            title_ids: set[str] = set()
+            records = _note_ids(records, title_ids)
+            if checkpoint is not None and resume and ttl == title_range[0]:
+                # The interrupted run may have upserted the start of this title
+                records = skip_flushed(records, checkpoint.last_flushed_id,
+                                       f"pa-statute-t{ttl}-")
+
+            # A streamed title reaches the batcher a slice at a time
+            records = iter(records)
+            parts = (iter(lambda: list(itertools.islice(records, STREAM_SLICE_RECORDS)), [])
+                     if stream else [list(records)])
+            title_records = 0
+            title_buffered = 0
+            for part in parts:
+                shown = title_records
+                title_records += len(part)
+                counts = None
+                if histogram is not None:
+                    counts = estimator.count_batch([r["text"] for r in part])
+                    histogram.add(counts)
+                if writer is not None:
+                    writer.write(part)
+                elif dry_run:
+                    # only print first 3 chunks per title in dry-run
+                    for r in part[:max(0, 3 - shown)]:
+                        print(json.dumps(r, indent=2))
+                else:
+                    if manifest is not None:
+                        changed = [manifest.is_changed(PINECONE_NAMESPACE, r)
+                                   for r in part]
+                        part = [r for r, c in zip(part, changed) if c]
+                        if counts is not None:
+                            counts = [n for n, c in zip(counts, changed) if c]
+                    batcher.add(part, counts)
+                    flush()
+                    title_buffered += len(part)
+            if writer is None and not dry_run:
+                title_finished(ttl, title_buffered, title_ids)
+            total_records += title_records
+
+            if stream:
+                text_stream = title["text_stream"]
+                print(f"{'        ' if verbose else ''}✅ {title['name']} — "
+                      f"{text_stream.chars:,} chars → {title_records} chunks (streamed)")
+                if verbose:
+                    print(f"        Text preview: {text_stream.head[:120]}...")
 
-        time.sleep(REQUEST_DELAY)
+            if dry_run and writer is None and title_records > 3:
+                print(f"        ... ({title_records - 3} more chunks)")
+    finally:
+        parsed.close()
 
-    # Flush remaining buffer
-    if buffer and not dry_run:
-        upsert_batch(idx, buffer, limiter, verbose=verbose)
-        if verbose:
-            print(f"        → upserted final {len(buffer)} records")
+    # Only a finished export appears under its real name
+    if writer is not None:
+        writer.close()
+
+    # Flush the remaining records and wait for the upsert threads to drain
+    if not dry_run:
+        flush(final=True)
+        failed_batches = upserter.close()
+        if failed_batches:
+            completed = False   # keep the checkpoint so --resume retries them
+        prune_stale()
+        idx.close()
+
+    # A run that reached the last title leaves nothing to resume
+    if checkpoint is not None and completed:
+        checkpoint.clear()
 
     print(f"\n{'='*60}")
     print(f"  DONE")
     print(f"  Titles processed : {total_titles_processed}")
     print(f"  Titles skipped   : {total_titles_skipped}")
     print(f"  Total records    : {total_records}")
+    if histogram is not None:
+        print(f"  Chunk tokens     : {histogram.summary()}")
+        for line in histogram.lines():
+            print(f"     {line}")
+    if writer is not None:
+        print(f"  Exported         : {writer.count:,} records → {export_path} "
+              f"({writer.size() / 1e6:,.1f} MB)")
+    if manifest is not None:
+        print(f"  Records skipped  : {manifest.skipped}")
+        print(f"  Records upserted : {manifest.changed}")
+    if not dry_run:
+        print(f"  Stale removed    : {total_stale}")
+    if failed_batches:
+        print(f"  ⚠️  Failed batches : {len(failed_batches)} "
+              f"({sum(len(b) for b, _ in failed_batches)} records) — "
+              f"last error: {failed_batches[-1][1]}")
+        print(f"     Re-run with --resume to retry them.")
+    cache = http_client.get_cache()
+    if cache is not None:
+        print(f"  HTTP cache       : {cache.hits} revalidated, {cache.misses} downloaded")
+    if not dry_run:
+        print(f"  Embedding tokens : ~{limiter.tokens:,} ({limiter.throttles} × 429, "
+              f"budget {limiter.tpm_limit:,}/min)")
+        print(f"  Upsert batches   : {batcher.summary()}")
+        if idx.summary():
+            print(f"  Sink             : {idx.summary()}")
+    if ledger is not None:
+        shared = ledger.metrics()
+        ledger.close()
+        print(f"  Shared budget    : {shared['waits']} waits for other scrapers "
+              f"({shared['wait_seconds']:,.1f}s)")
     print(f"{'='*60}\n")
 
 
@@ -436,12 +1428,166 @@ def main():
         "--titles", type=int, nargs="+", default=None,
         help="Specific title numbers to process (e.g. --titles 18 42 53 75)",
     )
+    parser.add_argument(
+        "--parser", choices=["lxml", "html.parser"], default=None,
+        help=f"BeautifulSoup parser backend (default: {HTML_PARSER})",
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="Parse titles incrementally with bounded memory (for huge titles "
+             "or small ingest hosts)",
+    )
+    parser.add_argument(
+        "--chunker", choices=CHUNKERS, default=DEFAULT_CHUNKER,
+        help="'section' = one record per §/heading with stable ids; "
+             "'window' = legacy fixed 1000-char windows",
+    )
+    parser.add_argument(
+        "--taxonomy", metavar="PATH", default=None,
+        help="JSON file mapping each topic tag to its keywords "
+             "(default: the built-in TAG_KEYWORDS)",
+    )
+    parser.add_argument(
+        "--chunk-tokens", type=int, nargs="?", const=DEFAULT_CHUNK_TOKENS,
+        default=None, metavar="N",
+        help="Size chunks in embedding tokens (counted with --tokenizer) "
+             f"instead of characters; N defaults to {DEFAULT_CHUNK_TOKENS} and "
+             f"may be at most {MAX_CHUNK_TOKENS}",
+    )
+    parser.add_argument(
+        "--chunk-histogram", action="store_true",
+        help="Count every chunk's tokens (with --tokenizer) and print their "
+             "distribution at the end",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=FETCH_WORKERS,
+        help=f"Concurrent title downloads (default: {FETCH_WORKERS})",
+    )
+    parser.add_argument(
+        "--per-host", type=int, default=PER_HOST_CONCURRENCY,
+        help=f"Max simultaneous requests per host (default: {PER_HOST_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--rate", type=float, default=REQUEST_RATE,
+        help=f"Max requests/second per host (default: {REQUEST_RATE:g})",
+    )
+    parser.add_argument(
+        "--cache-dir", default=DEFAULT_CACHE_DIR,
+        help="On-disk HTTP cache; unchanged responses are revalidated with "
+             "ETag/Last-Modified and read from here (default: .cache/http)",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Bypass the HTTP cache and download everything",
+    )
+    parser.add_argument(
+        "--manifest", default=DEFAULT_MANIFEST_PATH,
+        help="SQLite manifest of upserted record hashes; unchanged records "
+             "are skipped (default: .cache/manifest.sqlite)",
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Re-upsert every record even if the manifest says it is unchanged",
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Continue after the last title a previous (interrupted) run "
+             "fully upserted",
+    )
+    parser.add_argument(
+        "--parse-workers", type=int, default=PARSE_WORKERS,
+        help=f"Titles parsed and chunked concurrently (default: {PARSE_WORKERS})",
+    )
+    parser.add_argument(
+        "--queue-depth", type=int, default=STAGE_QUEUE_DEPTH,
+        help="Parsed titles / upsert batches allowed to wait between pipeline "
+             f"stages before the earlier stage blocks (default: {STAGE_QUEUE_DEPTH})",
+    )
+    parser.add_argument(
+        "--upserts-in-flight", type=int, default=UPSERTS_IN_FLIGHT,
+        help="Pinecone upsert requests sent concurrently, all drawing on the "
+             f"same token budget (default: {UPSERTS_IN_FLIGHT})",
+    )
+    parser.add_argument(
+        "--tokenizer", default=DEFAULT_TOKENIZER,
+        help="How embedding tokens are counted for the rate limit: chars[:ratio], "
+             "tiktoken:<encoding> or hf:<model or tokenizer.json> (default: "
+             f"{DEFAULT_TOKENIZER})",
+    )
+    parser.add_argument(
+        "--tpm-limit", type=int, default=None,
+        help="Embedding tokens per minute to stay under (default: 200k with "
+             "the chars estimate, 240k with a real tokenizer)",
+    )
+    parser.add_argument(
+        "--shared-budget", default=DEFAULT_LEDGER_PATH,
+        help="SQLite ledger holding the token budget shared by all scraper "
+             "processes on this host (default: .cache/token-ledger.sqlite)",
+    )
+    parser.add_argument(
+        "--no-shared-budget", action="store_true",
+        help="Use a private token budget (only safe if no other scraper runs)",
+    )
+    parser.add_argument(
+        "--batch-records", type=int, default=MAX_BATCH_RECORDS,
+        help="Most records per upsert request; the batch size adapts to "
+             f"Pinecone's latency below this (default: {MAX_BATCH_RECORDS})",
+    )
+    parser.add_argument(
+        "--batch-bytes", type=int, default=MAX_BATCH_BYTES,
+        help=f"Most payload bytes per upsert request (default: {MAX_BATCH_BYTES:,})",
+    )
+    parser.add_argument(
+        "--batch-tokens", type=int, default=MAX_BATCH_TOKENS,
+        help="Most estimated embedding tokens per upsert request "
+             f"(default: {MAX_BATCH_TOKENS:,})",
+    )
+    parser.add_argument(
+        "--sink", default=DEFAULT_SINK,
+        help="Where records go: pinecone, local[:DIR] (on-disk vectors with a "
+             "local embedder) or mock[:latency=…,tpm=…] (in-process Pinecone "
+             f"stand-in) (default: {DEFAULT_SINK})",
+    )
+    parser.add_argument(
+        "--export", metavar="PATH", dest="export_path",
+        help="Write every record to PATH instead of upserting: .ndjson/.jsonl, "
+             "optionally .gz or .zst compressed, or .parquet",
+    )
+    parser.add_argument(
+        "--import", metavar="PATH", dest="import_path",
+        help="Upsert the records of an --export file instead of scraping",
+    )
     args = parser.parse_args()
     run(
         dry_run=args.dry_run,
         limit=args.limit,
         verbose=args.verbose,
         titles=args.titles,
+        parser=args.parser,
+        stream=args.stream,
+        chunker=args.chunker,
+        workers=args.workers,
+        per_host=args.per_host,
+        rate=args.rate,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        manifest_path=args.manifest,
+        force=args.force,
+        resume=args.resume,
+        parse_workers=args.parse_workers,
+        queue_depth=args.queue_depth,
+        upserts_in_flight=args.upserts_in_flight,
+        tokenizer=args.tokenizer,
+        tpm_limit=args.tpm_limit,
+        shared_budget=None if args.no_shared_budget else args.shared_budget,
+        batch_records=args.batch_records,
+        batch_bytes=args.batch_bytes,
+        batch_tokens=args.batch_tokens,
+        sink=args.sink,
+        export_path=args.export_path,
+        import_path=args.import_path,
+        taxonomy=args.taxonomy,
+        chunk_tokens=args.chunk_tokens,
+        chunk_histogram=args.chunk_histogram,
     )
 
 
@@ -31,21 +31,84 @@ Usage
 
     # Skip attachment downloads (faster, title-only text)
     python scrape_legislation.py --skip-attachments
+
+    # Topic tags from your own taxonomy ({"tag": ["keyword", ...]} JSON)
+    python scrape_legislation.py --taxonomy taxonomy.json
+
+    # Chunks of ~384 embedding tokens instead of ~800 characters, counted
+    # with the model's own tokenizer
+    python scrape_legislation.py --chunk-tokens --tokenizer hf:intfloat/multilingual-e5-large
+
+    # …and print how many tokens the chunks came out at
+    python scrape_legislation.py --chunk-tokens --chunk-histogram
+
+    # Parse attachment PDFs/DOCX in 4 processes (0 = inline, no pool)
+    python scrape_legislation.py --workers 4
+
+    # Wider pipeline: 8 matters in flight, up to 8 batches queued for upsert
+    python scrape_legislation.py --matter-workers 8 --queue-depth 8
+
+    # Only matters added or amended since the previous --incremental run
+    python scrape_legislation.py --incremental
+
+    # Continue an interrupted run after the last fully upserted matter
+    python scrape_legislation.py --resume
+
+    # Scrape to a file here, embed it elsewhere (also .ndjson, .ndjson.gz, .parquet)
+    python scrape_legislation.py --export legislation.ndjson.zst
+    python scrape_legislation.py --import legislation.ndjson.zst
+
+    # Keep gateway URLs instead of following each matter's redirect
+    python scrape_legislation.py --lazy-urls
+
+    # Ignore the on-disk HTTP, attachment-text and URL caches (.cache/) and
+    # re-download everything
+    python scrape_legislation.py --no-cache
+
+    # No Pinecone: a local vector store (.cache/vectors), or a mock index
+    python scrape_legislation.py --sink local
+    python scrape_legislation.py --sink mock:latency=0.3,tpm=50000
 """
 
 import argparse
 import io
 import json
+import multiprocessing
 import os
 import re
 import sys
+import tempfile
+import threading
 import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, Union
 
 import requests
 from dotenv import load_dotenv
 
+import http_client
+from attachment_cache import (DEFAULT_ATTACHMENT_CACHE_PATH, AttachmentTextCache,
+                              has_version, new_digest)
+from batching import (MAX_BATCH_BYTES, MAX_BATCH_RECORDS, MAX_BATCH_TOKENS,
+                      UpsertBatcher)
+from checkpoint import DEFAULT_CHECKPOINT_DIR, Checkpoint, FlushTracker, skip_flushed
+from http_cache import DEFAULT_CACHE_DIR
+from manifest import DEFAULT_MANIFEST_PATH, UpsertManifest
+from matter_urls import (DEFAULT_MATTER_URL_PATH, MatterUrlResolver, gateway_url,
+                         resolve_gateway)
+from pipeline import (STAGE_QUEUE_DEPTH, UPSERTS_IN_FLIGHT, BackgroundUpserter,
+                      ordered_map, prefetch)
+from rate_limiter import TokenRateLimiter, rate_limit_info
+from record_io import RecordWriter, import_records
+from sinks import DEFAULT_SINK, open_sink, state_path
+from tagging import TopicTagger, load_taxonomy
+from token_chunking import (DEFAULT_CHUNK_TOKENS, MAX_CHUNK_TOKENS, TokenChunker,
+                            TokenHistogram, sentence_spans, trim_span)
+from token_ledger import DEFAULT_LEDGER_PATH, SharedTokenLedger
+from tokens import DEFAULT_TOKENIZER, get_estimator
+
 load_dotenv()
 
 # ── Configuration ────────────────────────────────────────────────────────────
@@ -62,6 +125,10 @@ SOURCES = [
 START_DATE = "2025-01-01"
 END_DATE   = "2026-01-01"   # exclusive upper bound → covers through 2025-12-31
 
+# Incremental sync: per-client MatterLastModifiedUtc high-water marks
+SYNC_STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               ".cache", "legistar-sync.json")
+
 PINECONE_API_KEY   = os.environ.get("PINECONE_API_KEY", "")
 PINECONE_INDEX     = os.environ.get("PINECONE_INDEX_NAME", "")
 PINECONE_NAMESPACE = os.environ.get("PINECONE_NAMESPACE", "legislation")
@@ -71,21 +138,44 @@ CHUNK_TARGET = 800    # target characters per chunk (soft limit)
 CHUNK_MAX    = 1200   # hard cap before forcing a split
 CHUNK_OVERLAP_SENTS = 1  # number of trailing sentences to repeat in next chunk
 
-# Pinecone batch size (records per upsert call)
-UPSERT_BATCH = 20
-
 # Legistar page size
 PAGE_SIZE = 100
 
-# Rate-limiting: seconds between Legistar API calls
+# Stale-chunk checks list the index once per block of 10**STALE_LIST_DIGITS
+# consecutive MatterIds (one id prefix) instead of once per matter
+STALE_LIST_DIGITS = 2
+
+# Rate-limiting: seconds between Legistar API calls, across all threads
 LEGISTAR_DELAY = 0.2
 
-# Max attachment size to download (5 MB)
-MAX_ATTACHMENT_BYTES = 5 * 1024 * 1024
+# Concurrent attachment-metadata lookups when a page can't be $expand-ed
+ATTACHMENT_FETCH_WORKERS = 4
+
+# Pipeline: matters converted to records concurrently, and pages of matters
+# downloaded ahead of the one being processed
+MATTER_WORKERS = 4
+PAGE_PREFETCH  = 1
+
+# Max attachment size to download (default 5 MB); downloads are streamed and
+# abandoned once they cross it, so raising it doesn't raise memory use
+MAX_ATTACHMENT_BYTES = int(os.environ.get("MAX_ATTACHMENT_BYTES", str(5 * 1024 * 1024)))
+
+# Attachments are streamed in chunks of this size and kept in memory up to
+# ATTACHMENT_SPOOL_BYTES, then spilled to a temporary file
+DOWNLOAD_CHUNK_BYTES   = 64 * 1024
+ATTACHMENT_SPOOL_BYTES = 1024 * 1024
+
+# Attachment parsing: PDF/DOCX extraction processes (0 = inline on the main
+# thread) and concurrent downloads feeding them
+EXTRACT_WORKERS  = os.cpu_count() or 1
+DOWNLOAD_THREADS = 4
+
+# How extraction processes are started: forking while the download and
+# matter threads run could copy a lock one of them holds into the child
+EXTRACT_START_METHOD = ("forkserver"
+                        if "forkserver" in multiprocessing.get_all_start_methods()
+                        else "spawn")
 
-# Pinecone token rate-limit (free tier: 250 000 tokens / minute)
-PINECONE_TPM_LIMIT = 200_000   # stay under the 250k ceiling with headroom
-TOKENS_PER_CHAR    = 0.30      # conservative estimate (~3.3 chars/token)
 
 
 # ── Keyword → tag mapping (simple heuristic) ────────────────────────────────
@@ -107,98 +197,109 @@ TAG_KEYWORDS: dict[str, list[str]] = {
 }
 
 
+# Default tagger; ``--taxonomy`` swaps in one loaded from a file
+TAGGER = TopicTagger(TAG_KEYWORDS)
+
+
 def assign_tags(text: str) -> list[str]:
     """Return a list of topic tags based on keyword matches in the text."""
-    lower = text.lower()
-    return sorted({
-        tag for tag, keywords in TAG_KEYWORDS.items()
-        if any(kw in lower for kw in keywords)
-    })
+    return TAGGER.tags(text)
 
 
 # ── Sentence-aware text chunking ─────────────────────────────────────────────
-_SENT_RE = re.compile(
-    r'(?<=[.!?])\s+|'       # split after sentence-ending punctuation + space
-    r'(?<=\n)\s*(?=\S)',     # split at paragraph breaks
-    re.MULTILINE,
-)
-
-
-def _split_sentences(text: str) -> list[str]:
-    """Split text into sentence-like segments."""
-    parts = _SENT_RE.split(text.strip())
-    return [p.strip() for p in parts if p and p.strip()]
-
-
-def chunk_text(text: str) -> list[str]:
-    """Split text into chunks that break at sentence boundaries.
+def chunk_spans(text: str) -> list[tuple[int, int]]:
+    """``(start, end)`` offsets into ``text`` of chunks that break at
+    sentence boundaries.
 
     Strategy:
-      1. Split the text into sentences.
-      2. Greedily pack sentences until hitting CHUNK_TARGET.
+      1. Walk the sentence boundaries once; sentences are only offsets.
+      2. Greedily extend the chunk until it would pass CHUNK_TARGET.
       3. If a single sentence exceeds CHUNK_MAX, hard-split it.
-      4. Carry the last CHUNK_OVERLAP_SENTS sentences into the next chunk
-         for continuity.
+      4. Start the next chunk at the last CHUNK_OVERLAP_SENTS sentences
+         of the previous one for continuity.
+
+    Chunks are always contiguous ranges of ``text``, trimmed of
+    whitespace; nothing is copied until a caller slices them.
     """
-    text = text.strip()
-    if not text:
+    start, end = trim_span(text, 0, len(text))
+    if start == end:
         return []
-    if len(text) <= CHUNK_TARGET:
-        return [text]
+    if end - start <= CHUNK_TARGET:
+        return [(start, end)]
 
-    sentences = _split_sentences(text)
-    if not sentences:
-        return [text] if text else []
+    spans: list[tuple[int, int]] = []
+    chunk_start = chunk_end = -1          # current chunk, -1 while empty
+    # Starts of the current chunk's last sentences, where the next one begins
+    overlap: deque = deque(maxlen=max(1, CHUNK_OVERLAP_SENTS))
 
-    chunks: list[str] = []
-    current: list[str] = []
-    current_len = 0
+    def flush():
+        nonlocal chunk_start
+        spans.append((chunk_start, chunk_end))
+        chunk_start = overlap[0] if CHUNK_OVERLAP_SENTS else -1
+        if not CHUNK_OVERLAP_SENTS:
+            overlap.clear()
 
-    for sent in sentences:
-        sent_len = len(sent)
+    for s, e in sentence_spans(text, start, end):
+        sent_len = e - s
 
         # If a single sentence is larger than CHUNK_MAX, hard-split it
         if sent_len > CHUNK_MAX:
-            # Flush current buffer first
-            if current:
-                chunks.append(" ".join(current))
-                current = current[-CHUNK_OVERLAP_SENTS:] if CHUNK_OVERLAP_SENTS else []
-                current_len = sum(len(s) + 1 for s in current)
-            # Hard-split the long sentence
-            for i in range(0, sent_len, CHUNK_MAX):
-                piece = sent[i:i + CHUNK_MAX].strip()
-                if piece:
-                    chunks.append(piece)
+            # Flush the current chunk first; overlap can't reach across
+            # the long sentence, so the next chunk starts fresh
+            if chunk_start >= 0:
+                flush()
+                chunk_start = -1
+                overlap.clear()
+            for i in range(s, e, CHUNK_MAX):
+                piece = trim_span(text, i, min(i + CHUNK_MAX, e))
+                if piece[0] < piece[1]:
+                    spans.append(piece)
             continue
 
-        # Would adding this sentence exceed the target?
-        if current_len + sent_len + 1 > CHUNK_TARGET and current:
-            chunks.append(" ".join(current))
-            # Overlap: carry last N sentences
-            current = current[-CHUNK_OVERLAP_SENTS:] if CHUNK_OVERLAP_SENTS else []
-            current_len = sum(len(s) + 1 for s in current)
+        # Would adding this sentence exceed the target?  (Counted as
+        # sentences plus one separator each, as the chunks used to be)
+        if chunk_start >= 0 and chunk_end - chunk_start + sent_len + 2 > CHUNK_TARGET:
+            flush()
 
-        current.append(sent)
-        current_len += sent_len + 1
+        if chunk_start < 0:
+            chunk_start = s
+        chunk_end = e
+        overlap.append(s)
 
     # Flush remaining
-    if current:
-        remainder = " ".join(current)
+    if chunk_start >= 0:
         # If the remainder is very small and we already have chunks, merge it
-        if chunks and len(remainder) < 150:
-            chunks[-1] = chunks[-1] + " " + remainder
+        if spans and chunk_end - chunk_start < 150:
+            spans[-1] = (spans[-1][0], chunk_end)
         else:
-            chunks.append(remainder)
+            spans.append((chunk_start, chunk_end))
+    return spans
 
-    return [c.strip() for c in chunks if c.strip()]
+
+def chunk_text(text: str) -> list[str]:
+    """Split text into chunks that break at sentence boundaries
+    (see ``chunk_spans``)."""
+    return [text[s:e] for s, e in chunk_spans(text)]
 
 
 # ── Attachment text extraction ───────────────────────────────────────────────
-def extract_pdf_text(content: bytes) -> str:
-    """Extract text from PDF bytes."""
+# Attachment content: raw bytes, an open binary file, or a path on disk
+AttachmentSource = Union[bytes, BinaryIO, str]
+
+# Given the SHA-256 hex digest of a downloaded attachment, text already
+# extracted from the same bytes (or None)
+KnownText = Callable[[str], Optional[str]]
+
+
+def _as_stream(source: AttachmentSource) -> Union[BinaryIO, str]:
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+def extract_pdf_text(content: AttachmentSource) -> str:
+    """Extract text from a PDF (bytes, binary file or path)."""
     try:
         from pypdf import PdfReader
-        reader = PdfReader(io.BytesIO(content))
+        reader = PdfReader(_as_stream(content))
         parts = []
         for page in reader.pages:
             t = page.extract_text()
@@ -209,50 +310,230 @@ def extract_pdf_text(content: bytes) -> str:
         return ""
 
 
-def extract_docx_text(content: bytes) -> str:
-    """Extract text from DOCX bytes."""
+def extract_docx_text(content: AttachmentSource) -> str:
+    """Extract text from a DOCX (bytes, binary file or path)."""
     try:
         from docx import Document
-        doc = Document(io.BytesIO(content))
+        doc = Document(_as_stream(content))
         return "\n".join(p.text for p in doc.paragraphs if p.text.strip())
     except Exception:
         return ""
 
 
-def download_attachment_text(url: str) -> str:
-    """Download an attachment and extract its text content."""
+def attachment_kind(url: str) -> str:
+    """"pdf", "docx", or "" for attachment types we can't parse."""
+    lower_url = url.lower()
+    if lower_url.endswith(".pdf"):
+        return "pdf"
+    if lower_url.endswith(".docx"):
+        return "docx"
+    return ""
+
+
+def extract_attachment_text(content: AttachmentSource, kind: str) -> str:
+    """Extract text from an attachment (runs in a worker process)."""
+    if kind == "pdf":
+        return extract_pdf_text(content)
+    if kind == "docx":
+        return extract_docx_text(content)
+    return ""
+
+
+def download_attachment(url: str, dest: BinaryIO, digest=None) -> bool:
+    """Stream an attachment into ``dest``, at most MAX_ATTACHMENT_BYTES.
+
+    Returns False (leaving ``dest`` partly written) if the download fails,
+    is empty, or crosses the size cap — in which case it is abandoned
+    without reading the rest of the body.  The bytes are also fed to the
+    hash object ``digest``, if given.
+    """
     try:
-        resp = requests.get(url, timeout=30, stream=True)
-        if resp.status_code != 200:
-            return ""
-        cl = resp.headers.get("Content-Length")
-        if cl and int(cl) > MAX_ATTACHMENT_BYTES:
-            return ""
-        content = resp.content
-        if len(content) > MAX_ATTACHMENT_BYTES:
-            return ""
-
-        lower_url = url.lower()
-        if lower_url.endswith(".pdf"):
-            return extract_pdf_text(content)
-        elif lower_url.endswith(".docx"):
-            return extract_docx_text(content)
-        return ""
+        resp = http_client.get(url, timeout=30, stream=True)
+        try:
+            if resp.status_code != 200:
+                return False
+            cl = resp.headers.get("Content-Length")
+            if cl and int(cl) > MAX_ATTACHMENT_BYTES:
+                return False
+            size = 0
+            for chunk in resp.iter_content(DOWNLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > MAX_ATTACHMENT_BYTES:
+                    return False
+                dest.write(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+        finally:
+            resp.close()
+        dest.seek(0)
+        return size > 0
     except Exception:
-        return ""
+        return False
+
+
+def download_attachment_text(url: str,
+                             known: Optional[KnownText] = None) -> Optional[str]:
+    """Download an attachment and extract its text content.
+
+    Returns None if the download failed (worth retrying next run) and ""
+    if the file was fetched but holds no extractable text.  ``known`` is
+    given the content digest of the download and may return text already
+    extracted from the same bytes, which is used instead of parsing again.
+    """
+    digest = new_digest() if known is not None else None
+    with tempfile.SpooledTemporaryFile(max_size=ATTACHMENT_SPOOL_BYTES) as fh:
+        if not download_attachment(url, fh, digest):
+            return None
+        if known is not None:
+            text = known(digest.hexdigest())
+            if text is not None:
+                return text
+        return extract_attachment_text(fh, attachment_kind(url))
+
+
+class AttachmentExtractor:
+    """Download attachments on threads and parse them on a process pool.
+
+    pypdf extraction is pure Python and CPU-bound, so parsing runs in
+    ``workers`` processes while the download threads keep fetching the
+    next attachments.  ``texts()`` returns results in the order the links
+    were given, whatever order they finish in.
+
+    Downloads are streamed to temporary files and workers open them by
+    path, so attachment bodies are never held in (or pickled from) memory.
+    The processes (EXTRACT_START_METHOD) are only started once an
+    attachment actually needs parsing, so a run served from the text cache
+    never starts any.
+    """
+
+    def __init__(self, workers: int = EXTRACT_WORKERS,
+                 download_threads: int = DOWNLOAD_THREADS):
+        self.workers = workers
+        self._procs: Optional[ProcessPoolExecutor] = None
+        self._procs_lock = threading.Lock()
+        self._threads = ThreadPoolExecutor(max_workers=download_threads,
+                                           thread_name_prefix="attach")
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._procs_lock:
+            if self._procs is None:
+                self._procs = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(EXTRACT_START_METHOD))
+            return self._procs
+
+    def _download_and_extract(self, url: str,
+                              known: Optional[KnownText]) -> Optional[str]:
+        kind = attachment_kind(url)
+        fh = tempfile.NamedTemporaryFile(prefix="legistar-", suffix=f".{kind}",
+                                         delete=False)
+        digest = new_digest() if known is not None else None
+        try:
+            with fh:
+                ok = download_attachment(url, fh, digest)
+            if not ok:
+                return None
+            if known is not None:
+                text = known(digest.hexdigest())
+                if text is not None:
+                    return text
+            return self._pool().submit(extract_attachment_text, fh.name, kind).result()
+        except Exception:
+            return None
+        finally:
+            try:
+                os.remove(fh.name)
+            except OSError:
+                pass
+
+    def submit(self, url: str, known: Optional[KnownText] = None) -> Future:
+        """Start downloading and parsing one attachment (see
+        ``download_attachment_text`` for ``known``)."""
+        return self._threads.submit(self._download_and_extract, url, known)
+
+    def texts(self, urls: list[str],
+              known: Optional[list[Optional[KnownText]]] = None) -> list[Optional[str]]:
+        """Extracted text for each URL, in the same order (None = failed)."""
+        known = known or [None] * len(urls)
+        futures = [self.submit(u, k) for u, k in zip(urls, known)]
+        return [f.result() for f in futures]
+
+    def close(self):
+        self._threads.shutdown(wait=True)
+        with self._procs_lock:
+            if self._procs is not None:
+                self._procs.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
 
 # ── Legistar helpers ─────────────────────────────────────────────────────────
-def fetch_matters(client: str, skip: int = 0) -> list[dict]:
-    """Fetch one page of matters from the Legistar API."""
+_pace_lock = threading.Lock()
+_next_call = 0.0
+
+
+def legistar_pause():
+    """Wait for this call's turn: Legistar API calls start at least
+    LEGISTAR_DELAY apart, whichever thread (page prefetch, attachment
+    lookups, matter workers) makes them."""
+    global _next_call
+    with _pace_lock:
+        now = time.monotonic()
+        start = max(now, _next_call)
+        _next_call = start + LEGISTAR_DELAY
+    if start > now:
+        time.sleep(start - now)
+
+
+def _order_key(modified_since: Optional[str]) -> str:
+    """Field matters are paged by: change time for an incremental sync."""
+    return "MatterLastModifiedUtc" if modified_since else "MatterIntroDate"
+
+
+def matter_cursor(matter: dict, modified_since: Optional[str] = None) -> tuple[str, int]:
+    """``(order key, MatterId)`` of a matter — where the next page starts."""
+    return matter[_order_key(modified_since)], matter["MatterId"]
+
+
+def fetch_matters(client: str, after: Optional[tuple[str, int]] = None,
+                  modified_since: Optional[str] = None,
+                  expand_attachments: bool = False) -> list[dict]:
+    """Fetch one page of matters from the Legistar API.
+
+    Pages are keyset-paginated: ``after`` is the ``matter_cursor`` of the
+    last matter of the previous page, and the page holds the matters that
+    sort after it.  Unlike ``$skip`` offsets this stays correct when a
+    matter is added or modified (and so moves) while the run is paging.
+
+    With ``modified_since`` only matters whose MatterLastModifiedUtc is
+    later are returned, oldest change first, so an incremental sync costs
+    a handful of pages instead of the whole date window.
+    ``expand_attachments`` asks for each matter's attachments inline
+    (``$expand=MatterAttachments``) — see ``page_attachments``.
+    """
+    key = _order_key(modified_since)
+    flt = (f"MatterIntroDate ge datetime'{START_DATE}'"
+           f" and MatterIntroDate lt datetime'{END_DATE}'")
+    if modified_since:
+        flt += f" and MatterLastModifiedUtc gt datetime'{modified_since}'"
+    if after is not None:
+        value, matter_id = after
+        flt += (f" and ({key} gt datetime'{value}' or "
+                f"({key} eq datetime'{value}' and MatterId gt {matter_id}))")
     url = (
         f"{LEGISTAR_BASE}/{client}/matters"
-        f"?$filter=MatterIntroDate ge datetime'{START_DATE}'"
-        f" and MatterIntroDate lt datetime'{END_DATE}'"
-        f"&$orderby=MatterIntroDate asc"
-        f"&$top={PAGE_SIZE}&$skip={skip}"
+        f"?$filter={flt}"
+        f"&$orderby={key} asc,MatterId asc"
+        f"&$top={PAGE_SIZE}"
     )
-    resp = requests.get(url, timeout=30)
+    if expand_attachments:
+        url += "&$expand=MatterAttachments"
+    legistar_pause()
+    resp = http_client.get(url, timeout=30)
     resp.raise_for_status()
     return resp.json()
 
@@ -260,8 +541,9 @@ def fetch_matters(client: str, skip: int = 0) -> list[dict]:
 def fetch_attachments(client: str, matter_id: int) -> list[dict]:
     """Fetch attachment metadata for a matter."""
     url = f"{LEGISTAR_BASE}/{client}/matters/{matter_id}/attachments"
+    legistar_pause()
     try:
-        resp = requests.get(url, timeout=15)
+        resp = http_client.get(url, timeout=15)
         resp.raise_for_status()
         data = resp.json()
         return data if isinstance(data, list) else []
@@ -269,6 +551,71 @@ def fetch_attachments(client: str, matter_id: int) -> list[dict]:
         return []
 
 
+def iter_matter_pages(client: str, after: Optional[tuple[str, int]] = None,
+                      modified_since: Optional[str] = None,
+                      expand_attachments: bool = False,
+                      ) -> Iterator[Optional[list[dict]]]:
+    """Yield each non-empty page of matters after the cursor ``after``.
+
+    Attachments are requested inline while Legistar honours
+    ``$expand=MatterAttachments``; a 400 or a page without them turns it off.
+    An unknown client (404) ends the iteration quietly; any other download
+    error is reported as a ``None`` page so the caller can stop without
+    marking the source complete.
+    """
+    expand = expand_attachments
+    while True:
+        try:
+            try:
+                page = fetch_matters(client, after=after, modified_since=modified_since,
+                                     expand_attachments=expand)
+            except requests.exceptions.HTTPError as exc:
+                if not expand or exc.response.status_code != 400:
+                    raise
+                # This instance rejects $expand — prefetch instead
+                expand = False
+                page = fetch_matters(client, after=after, modified_since=modified_since)
+        except requests.exceptions.HTTPError as exc:
+            if exc.response.status_code == 404:
+                print(f"  ⚠️  Client '{client}' not found on Legistar — skipping.")
+                return
+            raise
+        except Exception as exc:
+            print(f"  ⚠️  Error fetching page after {after}: {exc}")
+            yield None
+            return
+
+        if not page:
+            return
+        if expand and any("MatterAttachments" not in m for m in page):
+            expand = False      # $expand was silently ignored
+        yield page
+        after = matter_cursor(page[-1], modified_since)
+
+
+def page_attachments(client: str, page: list[dict],
+                     pool: ThreadPoolExecutor) -> dict[int, Future]:
+    """Attachment metadata for a whole page of matters, keyed by MatterId.
+
+    Matters fetched with ``$expand=MatterAttachments`` already carry their
+    list; the rest are looked up concurrently on ``pool`` so the matter
+    loop never waits on a per-matter API round trip (each lookup still
+    waits its turn under LEGISTAR_DELAY).  Each value is a Future
+    resolving to that matter's attachment list.
+    """
+    futures: dict[int, Future] = {}
+    for matter in page:
+        expanded = matter.get("MatterAttachments")
+        if isinstance(expanded, list):
+            done: Future = Future()
+            done.set_result(expanded)
+            futures[matter["MatterId"]] = done
+        else:
+            futures[matter["MatterId"]] = pool.submit(
+                fetch_attachments, client, matter["MatterId"])
+    return futures
+
+
 def matter_url(url_base: str, matter_id: int) -> str:
     """Build the public Legistar URL for a matter.
 
@@ -276,15 +623,26 @@ def matter_url(url_base: str, matter_id: int) -> str:
     The gateway endpoint (302 redirect) translates the API MatterId to the
     correct LegislationDetail page.  We follow the redirect to store the
     canonical direct URL so browsers don't hit session/cookie issues.
+    ``run()`` goes through a cached ``MatterUrlResolver`` instead.
     """
-    gateway = f"{url_base}/gateway.aspx?M=L&ID={matter_id}"
+    return resolve_gateway(url_base, matter_id) or gateway_url(url_base, matter_id)
+
+
+def load_sync_state(path: str = SYNC_STATE_PATH) -> dict:
+    """Per-client MatterLastModifiedUtc high-water marks from earlier syncs."""
     try:
-        resp = requests.head(gateway, allow_redirects=True, timeout=10)
-        if resp.status_code == 200 and "LegislationDetail" in resp.url:
-            return resp.url
-    except Exception:
-        pass
-    return gateway
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_sync_state(state: dict, path: str = SYNC_STATE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(state, fh, indent=2)
+    os.replace(tmp, path)
 
 
 def parse_date(raw: Optional[str]) -> str:
@@ -333,6 +691,45 @@ def build_citation(file_number: str, matter_type: str, intro_date: str,
 
 
 # ── Build records ────────────────────────────────────────────────────────────
+def attachment_texts(
+    attachments: list[dict],
+    extractor: Optional[AttachmentExtractor] = None,
+    text_cache: Optional[AttachmentTextCache] = None,
+) -> list[Optional[str]]:
+    """Text of each attachment, from the cache where possible.
+
+    Only cache misses are downloaded; successful extractions (even empty
+    ones, e.g. scanned PDFs) are cached so they aren't fetched again.
+    Attachments without a modification time are always downloaded, and
+    only parsed when their bytes differ from the cached version's.
+    """
+    texts = [text_cache.get(att) if text_cache is not None else None
+             for att in attachments]
+    missing = [i for i, t in enumerate(texts) if t is None]
+    links = [attachments[i]["MatterAttachmentHyperlink"] for i in missing]
+    digests: dict[int, str] = {}
+
+    def by_content(i: int) -> Optional[KnownText]:
+        if text_cache is None or has_version(attachments[i]):
+            return None
+
+        def known(digest: str) -> Optional[str]:
+            digests[i] = digest
+            return text_cache.get(attachments[i], digest)
+        return known
+
+    known = [by_content(i) for i in missing]
+    if extractor is not None:
+        fetched = extractor.texts(links, known)
+    else:
+        fetched = [download_attachment_text(link, k) for link, k in zip(links, known)]
+    for i, text in zip(missing, fetched):
+        texts[i] = text
+        if text is not None and text_cache is not None:
+            text_cache.put(attachments[i], text, digests.get(i))
+    return texts
+
+
 def matter_to_records(
     matter: dict,
     client: str,
@@ -340,11 +737,33 @@ def matter_to_records(
     url_base: str,
     skip_attachments: bool = False,
     verbose: bool = False,
+    extractor: Optional[AttachmentExtractor] = None,
+    text_cache: Optional[AttachmentTextCache] = None,
+    resolver: Optional[MatterUrlResolver] = None,
+    attachments: Optional[list[dict]] = None,
+    tagger: Optional[TopicTagger] = None,
+    token_chunker: Optional[TokenChunker] = None,
+    log: Optional[list[str]] = None,
 ) -> list[dict]:
     """
     Convert a single Legistar matter into one or more Pinecone records.
     Each record uses the integrated-inference schema:
-        _id, text, title, type, date, url, source, tags, summary, citation
+        _id, text, title, type, date, url, source, tags, summary, citation,
+        char_start, char_end
+    where ``char_start``/``char_end`` locate the chunk in the matter's full
+    text (its title, then each attachment's text, joined by single spaces)
+    so a source can be highlighted.
+
+    With an ``extractor`` the matter's attachments are downloaded and
+    parsed in parallel; otherwise they are handled inline, one by one.
+    Attachments already in ``text_cache`` are not downloaded at all, and a
+    ``resolver`` supplies the public URL without a per-matter HEAD request.
+    Pass the matter's ``attachments`` (see ``page_attachments``) to skip the
+    per-matter attachment lookup.  Each chunk is tagged from its own text
+    (``tagger``, default ``TAGGER``) plus the matter type.  A
+    ``token_chunker`` sizes chunks in tokens instead of characters.
+    ``verbose`` progress lines go to ``log`` when given (for a caller that
+    prints them in matter order), otherwise straight to stdout.
     """
     matter_id   = matter["MatterId"]
     file_number = matter.get("MatterFile", "") or ""
@@ -372,7 +791,8 @@ def matter_to_records(
     summary_parts.append(f"{title[:200]}")
     summary = ". ".join(summary_parts) + "."
 
-    url = matter_url(url_base, matter_id)
+    url = (resolver.url(client, url_base, matter_id) if resolver is not None
+           else matter_url(url_base, matter_id))
 
     # ── Gather text ──────────────────────────────────────────────────────
     # Start with the title as the baseline text
@@ -380,42 +800,48 @@ def matter_to_records(
 
     # Try to enrich with attachment text
     if not skip_attachments:
-        time.sleep(LEGISTAR_DELAY)
-        attachments = fetch_attachments(client, matter_id)
-        attachment_texts = []
-        for att in attachments:
-            link = att.get("MatterAttachmentHyperlink", "")
-            if not link:
-                continue
-            lower_link = link.lower()
-            if lower_link.endswith(".pdf") or lower_link.endswith(".docx"):
-                atext = download_attachment_text(link)
-                if atext and len(atext) > 50:
-                    attachment_texts.append(clean_text(atext))
-                    if verbose:
-                        print(f"      📎 {att.get('MatterAttachmentName', '?')}: "
-                              f"{len(atext)} chars extracted")
+        if attachments is None:
+            attachments = fetch_attachments(client, matter_id)
+        attachments = [
+            att for att in attachments
+            if attachment_kind(att.get("MatterAttachmentHyperlink") or "")
+        ]
+        texts = attachment_texts(attachments, extractor, text_cache)
+
+        extracted = []
+        for att, atext in zip(attachments, texts):
+            if atext and len(atext) > 50:
+                extracted.append(clean_text(atext))
+                if verbose:
+                    line = (f"      📎 {att.get('MatterAttachmentName', '?')}: "
+                            f"{len(atext)} chars extracted")
+                    if log is not None:
+                        log.append(line)
+                    else:
+                        print(line)
 
-        if attachment_texts:
-            full_text = full_text + " " + " ".join(attachment_texts)
+        if extracted:
+            full_text = full_text + " " + " ".join(extracted)
 
-    # Assign tags based on combined text
-    tags = assign_tags(full_text)
+    tagger = tagger or TAGGER
     type_lower = matter_type.lower()
-    if type_lower and type_lower not in tags:
-        tags.append(type_lower)
 
     # Chunk the text
-    chunks = chunk_text(full_text)
-    if not chunks:
+    spans = (token_chunker.spans(full_text) if token_chunker is not None
+             else chunk_spans(full_text))
+    if not spans:
         return []
 
     records = []
-    for i, chunk in enumerate(chunks):
+    for i, (start, end) in enumerate(spans):
+        chunk = full_text[start:end]
+        tags = tagger.tags(chunk)
+        if type_lower and type_lower not in tags:
+            tags.append(type_lower)
         # Title: citation for single-chunk, citation + part N for multi-chunk
         chunk_title = (
-            citation if len(chunks) == 1
-            else f"{citation} [part {i+1}/{len(chunks)}]"
+            citation if len(spans) == 1
+            else f"{citation} [part {i+1}/{len(spans)}]"
         )
         record = {
             "_id":      f"leg-{client}-{matter_id}-chunk{i}",
@@ -428,63 +854,82 @@ def matter_to_records(
             "source":   source_label,
             "tags":     tags,
             "summary":  summary,
+            "char_start": start,
+            "char_end":   end,
         }
         records.append(record)
     return records
 
 
-# ── Token-aware rate limiter ─────────────────────────────────────────────────
-class TokenRateLimiter:
-    """Rolling-window rate limiter that estimates Pinecone embedding tokens."""
-
-    def __init__(self, tpm_limit: int = PINECONE_TPM_LIMIT, window: float = 60.0):
-        self.tpm_limit = tpm_limit
-        self.window = window
-        self._log: list[tuple[float, int]] = []
-
-    def _estimate_tokens(self, records: list[dict]) -> int:
-        total_chars = sum(len(r.get("text", "")) for r in records)
-        return int(total_chars * TOKENS_PER_CHAR)
-
-    def _prune(self):
-        cutoff = time.time() - self.window
-        self._log = [(t, n) for t, n in self._log if t > cutoff]
-
-    def _tokens_used(self) -> int:
-        self._prune()
-        return sum(n for _, n in self._log)
-
-    def wait_if_needed(self, records: list[dict], verbose: bool = False):
-        est = self._estimate_tokens(records)
-        while True:
-            self._prune()
-            used = self._tokens_used()
-            if used + est <= self.tpm_limit:
-                break
-            wait = self._log[0][0] + self.window - time.time() + 0.5
-            if wait > 0:
-                if verbose:
-                    print(f"    ⏳ rate-limit: ~{used:,} tokens used, "
-                          f"sleeping {wait:.1f}s …")
-                time.sleep(wait)
-        self._log.append((time.time(), est))
+# ── Pinecone upsert ─────────────────────────────────────────────────────────
+def known_chunk_ids(index, manifest: Optional[UpsertManifest], client: str,
+                    matter_ids: Iterable[int]) -> dict[int, set[str]]:
+    """Chunk ids already stored for each of ``matter_ids``, so a re-processed
+    matter's leftovers (e.g. an amended matter that now has fewer chunks)
+    can be found.
+
+    Read from the manifest when there is one; otherwise the index is listed
+    by id prefix — one ``index.list`` for a typical page of matters rather
+    than one per matter.
+    """
+    head = f"leg-{client}-"
+    known: dict[int, set[str]] = {m: set() for m in matter_ids}
+    prefixes: list[str] = []
+    for prefix in sorted({head + str(m)[:-STALE_LIST_DIGITS] for m in known}):
+        if not prefixes or not prefix.startswith(prefixes[-1]):
+            prefixes.append(prefix)
+    for prefix in prefixes:
+        if manifest is not None:
+            ids: Iterable[str] = manifest.ids_with_prefix(PINECONE_NAMESPACE, prefix)
+        else:
+            ids = (i for page in index.list(prefix=prefix, namespace=PINECONE_NAMESPACE)
+                   for i in page)
+        for i in ids:
+            matter_id, sep, _ = i[len(head):].partition("-chunk")
+            if sep and matter_id.isdigit() and int(matter_id) in known:
+                known[int(matter_id)].add(i)
+    return known
 
 
-# ── Pinecone upsert ─────────────────────────────────────────────────────────
-def get_pinecone_index():
-    from pinecone import Pinecone
-    pc = Pinecone(api_key=PINECONE_API_KEY)
-    return pc.Index(PINECONE_INDEX)
+def delete_records(index, ids: list[str],
+                   manifest: Optional[UpsertManifest] = None):
+    """Remove stale records from the index (and the manifest)."""
+    index.delete(ids=ids, namespace=PINECONE_NAMESPACE)
+    if manifest is not None:
+        manifest.forget(PINECONE_NAMESPACE, ids)
 
 
 def upsert_batch(index, records: list[dict], limiter: TokenRateLimiter,
-                 verbose: bool = False):
-    """Upsert a batch of records, respecting the token rate limit."""
-    limiter.wait_if_needed(records, verbose=verbose)
-    index.upsert_records(
-        namespace=PINECONE_NAMESPACE,
-        records=records,
-    )
+                 verbose: bool = False,
+                 manifest: Optional[UpsertManifest] = None,
+                 batcher: Optional[UpsertBatcher] = None):
+    """Upsert a batch of records to ``index`` (any sink from sinks.py),
+    respecting the token rate limit.
+
+    A 429 tightens the limiter's budget and pauses other upserts before the
+    error propagates to the caller's retry logic.  The request's latency
+    (not counting the rate-limit wait) tunes the ``batcher``'s batch size.
+    """
+    limiter.wait_if_needed(records, verbose=verbose,
+                           tokens=getattr(records, "tokens", None))
+    started = time.monotonic()
+    try:
+        index.upsert_records(
+            namespace=PINECONE_NAMESPACE,
+            records=records,
+        )
+    except Exception as exc:
+        limited, retry_after = rate_limit_info(exc)
+        if limited:
+            limiter.throttled(retry_after, verbose=verbose)
+        elif batcher is not None:
+            batcher.observe(records, None)
+        raise
+    if batcher is not None:
+        batcher.observe(records, time.monotonic() - started)
+    limiter.succeeded()
+    if manifest is not None:
+        manifest.mark_upserted(PINECONE_NAMESPACE, records)
 
 
 # ── Main pipeline ───────────────────────────────────────────────────────────
@@ -494,33 +939,225 @@ def run(
     limit: Optional[int] = None,
     verbose: bool = False,
     skip_attachments: bool = False,
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+    manifest_path: Optional[str] = DEFAULT_MANIFEST_PATH,
+    force: bool = False,
+    resume: bool = False,
+    incremental: bool = False,
+    workers: int = EXTRACT_WORKERS,
+    attachment_cache_path: Optional[str] = DEFAULT_ATTACHMENT_CACHE_PATH,
+    matter_url_path: Optional[str] = DEFAULT_MATTER_URL_PATH,
+    lazy_urls: bool = False,
+    matter_workers: int = MATTER_WORKERS,
+    queue_depth: int = STAGE_QUEUE_DEPTH,
+    upserts_in_flight: int = UPSERTS_IN_FLIGHT,
+    tokenizer: str = DEFAULT_TOKENIZER,
+    tpm_limit: Optional[int] = None,
+    shared_budget: Optional[str] = DEFAULT_LEDGER_PATH,
+    batch_records: int = MAX_BATCH_RECORDS,
+    batch_bytes: int = MAX_BATCH_BYTES,
+    batch_tokens: int = MAX_BATCH_TOKENS,
+    sink: str = DEFAULT_SINK,
+    export_path: Optional[str] = None,
+    import_path: Optional[str] = None,
+    taxonomy: Optional[str] = None,
+    chunk_tokens: Optional[int] = None,
+    chunk_histogram: bool = False,
 ):
+    if import_path:
+        # Upsert the records of an earlier --export instead of scraping
+        import_records(
+            import_path, name="legislation", namespace=PINECONE_NAMESPACE,
+            upsert_batch=upsert_batch, api_key=PINECONE_API_KEY,
+            index_name=PINECONE_INDEX, verbose=verbose,
+            manifest_path=manifest_path, force=force, queue_depth=queue_depth,
+            upserts_in_flight=upserts_in_flight, tokenizer=tokenizer,
+            tpm_limit=tpm_limit, shared_budget=shared_budget,
+            batch_records=batch_records, batch_bytes=batch_bytes,
+            batch_tokens=batch_tokens, sink=sink,
+        )
+        return
+
+    tagger = TAGGER
+    if taxonomy:
+        try:
+            tagger = TopicTagger(load_taxonomy(taxonomy))
+        except ValueError as exc:
+            print(f"❌  {exc}")
+            sys.exit(1)
+    if chunk_tokens is not None and not 0 < chunk_tokens <= MAX_CHUNK_TOKENS:
+        print(f"❌  --chunk-tokens must be between 1 and the embedding model's "
+              f"{MAX_CHUNK_TOKENS}-token limit (MAX_CHUNK_TOKENS)")
+        sys.exit(1)
+
+    # An export streams every record to a file and upserts nothing
+    writer = None
+    if export_path:
+        try:
+            writer = RecordWriter(export_path)
+        except ValueError as exc:
+            print(f"❌  {exc}")
+            sys.exit(1)
+        dry_run = True
+
+    if cache_dir:
+        http_client.enable_cache(cache_dir)
+
+    # Attachment parsing is CPU-bound — spread it over a process pool
+    extractor = None
+    if not skip_attachments and workers > 0:
+        extractor = AttachmentExtractor(workers)
+    # Text already extracted from unchanged attachments on earlier runs
+    text_cache = None
+    if not skip_attachments and attachment_cache_path:
+        text_cache = AttachmentTextCache(attachment_cache_path)
+    # Gateway → LegislationDetail URLs, resolved a page at a time off the loop
+    resolver = MatterUrlResolver(matter_url_path, lazy=lazy_urls)
+    # Attachment metadata is fetched per page, not per matter
+    attachment_pool = None
+    if not skip_attachments:
+        attachment_pool = ThreadPoolExecutor(max_workers=ATTACHMENT_FETCH_WORKERS,
+                                             thread_name_prefix="attachments")
+
+    # Incremental sync only asks Legistar for matters changed since last time
+    # (marks and checkpoints are kept per sink — see sinks.state_path)
+    sync_path = state_path(sink, SYNC_STATE_PATH)
+    sync_state = load_sync_state(sync_path) if incremental and sync_path else {}
+    new_marks: dict[str, str] = {}
+
+    # Progress is only meaningful for runs that upsert
+    checkpoint = None
+    state: dict = {}
+    checkpoint_dir = state_path(sink, DEFAULT_CHECKPOINT_DIR)
+    if not dry_run and checkpoint_dir:
+        signature = {
+            "start": START_DATE, "end": END_DATE,
+            "sources": [s["client"] for s in SOURCES],
+            "namespace": PINECONE_NAMESPACE,
+            "modified_since": sync_state if incremental else None,
+            "paging": "keyset",
+        }
+        if chunk_tokens:
+            # Token-sized chunks reuse the chunk ids with different text
+            signature["chunk_tokens"] = chunk_tokens
+        checkpoint = Checkpoint("legislation", signature, directory=checkpoint_dir)
+        if resume:
+            state = checkpoint.load()
+        else:
+            checkpoint.clear()
+    done_sources: list[str] = list(state.get("done_sources", []))
+
     print(f"\n{'='*60}")
     print(f"  Legislation Scraper → Pinecone")
     print(f"  Date range        : {START_DATE} to {END_DATE}")
+    if incremental:
+        marks = ", ".join(f"{c} > {m}" for c, m in sync_state.items()) or "first sync"
+        print(f"  Modified since    : {marks}")
     print(f"  Sources           : {', '.join(s['label'] for s in SOURCES)}")
-    print(f"  Dry run           : {dry_run}")
+    if writer is not None:
+        print(f"  Export            : {export_path}")
+    else:
+        print(f"  Dry run           : {dry_run}")
     print(f"  Limit             : {limit or 'none (all)'}")
     print(f"  Skip attachments  : {skip_attachments}")
+    print(f"  Taxonomy          : {taxonomy or 'built-in'} ({len(tagger.taxonomy)} tags)")
+    chunk_size = (f"{chunk_tokens} tokens ({tokenizer})" if chunk_tokens
+                  else f"{CHUNK_TARGET} characters")
+    print(f"  Chunk size        : ~{chunk_size}")
+    if extractor is not None:
+        print(f"  Extract workers   : {workers}")
+    print(f"  Pipeline          : {matter_workers} matter workers, "
+          f"queue depth {queue_depth}, {upserts_in_flight} upserts in flight")
+    print(f"  HTTP cache        : {cache_dir or 'off'}")
+    if state.get("after"):
+        print(f"  Resuming after    : {state['client']} MatterId "
+              f"{state['after'][1]} ({state['after'][0]})")
     print(f"{'='*60}\n")
 
-    limiter = TokenRateLimiter()
+    try:
+        estimator = get_estimator(tokenizer)
+    except (ImportError, ValueError) as exc:
+        print(f"❌  --tokenizer {tokenizer}: {exc}")
+        sys.exit(1)
+    # Draw on the token window shared with other scraper processes
+    ledger = (SharedTokenLedger("legislation", shared_budget)
+              if shared_budget and not dry_run else None)
+    token_chunker = TokenChunker(estimator, chunk_tokens) if chunk_tokens else None
+    # Counting every chunk costs a tokenizer pass of its own: only on request
+    histogram = TokenHistogram() if chunk_histogram else None
+    limiter = TokenRateLimiter(tpm_limit, estimator=estimator, ledger=ledger)
+    batcher = UpsertBatcher(estimator, max_records=batch_records,
+                            max_bytes=batch_bytes, max_tokens=batch_tokens)
 
     if not dry_run:
-        if not PINECONE_API_KEY or not PINECONE_INDEX:
-            print("❌  Set PINECONE_API_KEY and PINECONE_INDEX_NAME in .env first.")
+        try:
+            idx = open_sink(sink, api_key=PINECONE_API_KEY, index_name=PINECONE_INDEX)
+        except ValueError as exc:
+            print(f"❌  {exc}")
             sys.exit(1)
-        idx = get_pinecone_index()
-        print(f"✅  Connected to Pinecone index '{PINECONE_INDEX}'")
-        print(f"     Token budget: {PINECONE_TPM_LIMIT:,} tokens/min "
-              f"(batch size {UPSERT_BATCH})\n")
+        print(f"✅  Connected to {idx.label}")
+        print(f"     Token budget: {limiter.tpm_limit:,} tokens/min"
+              f"{' (shared)' if ledger is not None else ''}, counted "
+              f"with {limiter.estimator.name}")
+        print(f"     Batches: {batcher.describe()}\n")
     else:
         idx = None
 
+    # Dry runs never upsert, so they neither consult nor update the manifest
+    manifest_path = state_path(sink, manifest_path)
+    manifest = (UpsertManifest(manifest_path, force=force)
+                if manifest_path and not dry_run else None)
+
     total_matters = 0
     total_records = 0
     total_skipped = 0
-    buffer: list[dict] = []
+    tracker = FlushTracker()
+    completed = True
+
+    def save_progress(unit):
+        """Record the newest unit whose records are all upserted."""
+        if checkpoint is None or unit is None:
+            return
+        if unit[0] == "source-done":
+            done_sources.append(unit[1])
+            checkpoint.save(done_sources=done_sources, client=None, after=None)
+        else:
+            client_, after_ = unit
+            checkpoint.save(client=client_, after=list(after_))
+
+    # Progress is saved from this thread and the upsert thread; keep each
+    # "which matter is done" decision and its save together
+    progress = threading.Lock()
+
+    def upsert(batch: list[dict]):
+        """Upsert stage — several batches run at once."""
+        upsert_batch(idx, batch, limiter, verbose=verbose, manifest=manifest,
+                     batcher=batcher)
+
+    def flushed(batch: list[dict]):
+        """Batches succeed in order: advance the checkpoint past finished matters."""
+        with progress:
+            if checkpoint is not None:
+                checkpoint.save(last_batch=[batch[0]["_id"], batch[-1]["_id"]])
+            save_progress(tracker.flushed(len(batch)))
+
+    def matter_finished(unit, count: int):
+        """All of a unit's new records are buffered (count may be 0)."""
+        with progress:
+            save_progress(tracker.added(unit, count))
+
+    upserter = (BackgroundUpserter(upsert, on_flushed=flushed, depth=queue_depth,
+                                   in_flight=upserts_in_flight)
+                if not dry_run else None)
+    failed_batches: list = []
+
+    def flush(final: bool = False):
+        """Hand every full batch (with ``final``, everything) to the upserter."""
+        for batch in batcher.batches(final=final):
+            upserter.submit(batch)
+            if verbose:
+                print(f"    → queued {len(batch)} records for upsert "
+                      f"(~{batch.tokens:,} tokens)")
 
     for source in SOURCES:
         client   = source["client"]
@@ -528,85 +1165,216 @@ def run(
         url_base = source["url_base"]
         print(f"\n── {label} ({client}) ──")
 
-        skip = 0
-        source_matters = 0
-
-        while True:
-            if limit and total_matters >= limit:
-                break
+        if client in done_sources:
+            print("  ✅  Already completed by the previous run — skipping.")
+            continue
 
-            try:
-                page = fetch_matters(client, skip=skip)
-            except requests.exceptions.HTTPError as exc:
-                if exc.response.status_code == 404:
-                    print(f"  ⚠️  Client '{client}' not found on Legistar — skipping.")
+        after = None
+        if state.get("client") == client and state.get("after"):
+            after = tuple(state["after"])
+        # The interrupted run may have upserted part of the next matter
+        resume_partial = after is not None
+        source_matters = 0
+        since = sync_state.get(client)
+        newest = since
+        if limit and total_matters >= limit:
+            completed = False
+            break
+
+        # The next page downloads while this one is processed
+        pages = prefetch(iter_matter_pages(client, after, since,
+                                           expand_attachments=not skip_attachments),
+                         depth=PAGE_PREFETCH)
+        try:
+            for page in pages:
+                if page is None:
+                    completed = False   # keep the checkpoint for --resume
                     break
-                raise
-            except Exception as exc:
-                print(f"  ⚠️  Error fetching page at skip={skip}: {exc}")
-                break
 
-            if not page:
-                break
+                # Resolve this page's public URLs while its matters are processed
+                wanted = page[:limit - total_matters] if limit else page
+                resolver.prefetch(client, url_base, [m["MatterId"] for m in wanted])
+
+                # What each matter already has in the index, for the whole page
+                known_ids: dict[int, set[str]] = {}
+                if not dry_run and (manifest is not None or incremental):
+                    known_ids = known_chunk_ids(idx, manifest, client,
+                                                [m["MatterId"] for m in wanted])
+
+                # One bulk lookup of attachment metadata for the whole page
+                attachments_by_id: dict[int, Future] = {}
+                if attachment_pool is not None:
+                    attachments_by_id = page_attachments(client, wanted, attachment_pool)
+
+                def convert(matter: dict) -> tuple[list[dict], list[str]]:
+                    """Extract/chunk stage for one matter: its records, and
+                    the progress lines to print once its turn comes."""
+                    log: list[str] = []
+                    records = matter_to_records(
+                        matter, client, label, url_base,
+                        skip_attachments=skip_attachments,
+                        verbose=verbose,
+                        extractor=extractor,
+                        text_cache=text_cache,
+                        resolver=resolver,
+                        attachments=(attachments_by_id[matter["MatterId"]].result()
+                                     if attachments_by_id else None),
+                        tagger=tagger,
+                        token_chunker=token_chunker,
+                        log=log,
+                    )
+                    return records, log
+
+                converted = ordered_map(convert, wanted, workers=matter_workers,
+                                        ahead=max(queue_depth, matter_workers),
+                                        name="matter")
+                for matter, (records, log) in converted:
+                    total_matters += 1
+                    source_matters += 1
+                    matter_file = matter.get("MatterFile", "?")
+                    modified = matter.get("MatterLastModifiedUtc")
+                    if modified and (newest is None or modified > newest):
+                        newest = modified
 
-            for matter in page:
+                    if verbose:
+                        print(f"  [{total_matters}] {matter_file}: "
+                              f"{(matter.get('MatterTitle') or '')[:60]}...")
+                        for line in log:
+                            print(line)
+
+                    unit = (client, matter_cursor(matter, since))
+
+                    # An amended matter may now produce fewer chunks — drop the
+                    # leftovers so stale text stops matching queries
+                    if known_ids:
+                        keep = {r["_id"] for r in records}
+                        stale = sorted(known_ids[matter["MatterId"]] - keep)
+                        if stale:
+                            delete_records(idx, stale, manifest)
+                            if verbose:
+                                print(f"    🗑  removed {len(stale)} stale chunks")
+                    if resume_partial:
+                        # The interrupted run may have upserted part of this matter
+                        resume_partial = False
+                        records = list(skip_flushed(
+                            records, checkpoint.last_flushed_id,
+                            f"leg-{client}-{matter['MatterId']}-"))
+                    if not records:
+                        total_skipped += 1
+                        if not dry_run:
+                            matter_finished(unit, 0)
+                        continue
+
+                    total_records += len(records)
+                    counts = None
+                    if histogram is not None:
+                        counts = estimator.count_batch([r["text"] for r in records])
+                        histogram.add(counts)
+
+                    if writer is not None:
+                        writer.write(records)
+                    elif dry_run:
+                        for r in records[:3]:  # first 3 chunks in dry-run
+                            print(json.dumps(r, indent=2))
+                        if len(records) > 3:
+                            print(f"    ... ({len(records) - 3} more chunks)")
+                    else:
+                        if manifest is not None:
+                            changed = [manifest.is_changed(PINECONE_NAMESPACE, r)
+                                       for r in records]
+                            records = [r for r, c in zip(records, changed) if c]
+                            if counts is not None:
+                                counts = [n for n, c in zip(counts, changed) if c]
+                        batcher.add(records, counts)
+                        matter_finished(unit, len(records))
+                        flush()
+
+                # Progress update
+                if not verbose:
+                    print(f"  Processed {source_matters} matters "
+                          f"({total_records} records)...", end="\r")
                 if limit and total_matters >= limit:
+                    completed = False
                     break
-
-                total_matters += 1
-                source_matters += 1
-                matter_file = matter.get("MatterFile", "?")
-
-                if verbose:
-                    print(f"  [{total_matters}] {matter_file}: "
-                          f"{(matter.get('MatterTitle') or '')[:60]}...")
-
-                records = matter_to_records(
-                    matter, client, label, url_base,
-                    skip_attachments=skip_attachments,
-                    verbose=verbose,
-                )
-                if not records:
-                    total_skipped += 1
-                    continue
-
-                total_records += len(records)
-
-                if dry_run:
-                    for r in records[:3]:  # first 3 chunks in dry-run
-                        print(json.dumps(r, indent=2))
-                    if len(records) > 3:
-                        print(f"    ... ({len(records) - 3} more chunks)")
-                else:
-                    buffer.extend(records)
-                    while len(buffer) >= UPSERT_BATCH:
-                        batch = buffer[:UPSERT_BATCH]
-                        buffer = buffer[UPSERT_BATCH:]
-                        upsert_batch(idx, batch, limiter, verbose=verbose)
-                        if verbose:
-                            print(f"    → upserted {len(batch)} records")
-
-            # Progress update
-            if not verbose:
-                print(f"  Processed {source_matters} matters "
-                      f"({total_records} records)...", end="\r")
-
-            skip += PAGE_SIZE
-            time.sleep(LEGISTAR_DELAY)
+        finally:
+            pages.close()
 
         print(f"\n  ✅  {label}: {source_matters} matters processed")
+        if completed and not dry_run:
+            matter_finished(("source-done", client), 0)
+            if incremental and newest:
+                new_marks[client] = newest
 
-    # Flush remaining buffer
-    if buffer and not dry_run:
-        upsert_batch(idx, buffer, limiter, verbose=verbose)
-        if verbose:
-            print(f"    → upserted final {len(buffer)} records")
+    # Only a finished export appears under its real name
+    if writer is not None:
+        writer.close()
+
+    # Flush the remaining records and wait for the upsert threads to drain
+    if not dry_run:
+        flush(final=True)
+        failed_batches = upserter.close()
+        if failed_batches:
+            completed = False   # keep the checkpoint so --resume retries them
+            new_marks.clear()   # and don't skip past them on --incremental
+        idx.close()
+
+    if extractor is not None:
+        extractor.close()
+    if text_cache is not None:
+        text_cache.close()
+    resolver.close()
+    if attachment_pool is not None:
+        attachment_pool.shutdown(wait=True, cancel_futures=True)
+
+    # A run that got through every source leaves nothing to resume
+    if checkpoint is not None and completed:
+        checkpoint.clear()
+
+    # Advance the high-water marks only once everything is upserted
+    if new_marks and sync_path:
+        sync_state.update(new_marks)
+        save_sync_state(sync_state, sync_path)
 
     print(f"\n{'='*60}")
     print(f"  DONE")
     print(f"  Total matters fetched  : {total_matters}")
     print(f"  Total records created  : {total_records}")
+    if writer is not None:
+        print(f"  Exported               : {writer.count:,} records → {export_path} "
+              f"({writer.size() / 1e6:,.1f} MB)")
     print(f"  Matters skipped (empty): {total_skipped}")
+    if histogram is not None:
+        print(f"  Chunk tokens           : {histogram.summary()}")
+        for line in histogram.lines():
+            print(f"     {line}")
+    if manifest is not None:
+        print(f"  Records unchanged      : {manifest.skipped}")
+        print(f"  Records upserted       : {manifest.changed}")
+    if failed_batches:
+        print(f"  ⚠️  Failed batches      : {len(failed_batches)} "
+              f"({sum(len(b) for b, _ in failed_batches)} records) — "
+              f"last error: {failed_batches[-1][1]}")
+        print(f"     Re-run with --resume to retry them.")
+    cache = http_client.get_cache()
+    if cache is not None:
+        print(f"  HTTP cache             : {cache.hits} revalidated, {cache.misses} downloaded")
+    if not dry_run:
+        print(f"  Embedding tokens       : ~{limiter.tokens:,} ({limiter.throttles} × 429, "
+              f"budget {limiter.tpm_limit:,}/min)")
+        print(f"  Upsert batches         : {batcher.summary()}")
+        if idx.summary():
+            print(f"  Sink                   : {idx.summary()}")
+    if ledger is not None:
+        shared = ledger.metrics()
+        ledger.close()
+        print(f"  Shared budget          : {shared['waits']} waits for other scrapers "
+              f"({shared['wait_seconds']:,.1f}s)")
+    if text_cache is not None:
+        print(f"  Attachment text cache  : {text_cache.hits} reused, "
+              f"{text_cache.misses} extracted")
+    print(f"  Matter URLs            : {resolver.hits} cached, "
+          f"{resolver.resolved} resolved"
+          + (" (lazy — gateway URLs kept)" if lazy_urls else ""))
     print(f"{'='*60}\n")
 
 
@@ -631,12 +1399,167 @@ def main():
         "--skip-attachments", action="store_true",
         help="Don't download attachment PDFs/DOCX — use title text only (faster)",
     )
+    parser.add_argument(
+        "--taxonomy", metavar="PATH", default=None,
+        help="JSON file mapping each topic tag to its keywords "
+             "(default: the built-in TAG_KEYWORDS)",
+    )
+    parser.add_argument(
+        "--chunk-tokens", type=int, nargs="?", const=DEFAULT_CHUNK_TOKENS,
+        default=None, metavar="N",
+        help="Size chunks in embedding tokens (counted with --tokenizer) "
+             f"instead of characters; N defaults to {DEFAULT_CHUNK_TOKENS} and "
+             f"may be at most {MAX_CHUNK_TOKENS}",
+    )
+    parser.add_argument(
+        "--chunk-histogram", action="store_true",
+        help="Count every chunk's tokens (with --tokenizer) and print their "
+             "distribution at the end",
+    )
+    parser.add_argument(
+        "--cache-dir", default=DEFAULT_CACHE_DIR,
+        help="On-disk HTTP cache; unchanged responses are revalidated with "
+             "ETag/Last-Modified and read from here (default: .cache/http)",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Bypass the HTTP, attachment-text and matter-URL caches and "
+             "download everything",
+    )
+    parser.add_argument(
+        "--url-cache", default=DEFAULT_MATTER_URL_PATH,
+        help="SQLite cache of resolved LegislationDetail URLs by "
+             "(client, MatterId) (default: .cache/matter_urls.sqlite)",
+    )
+    parser.add_argument(
+        "--lazy-urls", action="store_true",
+        help="Don't follow gateway redirects; store the gateway URL for any "
+             "matter not already in the URL cache",
+    )
+    parser.add_argument(
+        "--attachment-cache", default=DEFAULT_ATTACHMENT_CACHE_PATH,
+        help="SQLite cache of text extracted from attachments, keyed by "
+             "attachment GUID and last-modified time "
+             "(default: .cache/attachments.sqlite)",
+    )
+    parser.add_argument(
+        "--manifest", default=DEFAULT_MANIFEST_PATH,
+        help="SQLite manifest of upserted record hashes; unchanged records "
+             "are skipped (default: .cache/manifest.sqlite)",
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Re-upsert every record even if the manifest says it is unchanged",
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Continue after the last matter a previous (interrupted) run "
+             "fully upserted",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Only process matters modified since the last incremental sync "
+             "(MatterLastModifiedUtc high-water mark)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=EXTRACT_WORKERS,
+        help="Processes for PDF/DOCX text extraction; 0 parses inline "
+             f"(default: {EXTRACT_WORKERS}, the CPU count)",
+    )
+    parser.add_argument(
+        "--matter-workers", type=int, default=MATTER_WORKERS,
+        help="Matters converted to records concurrently (attachments, "
+             f"URLs, chunking) (default: {MATTER_WORKERS})",
+    )
+    parser.add_argument(
+        "--queue-depth", type=int, default=STAGE_QUEUE_DEPTH,
+        help="Upsert batches allowed to wait for a free upsert slot before "
+             f"the scraper blocks (default: {STAGE_QUEUE_DEPTH})",
+    )
+    parser.add_argument(
+        "--upserts-in-flight", type=int, default=UPSERTS_IN_FLIGHT,
+        help="Pinecone upsert requests sent concurrently, all drawing on the "
+             f"same token budget (default: {UPSERTS_IN_FLIGHT})",
+    )
+    parser.add_argument(
+        "--tokenizer", default=DEFAULT_TOKENIZER,
+        help="How embedding tokens are counted for the rate limit: chars[:ratio], "
+             "tiktoken:<encoding> or hf:<model or tokenizer.json> (default: "
+             f"{DEFAULT_TOKENIZER})",
+    )
+    parser.add_argument(
+        "--tpm-limit", type=int, default=None,
+        help="Embedding tokens per minute to stay under (default: 200k with "
+             "the chars estimate, 240k with a real tokenizer)",
+    )
+    parser.add_argument(
+        "--shared-budget", default=DEFAULT_LEDGER_PATH,
+        help="SQLite ledger holding the token budget shared by all scraper "
+             "processes on this host (default: .cache/token-ledger.sqlite)",
+    )
+    parser.add_argument(
+        "--no-shared-budget", action="store_true",
+        help="Use a private token budget (only safe if no other scraper runs)",
+    )
+    parser.add_argument(
+        "--batch-records", type=int, default=MAX_BATCH_RECORDS,
+        help="Most records per upsert request; the batch size adapts to "
+             f"Pinecone's latency below this (default: {MAX_BATCH_RECORDS})",
+    )
+    parser.add_argument(
+        "--batch-bytes", type=int, default=MAX_BATCH_BYTES,
+        help=f"Most payload bytes per upsert request (default: {MAX_BATCH_BYTES:,})",
+    )
+    parser.add_argument(
+        "--batch-tokens", type=int, default=MAX_BATCH_TOKENS,
+        help="Most estimated embedding tokens per upsert request "
+             f"(default: {MAX_BATCH_TOKENS:,})",
+    )
+    parser.add_argument(
+        "--sink", default=DEFAULT_SINK,
+        help="Where records go: pinecone, local[:DIR] (on-disk vectors with a "
+             "local embedder) or mock[:latency=…,tpm=…] (in-process Pinecone "
+             f"stand-in) (default: {DEFAULT_SINK})",
+    )
+    parser.add_argument(
+        "--export", metavar="PATH", dest="export_path",
+        help="Write every record to PATH instead of upserting: .ndjson/.jsonl, "
+             "optionally .gz or .zst compressed, or .parquet",
+    )
+    parser.add_argument(
+        "--import", metavar="PATH", dest="import_path",
+        help="Upsert the records of an --export file instead of scraping",
+    )
     args = parser.parse_args()
     run(
         dry_run=args.dry_run,
         limit=args.limit,
         verbose=args.verbose,
         skip_attachments=args.skip_attachments,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        manifest_path=args.manifest,
+        force=args.force,
+        resume=args.resume,
+        incremental=args.incremental,
+        workers=args.workers,
+        attachment_cache_path=None if args.no_cache else args.attachment_cache,
+        matter_url_path=None if args.no_cache else args.url_cache,
+        lazy_urls=args.lazy_urls,
+        matter_workers=args.matter_workers,
+        queue_depth=args.queue_depth,
+        upserts_in_flight=args.upserts_in_flight,
+        tokenizer=args.tokenizer,
+        tpm_limit=args.tpm_limit,
+        shared_budget=None if args.no_shared_budget else args.shared_budget,
+        batch_records=args.batch_records,
+        batch_bytes=args.batch_bytes,
+        batch_tokens=args.batch_tokens,
+        sink=args.sink,
+        export_path=args.export_path,
+        import_path=args.import_path,
+        taxonomy=args.taxonomy,
+        chunk_tokens=args.chunk_tokens,
+        chunk_histogram=args.chunk_histogram,
     )
 
 
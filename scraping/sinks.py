@@ -0,0 +1,449 @@
+"""
+sinks.py
+========
+Where the scrapers' records go.
+
+Both scrapers only ever call three methods on the Pinecone index —
+``upsert_records``, ``list`` and ``delete`` — so any object with those can
+stand in for it.  Three sinks implement them:
+
+    pinecone                  the real index (PINECONE_API_KEY / _INDEX_NAME)
+    local[:DIR]               on-disk store: vectors in a NumPy memmap per
+                              namespace, ids and metadata in SQLite, embedded
+                              by a deterministic feature-hashing embedder
+                              (default DIR: .cache/vectors)
+    mock[:key=value,…]        in-process Pinecone imitation with realistic
+                              latency and 429s once its tokens/min run out;
+                              options latency, per_record, tpm, fail, seed
+
+``local`` and ``mock`` need no network or Pinecone account, so the whole
+pipeline can be benchmarked, load-tested and run in CI.  NumPy is needed by
+``local`` only and is imported on first use.  Select a sink with ``--sink``
+or the ``VECTOR_SINK`` env variable; query a local store with
+
+    python sinks.py .cache/vectors "zoning variance appeal"
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from typing import Iterable, Iterator, Optional
+
+# ── Configuration ────────────────────────────────────────────────────────────
+DEFAULT_SINK = os.environ.get("VECTOR_SINK", "pinecone")
+
+DEFAULT_LOCAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  ".cache", "vectors")
+
+# Local store: embedding width and rows added whenever a namespace's memmap
+# runs out of room (it grows by at least this, or doubles)
+LOCAL_EMBED_DIM = 256
+LOCAL_GROW_ROWS = 1024
+
+# Mock sink: upsert latency = MOCK_LATENCY + MOCK_PER_RECORD × records
+# (±20 % jitter), and Pinecone's free-tier embedding limit
+MOCK_LATENCY    = 0.15
+MOCK_PER_RECORD = 0.002
+MOCK_TPM_LIMIT  = 250_000
+MOCK_CHARS_PER_TOKEN = 4.0   # how the "server" counts tokens
+
+# Ids per page returned by ``list``, as in the Pinecone SDK
+LIST_PAGE_SIZE = 100
+
+_WORD = re.compile(r"\w+")
+
+
+# ── Pinecone ────────────────────────────────────────────────────────────────
+class PineconeSink:
+    """The Pinecone index itself, with integrated inference."""
+
+    def __init__(self, api_key: str, index_name: str):
+        if not api_key or not index_name:
+            raise ValueError("Set PINECONE_API_KEY and PINECONE_INDEX_NAME in .env first.")
+        from pinecone import Pinecone
+        self._index = Pinecone(api_key=api_key).Index(index_name)
+        self.label = f"Pinecone index '{index_name}'"
+
+    def upsert_records(self, namespace: str, records: list[dict]):
+        self._index.upsert_records(namespace=namespace, records=records)
+
+    def list(self, prefix: str, namespace: str) -> Iterator[list[str]]:
+        return self._index.list(prefix=prefix, namespace=namespace)
+
+    def delete(self, ids: Iterable[str], namespace: str):
+        self._index.delete(ids=ids, namespace=namespace)
+
+    def summary(self) -> Optional[str]:
+        return None
+
+    def close(self):
+        pass
+
+
+# ── Local store ─────────────────────────────────────────────────────────────
+class HashingEmbedder:
+    """Deterministic bag-of-words embedder (signed feature hashing).
+
+    Words and word pairs are hashed with BLAKE2 (not Python's salted
+    ``hash``) into ``dim`` buckets, so the same text gets the same unit
+    vector in every process and on every machine.
+    """
+
+    def __init__(self, dim: int = LOCAL_EMBED_DIM):
+        import numpy as np
+        self._np = np
+        self.dim = dim
+        self.name = f"{dim}-d hashing embedder"
+
+    def _features(self, text: str) -> list[str]:
+        words = _WORD.findall(text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed_batch(self, texts: list[str]):
+        np = self._np
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"),
+                                                   digest_size=8).digest(), "little")
+                out[row, h % self.dim] += 1.0 if h >> 63 else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+
+_LOCAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    namespace TEXT NOT NULL,
+    id        TEXT NOT NULL,
+    row       INTEGER NOT NULL,
+    metadata  TEXT NOT NULL,
+    PRIMARY KEY (namespace, id)
+);
+CREATE TABLE IF NOT EXISTS free_rows (
+    namespace TEXT NOT NULL,
+    row       INTEGER NOT NULL,
+    PRIMARY KEY (namespace, row)
+);
+CREATE TABLE IF NOT EXISTS namespaces (
+    namespace TEXT PRIMARY KEY,
+    rows      INTEGER NOT NULL       -- rows handed out so far (high-water)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class LocalVectorSink:
+    """Vectors on disk: one float32 memmap per namespace, rows indexed in
+    SQLite (``index.sqlite``) together with each record's fields.
+
+    Row slots of deleted records are reused.  Thread-safe.
+    """
+
+    def __init__(self, path: str = DEFAULT_LOCAL_PATH, dim: int = LOCAL_EMBED_DIM):
+        try:
+            import numpy as np
+        except ImportError:
+            raise ValueError("The local sink needs NumPy (pip install numpy).")
+        self._np = np
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(path, "index.sqlite"),
+                                   check_same_thread=False)
+        self._db.executescript(_LOCAL_SCHEMA)
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        if row:
+            dim = int(row[0])   # an existing store keeps its width
+        else:
+            self._db.execute("INSERT INTO meta VALUES ('dim', ?)", (str(dim),))
+            self._db.commit()
+        self.embedder = HashingEmbedder(dim)
+        self.label = f"local store {path} ({self.embedder.name})"
+        self.upserted = 0
+        self._vectors: dict = {}    # namespace → memmap
+        self._lock = threading.Lock()
+
+    def _file(self, namespace: str) -> str:
+        safe = re.sub(r"[^\w.-]", "_", namespace) or "_default"
+        return os.path.join(self.path, f"{safe}.f32")
+
+    def _matrix(self, namespace: str, rows: int = 0):
+        """The namespace's memmap, grown to hold at least ``rows`` rows."""
+        np = self._np
+        dim = self.embedder.dim
+        mm = self._vectors.get(namespace)
+        if mm is not None and mm.shape[0] >= rows:
+            return mm
+        file = self._file(namespace)
+        have = os.path.getsize(file) // (4 * dim) if os.path.exists(file) else 0
+        if have < rows:
+            have = max(rows, have * 2, LOCAL_GROW_ROWS)
+            if mm is not None:
+                mm.flush()
+            with open(file, "ab") as f:
+                f.truncate(have * 4 * dim)
+        if have == 0:
+            return None
+        mm = np.memmap(file, dtype=np.float32, mode="r+", shape=(have, dim))
+        self._vectors[namespace] = mm
+        return mm
+
+    def _allocate(self, namespace: str, count: int) -> list[int]:
+        db = self._db
+        free = [r for r, in db.execute(
+            "SELECT row FROM free_rows WHERE namespace = ? ORDER BY row LIMIT ?",
+            (namespace, count))]
+        db.executemany("DELETE FROM free_rows WHERE namespace = ? AND row = ?",
+                       [(namespace, r) for r in free])
+        need = count - len(free)
+        if need:
+            row = db.execute("SELECT rows FROM namespaces WHERE namespace = ?",
+                             (namespace,)).fetchone()
+            start = row[0] if row else 0
+            db.execute("INSERT OR REPLACE INTO namespaces VALUES (?, ?)",
+                       (namespace, start + need))
+            free += range(start, start + need)
+        return free
+
+    def upsert_records(self, namespace: str, records: list[dict]):
+        # An id repeated within the batch gets one row; the last copy wins
+        records = list({r["_id"]: r for r in records}.values())
+        vectors = self.embedder.embed_batch([r.get("text", "") for r in records])
+        with self._lock:
+            db = self._db
+            existing = {}
+            for r in records:
+                hit = db.execute("SELECT row FROM records WHERE namespace = ? AND id = ?",
+                                 (namespace, r["_id"])).fetchone()
+                if hit:
+                    existing[r["_id"]] = hit[0]
+            new_ids = [r["_id"] for r in records if r["_id"] not in existing]
+            existing.update(zip(new_ids, self._allocate(namespace, len(new_ids))))
+            rows = [existing[r["_id"]] for r in records]
+            mm = self._matrix(namespace, max(rows) + 1)
+            mm[rows] = vectors
+            mm.flush()
+            db.executemany(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)",
+                [(namespace, r["_id"], row,
+                  json.dumps({k: v for k, v in r.items() if k != "_id"},
+                             ensure_ascii=False))
+                 for r, row in zip(records, rows)])
+            db.commit()
+            self.upserted += len(records)
+
+    def query(self, text: str, namespace: str,
+              top_k: int = 5) -> list[tuple[str, float, dict]]:
+        """Nearest records to ``text`` by cosine similarity."""
+        np = self._np
+        q = self.embedder.embed_batch([text])[0]
+        with self._lock:
+            live = self._db.execute(
+                "SELECT row, id, metadata FROM records WHERE namespace = ?",
+                (namespace,)).fetchall()
+            mm = self._matrix(namespace)
+            if not live or mm is None:
+                return []
+            rows = np.array([r for r, _, _ in live])
+            scores = mm[rows] @ q
+        best = np.argsort(-scores)[:top_k]
+        return [(live[i][1], float(scores[i]), json.loads(live[i][2])) for i in best]
+
+    def list(self, prefix: str, namespace: str) -> Iterator[list[str]]:
+        with self._lock:
+            ids = [i for i, in self._db.execute(
+                "SELECT id FROM records WHERE namespace = ? AND substr(id, 1, ?) = ? "
+                "ORDER BY id", (namespace, len(prefix), prefix))]
+        for start in range(0, len(ids), LIST_PAGE_SIZE):
+            yield ids[start:start + LIST_PAGE_SIZE]
+
+    def delete(self, ids: Iterable[str], namespace: str):
+        ids = list(ids)
+        with self._lock:
+            db = self._db
+            rows = []
+            for i in ids:
+                hit = db.execute("SELECT row FROM records WHERE namespace = ? AND id = ?",
+                                 (namespace, i)).fetchone()
+                if hit:
+                    rows.append(hit[0])
+            db.executemany("DELETE FROM records WHERE namespace = ? AND id = ?",
+                           [(namespace, i) for i in ids])
+            db.executemany("INSERT OR IGNORE INTO free_rows VALUES (?, ?)",
+                           [(namespace, r) for r in rows])
+            db.commit()
+            mm = self._matrix(namespace)
+            if mm is not None and rows:
+                mm[rows] = 0.0
+                mm.flush()
+
+    def summary(self) -> Optional[str]:
+        return f"{self.upserted:,} records written to {self.path}"
+
+    def close(self):
+        with self._lock:
+            for mm in self._vectors.values():
+                mm.flush()
+            self._vectors.clear()
+            self._db.close()
+
+
+# ── Mock Pinecone ───────────────────────────────────────────────────────────
+class MockRateLimitError(Exception):
+    """What the Pinecone SDK raises on a 429 (``.status`` and ``.headers``)."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"(429) Too Many Requests — retry after {retry_after:.0f}s")
+        self.status = 429
+        self.headers = {"Retry-After": str(int(retry_after + 0.999))}
+
+
+class MockServerError(Exception):
+    def __init__(self):
+        super().__init__("(503) Service Unavailable")
+        self.status = 503
+        self.headers = {}
+
+
+class MockSink:
+    """In-process stand-in for a Pinecone index.
+
+    Each upsert sleeps for a latency that grows with the batch, is charged
+    against a rolling one-minute token window counted the way the server
+    would (not with the client's estimate), and fails with a 429 carrying
+    ``Retry-After`` once the window is full.  ``fail`` is the fraction of
+    requests that fail with a 503.  Ids are kept in memory only.
+    """
+
+    def __init__(self, latency: float = MOCK_LATENCY,
+                 per_record: float = MOCK_PER_RECORD,
+                 tpm: int = MOCK_TPM_LIMIT, fail: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.per_record = per_record
+        self.tpm = tpm
+        self.fail = fail
+        self.label = (f"mock Pinecone ({latency * 1000:.0f} ms + "
+                      f"{per_record * 1000:g} ms/record, {tpm:,} tokens/min)")
+        self.requests = 0
+        self.records = 0
+        self.tokens = 0
+        self.throttled = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._ids: dict[str, set[str]] = {}
+        self._window: deque = deque()    # (time, tokens)
+        self._used = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def upsert_records(self, namespace: str, records: list[dict]):
+        tokens = sum(int(len(r.get("text", "")) / MOCK_CHARS_PER_TOKEN) + 1
+                     for r in records)
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            while self._window and self._window[0][0] <= now - 60:
+                self._used -= self._window.popleft()[1]
+            if self._window and self._used + tokens > self.tpm:
+                self.throttled += 1
+                raise MockRateLimitError(self._window[0][0] + 60 - now)
+            failing = self._random.random() < self.fail
+            jitter = self._random.uniform(0.8, 1.2)
+            if not failing:
+                self._window.append((now, tokens))
+                self._used += tokens
+        delay = (self.latency + self.per_record * len(records)) * jitter
+        time.sleep(delay)
+        with self._lock:
+            self.busy_seconds += delay
+            if failing:
+                self.failed += 1
+                raise MockServerError()
+            self._ids.setdefault(namespace, set()).update(r["_id"] for r in records)
+            self.records += len(records)
+            self.tokens += tokens
+
+    def list(self, prefix: str, namespace: str) -> Iterator[list[str]]:
+        with self._lock:
+            ids = sorted(i for i in self._ids.get(namespace, ()) if i.startswith(prefix))
+        for start in range(0, len(ids), LIST_PAGE_SIZE):
+            yield ids[start:start + LIST_PAGE_SIZE]
+
+    def delete(self, ids: Iterable[str], namespace: str):
+        with self._lock:
+            self._ids.get(namespace, set()).difference_update(ids)
+
+    def summary(self) -> Optional[str]:
+        return (f"{self.requests} requests, {self.records:,} records, "
+                f"{self.tokens:,} tokens, {self.throttled} × 429, "
+                f"{self.failed} × 503, {self.busy_seconds:,.1f}s busy")
+
+    def close(self):
+        pass
+
+
+def state_path(spec: str, default: Optional[str]) -> Optional[str]:
+    """Where bookkeeping about a sink's contents (upsert manifest, sync marks,
+    checkpoints) lives, given where it lives for Pinecone.
+
+    A local store keeps its own next to its vectors, so it never convinces
+    a later Pinecone run that records are already there; the mock keeps
+    none (None), as nothing it holds outlives the process.
+    """
+    kind, _, arg = spec.partition(":")
+    if not default or kind == "pinecone":
+        return default
+    if kind == "local":
+        return os.path.join(arg or DEFAULT_LOCAL_PATH, os.path.basename(default))
+    return None
+
+
+def _options(arg: str) -> dict:
+    opts = {}
+    for item in filter(None, arg.split(",")):
+        key, _, value = item.partition("=")
+        opts[key.strip()] = value.strip()
+    return opts
+
+
+def open_sink(spec: str = DEFAULT_SINK, api_key: str = "", index_name: str = ""):
+    """Build a sink from a spec such as ``pinecone``, ``local:/data/vectors``
+    or ``mock:latency=0.3,tpm=50000``.  Raises ValueError when it can't."""
+    kind, _, arg = spec.partition(":")
+    if kind == "pinecone":
+        return PineconeSink(api_key, index_name)
+    if kind == "local":
+        return LocalVectorSink(arg or DEFAULT_LOCAL_PATH)
+    if kind == "mock":
+        opts = _options(arg)
+        unknown = set(opts) - {"latency", "per_record", "tpm", "fail", "seed"}
+        if unknown:
+            raise ValueError(f"unknown mock sink option(s): {', '.join(sorted(unknown))}")
+        return MockSink(latency=float(opts.get("latency", MOCK_LATENCY)),
+                        per_record=float(opts.get("per_record", MOCK_PER_RECORD)),
+                        tpm=int(opts.get("tpm", MOCK_TPM_LIMIT)),
+                        fail=float(opts.get("fail", 0.0)),
+                        seed=int(opts.get("seed", 0)))
+    raise ValueError(f"unknown sink {spec!r} (use pinecone, local[:DIR], mock[:opts])")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("usage: python sinks.py DIR QUERY [NAMESPACE]")
+        sys.exit(2)
+    store = LocalVectorSink(sys.argv[1])
+    namespace = sys.argv[3] if len(sys.argv) > 3 else os.environ.get(
+        "PINECONE_NAMESPACE", "legislation")
+    for rid, score, fields in store.query(sys.argv[2], namespace):
+        print(f"  {score:.3f}  {rid}  {fields.get('text', '')[:80]!r}")
+    store.close()
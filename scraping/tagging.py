@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+tagging.py
+==========
+Topic tags from a keyword taxonomy.
+
+A taxonomy maps each tag to its keywords::
+
+    {"criminal": ["crime", "offense", "felony"], "housing": ["tenant", "rent"]}
+
+``TopicTagger`` compiles every form of every keyword into one regex — an
+alternation factored into a trie, so the engine reads each letter of the
+text once instead of once per keyword — and maps each distinct match back
+to its tags.  Tagging a chunk is a single ``findall`` whatever the size of
+the taxonomy, cheap enough to tag every chunk on its own rather than
+giving each chunk of a title the tags of its first few pages.
+
+Keywords match whole words only ("rent" doesn't tag "current", "bus"
+doesn't tag "business"), case-insensitively, in the singular or plural:
+"offense" also matches "offenses", "penalty" "penalties", and "child"
+"children" (see IRREGULAR_PLURALS).  A multi-word keyword ("real estate")
+matches its words separated by spaces or punctuation, the last one in
+either number.  A keyword made of other keywords ("water supply" and
+"water") counts for the tags of each.  A multi-word keyword that can start
+inside another one and run past its end ("estate tax" after "real estate")
+can't share the regex's non-overlapping scan and gets a search of its own.
+
+Taxonomies can be loaded from a JSON file of the same shape (``--taxonomy``
+on both scrapers).  To try one against a document:
+
+    python tagging.py taxonomy.json document.txt
+"""
+
+import json
+import re
+import sys
+from collections import Counter
+from typing import Iterable
+
+# ── Configuration ────────────────────────────────────────────────────────────
+# Words are runs of letters, digits and underscores; keywords are split
+# into words the same way
+WORD_RE = re.compile(r"\w+")
+
+# Plurals the -s / -es / -ies rules miss
+IRREGULAR_PLURALS = {
+    "child": "children", "person": "people", "man": "men", "woman": "women",
+    "wife": "wives", "life": "lives", "criterion": "criteria",
+}
+
+
+def load_taxonomy(path: str) -> dict[str, list[str]]:
+    """Read a ``{tag: [keyword, ...]}`` JSON file."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            taxonomy = json.load(fh)
+    except (OSError, ValueError) as exc:
+        raise ValueError(f"can't read taxonomy {path}: {exc}") from None
+    if not isinstance(taxonomy, dict) or not all(
+            isinstance(kws, list) and all(isinstance(k, str) for k in kws)
+            for kws in taxonomy.values()):
+        raise ValueError(f"taxonomy {path} must map each tag to a list of keywords")
+    return taxonomy
+
+
+def _normalize(keyword: str) -> str:
+    return " ".join(WORD_RE.findall(keyword.lower()))
+
+
+def word_forms(word: str) -> set[str]:
+    """``word`` and its plurals."""
+    forms = {word, word + "s", word + "es"}
+    if len(word) > 1 and word[-1] == "y" and word[-2] not in "aeiou":
+        forms.add(word[:-1] + "ies")
+    if word in IRREGULAR_PLURALS:
+        forms.add(IRREGULAR_PLURALS[word])
+    return forms
+
+
+def _keyword_pattern(keyword: str) -> str:
+    """Regex for one normalized keyword, its last word in either number."""
+    words = keyword.split()
+    head = "".join(re.escape(w) + r"\W+" for w in words[:-1])
+    last = "|".join(sorted(map(re.escape, word_forms(words[-1])), key=len, reverse=True))
+    return rf"(?<!\w){head}(?:{last})(?!\w)"
+
+
+def _trie_pattern(forms: Iterable[str]) -> str:
+    """Alternation of ``forms`` factored into a trie: ``child|children|
+    custody`` becomes ``c(?:hild(?:ren)?|ustody)``.  Longer forms are tried
+    first, and a space matches any run of non-word characters."""
+    trie: dict = {}
+    for form in forms:
+        node = trie
+        for ch in form:
+            node = node.setdefault(ch, {})
+        node[""] = {}                                  # a form ends here
+
+    def emit(node: dict) -> str:
+        branches = [(r"\W+" if ch == " " else re.escape(ch)) + emit(child)
+                    for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if "" not in node:
+            return body
+        return f"(?:{body})?" if len(branches) == 1 else f"{body}?"
+
+    return emit(trie)
+
+
+class TopicTagger:
+    """Tag text against a taxonomy (see module docstring)."""
+
+    def __init__(self, taxonomy: dict[str, list[str]]):
+        self.taxonomy = {tag: list(keywords) for tag, keywords in taxonomy.items()}
+        self._tags: dict[str, frozenset] = {}          # keyword → its tags
+        for tag, keywords in self.taxonomy.items():
+            for keyword in keywords:
+                keyword = _normalize(keyword)
+                if keyword:
+                    self._tags[keyword] = self._tags.get(keyword, frozenset()) | {tag}
+        patterns = {k: re.compile(_keyword_pattern(k)) for k in self._tags}
+
+        # Multi-word keywords starting with a later word of another one are
+        # searched on their own (see module docstring)
+        later = set()
+        for keyword in self._tags:
+            words = keyword.split()
+            if len(words) > 1:
+                later.update(words[1:-1])
+                later.update(word_forms(words[-1]))
+        self._overlapping: dict[str, re.Pattern] = {
+            k: patterns[k] for k in self._tags if " " in k and k.split()[0] in later}
+
+        # Every form of the other keywords, with the keywords a match of it
+        # counts for: itself and any keyword inside it ("water supplies" →
+        # water supply, water).  Candidates are looked up by the word they
+        # start with.
+        starting: dict[str, list[str]] = {}
+        for keyword in self._tags:
+            if keyword not in self._overlapping:
+                words = keyword.split()
+                for first in (word_forms(words[0]) if len(words) == 1 else [words[0]]):
+                    starting.setdefault(first, []).append(keyword)
+        self._forms: dict[str, Counter] = {}
+        for keyword in self._tags:
+            if keyword in self._overlapping:
+                continue
+            words = keyword.split()
+            for last in word_forms(words[-1]):
+                form = " ".join(words[:-1] + [last])
+                candidates = {k for w in form.split() for k in starting.get(w, ())}
+                self._forms[form] = Counter({
+                    k: len(patterns[k].findall(form)) for k in sorted(candidates)
+                    if patterns[k].search(form)})
+        self._form_tags: dict[str, frozenset] = {
+            form: frozenset().union(*(self._tags[k] for k in keywords))
+            for form, keywords in self._forms.items()}
+        self._pattern = re.compile(
+            rf"(?<!\w)(?:{_trie_pattern(self._forms)})(?!\w)" if self._forms else r"(?!)")
+
+    def _form(self, match: str) -> str:
+        # Multi-word matches may have other than one space between the words
+        return match if match in self._forms else _normalize(match)
+
+    def keyword_counts(self, text: str) -> Counter:
+        """Matches per keyword (normalized, in the singular)."""
+        counts: Counter = Counter()
+        if not text:
+            return counts
+        lower = text.lower()
+        for match, n in Counter(self._pattern.findall(lower)).items():
+            for keyword, inside in self._forms[self._form(match)].items():
+                counts[keyword] += n * inside
+        for keyword, pattern in self._overlapping.items():
+            n = len(pattern.findall(lower))
+            if n:
+                counts[keyword] = n
+        return counts
+
+    def counts(self, text: str) -> Counter:
+        """Keyword matches per tag."""
+        counts: Counter = Counter()
+        for keyword, n in self.keyword_counts(text).items():
+            for tag in self._tags[keyword]:
+                counts[tag] += n
+        return counts
+
+    def tags(self, text: str, min_count: int = 1) -> list[str]:
+        """Sorted tags with at least ``min_count`` keyword matches."""
+        if min_count > 1:
+            return sorted(tag for tag, n in self.counts(text).items() if n >= min_count)
+        if not text:
+            return []
+        lower = text.lower()
+        found: set = set()
+        for match in set(self._pattern.findall(lower)):
+            found |= self._form_tags[self._form(match)]
+        for keyword, pattern in self._overlapping.items():
+            if pattern.search(lower):
+                found |= self._tags[keyword]
+        return sorted(found)
+
+
+def main():
+    if len(sys.argv) != 3:
+        sys.exit("usage: python tagging.py TAXONOMY.json DOCUMENT.txt")
+    try:
+        tagger = TopicTagger(load_taxonomy(sys.argv[1]))
+        with open(sys.argv[2], encoding="utf-8") as fh:
+            text = fh.read()
+    except (OSError, ValueError) as exc:
+        sys.exit(f"❌  {exc}")
+    counts = tagger.counts(text)
+    for tag, n in counts.most_common():
+        print(f"  {tag:<20} {n:>7,}")
+    if not counts:
+        print("  (no tags)")
+
+
+if __name__ == "__main__":
+    main()
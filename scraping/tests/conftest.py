@@ -0,0 +1,22 @@
+"""Shared fixtures for the scraper tests.
+
+The scrapers are flat modules run from scraping/, so the tests import them
+the same way.  Nothing here touches the network or Pinecone.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_fixtures import STATUTE_FIXTURE, fixture_path  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def statute_html() -> str:
+    """The generated statute title bench.py times (~1.5 MB of HTML)."""
+    import gzip
+    with gzip.open(fixture_path(STATUTE_FIXTURE), "rt", encoding="utf-8") as fh:
+        return fh.read()
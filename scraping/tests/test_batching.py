@@ -0,0 +1,57 @@
+"""UpsertBatcher: every batch within the record, byte and token limits."""
+
+from batching import MIN_BATCH_RECORDS, UpsertBatcher, record_bytes
+from tokens import CharRatioEstimator
+
+
+def _records(n, size=100):
+    return [{"_id": f"r{i}", "text": "x" * (size + i % 7)} for i in range(n)]
+
+
+def test_batches_keep_order_and_limits():
+    batcher = UpsertBatcher(CharRatioEstimator(), max_records=10, max_bytes=2000,
+                            max_tokens=120)
+    records = _records(200)
+    batcher.add(records)
+    batches = list(batcher.batches(final=True))
+    assert [r for b in batches for r in b] == records
+    for batch in batches:
+        assert len(batch) <= batcher.size
+        assert batch.nbytes == sum(record_bytes(r) for r in batch) <= 2000
+        assert batch.tokens <= 120 or len(batch) == 1
+    assert len(batcher) == 0
+
+
+def test_partial_batch_waits_for_final():
+    batcher = UpsertBatcher(max_records=50)
+    batcher.add(_records(batcher.size - 1))
+    assert list(batcher.batches()) == []
+    assert len(list(batcher.batches(final=True))) == 1
+
+
+def test_oversized_record_goes_alone():
+    batcher = UpsertBatcher(CharRatioEstimator(), max_tokens=10)
+    batcher.add(_records(3, size=1000))
+    assert [len(b) for b in batcher.batches(final=True)] == [1, 1, 1]
+
+
+def test_given_counts_skip_the_estimator():
+    class Refuse:
+        def count_batch(self, texts):
+            raise AssertionError("estimator called")
+    batcher = UpsertBatcher(Refuse())
+    batcher.add(_records(3), counts=[1, 2, 3])
+    assert next(batcher.batches(final=True)).tokens == 6
+
+
+def test_observe_adapts_record_limit():
+    batcher = UpsertBatcher(max_records=96, target_seconds=2.0)
+    start = batcher.size
+    batcher.observe([{}] * start, 0.1)
+    assert batcher.size > start
+    grown = batcher.size
+    batcher.observe([{}] * 2, 0.1)          # not cut by the record limit
+    assert batcher.size == grown
+    for _ in range(20):
+        batcher.observe([{}], None)
+    assert batcher.size == MIN_BATCH_RECORDS
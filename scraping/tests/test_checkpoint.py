@@ -0,0 +1,82 @@
+"""Checkpoint, FlushTracker and skip_flushed: what --resume picks up."""
+
+import pytest
+
+from checkpoint import Checkpoint, FlushTracker, skip_flushed
+
+
+def _ids(prefix, n):
+    return [{"_id": f"{prefix}{i}"} for i in range(n)]
+
+
+# ── Checkpoint ───────────────────────────────────────────────────────────────
+def test_save_and_load(tmp_path):
+    Checkpoint("legal-code", {"titles": [1, 2]}, str(tmp_path)).save(
+        done=1, last_batch=["a", "b"])
+    checkpoint = Checkpoint("legal-code", {"titles": [1, 2]}, str(tmp_path))
+    assert checkpoint.load() == {"done": 1, "last_batch": ["a", "b"]}
+    assert checkpoint.last_flushed_id == "b"
+
+
+def test_other_signature_starts_fresh(tmp_path, capsys):
+    Checkpoint("legal-code", {"titles": [1, 2]}, str(tmp_path)).save(done=1)
+    checkpoint = Checkpoint("legal-code", {"titles": [1, 2, 3]}, str(tmp_path))
+    assert checkpoint.load() == {}
+    assert checkpoint.last_flushed_id is None
+    assert "different run parameters" in capsys.readouterr().out
+
+
+def test_missing_or_corrupt_file(tmp_path):
+    checkpoint = Checkpoint("legal-code", {}, str(tmp_path))
+    assert checkpoint.load() == {}
+    (tmp_path / "legal-code.json").write_text("{not json")
+    assert checkpoint.load() == {}
+
+
+def test_clear(tmp_path):
+    checkpoint = Checkpoint("legal-code", {}, str(tmp_path))
+    checkpoint.save(done=1)
+    checkpoint.clear()
+    assert checkpoint.state == {}
+    assert not (tmp_path / "legal-code.json").exists()
+
+
+# ── FlushTracker ─────────────────────────────────────────────────────────────
+def test_flush_tracker():
+    tracker = FlushTracker()
+    assert tracker.added("t1", 3) is None
+    assert tracker.added("t2", 2) is None
+    assert tracker.flushed(2) is None           # t1 only partly upserted
+    assert tracker.flushed(2) == "t1"
+    assert tracker.added("t3", 0) is None       # t2 still has one record out
+    assert tracker.flushed(1) == "t3"           # t2 and the empty t3 are done
+
+
+def test_flush_tracker_unit_already_flushed():
+    tracker = FlushTracker()
+    tracker.added("t1", 2)
+    tracker.flushed(2)
+    assert tracker.added("t2", 0) == "t2"
+
+
+# ── skip_flushed ─────────────────────────────────────────────────────────────
+@pytest.mark.parametrize("last_id, expected", [
+    (None, 5),                      # nothing flushed yet
+    ("pa-statute-t18-2", 2),        # records 0–2 are already upserted
+    ("pa-statute-t18-4", 0),        # the whole unit was upserted
+    ("pa-statute-t2-2", 5),         # another unit's id
+    ("pa-statute-t18-9", 5),        # id no longer produced: keep everything
+])
+def test_skip_flushed(last_id, expected):
+    records = _ids("pa-statute-t18-", 5)
+    kept = list(skip_flushed(records, last_id, "pa-statute-t18-"))
+    assert kept == records[len(records) - expected:]
+
+
+def test_skip_flushed_is_lazy():
+    def records():
+        yield {"_id": "t-0"}
+        yield {"_id": "t-1"}
+        raise AssertionError("read past the flushed id")
+    it = skip_flushed(records(), "t-0", "t-")
+    assert next(it) == {"_id": "t-1"}
@@ -0,0 +1,90 @@
+"""HttpCache: revalidate with validators, serve 304s from disk."""
+
+import os
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from http_cache import HttpCache
+
+URL = "https://example.test/matters"
+
+
+def _response(status, body=b"", **headers):
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = body
+    resp.headers = CaseInsensitiveDict(headers)
+    resp.url = URL
+    return resp
+
+
+class FakeSession:
+    """Replays queued responses and records the headers of each request."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.sent.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = HttpCache(str(tmp_path / "http"))
+    yield c
+    c.close()
+
+
+def test_revalidates_and_serves_304_from_disk(cache):
+    session = FakeSession(
+        _response(200, b"body", ETag='"v1"', **{"Content-Type": "application/json"}),
+        _response(304))
+    assert cache.get(session, URL).content == b"body"
+    resp = cache.get(session, URL)
+    assert (resp.status_code, resp.content) == (200, b"body")
+    assert resp.headers["Content-Type"] == "application/json"
+    assert session.sent[1]["If-None-Match"] == '"v1"'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_changed_body_replaces_entry(cache):
+    session = FakeSession(_response(200, b"old", **{"Last-Modified": "Mon"}),
+                          _response(200, b"new", **{"Last-Modified": "Tue"}),
+                          _response(304))
+    cache.get(session, URL)
+    cache.get(session, URL)
+    assert cache.get(session, URL).content == b"new"
+    assert session.sent[2]["If-Modified-Since"] == "Tue"
+
+
+def test_no_validator_not_cached(cache):
+    cache.get(FakeSession(_response(200, b"body")), URL)
+    assert cache.lookup(URL) is None
+
+
+def test_stream_not_cached(cache):
+    cache.get(FakeSession(_response(200, b"body", ETag='"v1"')), URL, stream=True)
+    assert cache.lookup(URL) is None
+
+
+def test_missing_body_is_fetched_again(cache):
+    session = FakeSession(_response(200, b"body", ETag='"v1"'), _response(304),
+                          _response(200, b"body", ETag='"v1"'))
+    cache.get(session, URL)
+    os.remove(cache._path(cache.lookup(URL)["digest"]))
+    assert cache.get(session, URL).content == b"body"
+    assert "If-None-Match" not in session.sent[2]
+
+
+def test_eviction_keeps_recent_entries(tmp_path):
+    cache = HttpCache(str(tmp_path / "http"), max_bytes=25)
+    for i in range(5):
+        cache.get(FakeSession(_response(200, bytes([i]) * 10, ETag=f'"{i}"')),
+                  f"{URL}/{i}")
+    assert cache.lookup(f"{URL}/4") is not None
+    assert cache.lookup(f"{URL}/0") is None
+    cache.close()
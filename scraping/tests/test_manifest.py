@@ -0,0 +1,64 @@
+"""UpsertManifest: skip unchanged records, resume after a failed batch."""
+
+import pytest
+
+from manifest import UpsertManifest, record_hash
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    m = UpsertManifest(str(tmp_path / "manifest.sqlite"))
+    yield m
+    m.close()
+
+
+def _record(i, text="text"):
+    return {"_id": f"pa-statute-t18-{i}", "text": text, "title": 18}
+
+
+def test_new_records_are_changed(manifest):
+    assert manifest.is_changed("ns", _record(1))
+    assert manifest.changed == 1 and manifest.skipped == 0
+
+
+def test_upserted_records_are_skipped(manifest):
+    manifest.mark_upserted("ns", [_record(1), _record(2)])
+    assert not manifest.is_changed("ns", _record(1))
+    assert manifest.is_changed("ns", _record(1, "edited"))
+    assert manifest.is_changed("other-ns", _record(1))
+    assert manifest.skipped == 1
+
+
+def test_only_marked_batches_are_skipped_on_resume(tmp_path):
+    path = str(tmp_path / "manifest.sqlite")
+    records = [_record(i) for i in range(10)]
+    first = UpsertManifest(path)
+    first.mark_upserted("ns", records[:4])     # the run died after one batch
+    first.close()
+
+    resumed = UpsertManifest(path)
+    assert [r["_id"] for r in records if resumed.is_changed("ns", r)] == \
+        [r["_id"] for r in records[4:]]
+    resumed.close()
+
+
+def test_force(tmp_path):
+    path = str(tmp_path / "manifest.sqlite")
+    UpsertManifest(path).mark_upserted("ns", [_record(1)])
+    assert UpsertManifest(path, force=True).is_changed("ns", _record(1))
+
+
+def test_ids_with_prefix_and_forget(manifest):
+    manifest.mark_upserted("ns", [_record(1), _record(2)] +
+                           [{"_id": "pa-statute-t1-1", "text": "x"}])
+    assert sorted(manifest.ids_with_prefix("ns", "pa-statute-t18-")) == \
+        ["pa-statute-t18-1", "pa-statute-t18-2"]
+    assert manifest.ids_with_prefix("other-ns", "pa-statute-t18-") == []
+    manifest.forget("ns", ["pa-statute-t18-1"])
+    assert manifest.ids_with_prefix("ns", "pa-statute-t18-") == ["pa-statute-t18-2"]
+    assert manifest.is_changed("ns", _record(1))
+
+
+def test_record_hash_ignores_key_order():
+    assert record_hash({"_id": "a", "text": "b"}) == record_hash({"text": "b", "_id": "a"})
+    assert record_hash({"_id": "a", "text": "b"}) != record_hash({"_id": "a", "text": "c"})
@@ -0,0 +1,64 @@
+"""RecordWriter / iter_records round trips."""
+
+import os
+
+import pytest
+
+from record_io import RecordWriter, iter_records
+
+RECORDS = [
+    {"_id": f"pa-statute-t18-{i}", "text": f"§ {i}. Ünïcode text", "title": 18,
+     "tags": ["criminal"] if i % 2 else [], "score": i / 3}
+    for i in range(25)
+]
+
+
+def _write(path, records):
+    writer = RecordWriter(str(path))
+    writer.write(records)
+    writer.close()
+    return writer
+
+
+@pytest.mark.parametrize("name", ["records.ndjson", "records.jsonl", "records.ndjson.gz"])
+def test_ndjson_round_trip(tmp_path, name):
+    writer = _write(tmp_path / name, RECORDS)
+    assert writer.count == len(RECORDS)
+    chunks = list(iter_records(str(tmp_path / name), chunk=10))
+    assert [len(c) for c in chunks] == [10, 10, 5]
+    assert [r for c in chunks for r in c] == RECORDS
+
+
+def test_zstd_round_trip(tmp_path):
+    pytest.importorskip("zstandard")
+    _write(tmp_path / "records.ndjson.zst", RECORDS)
+    assert [r for c in iter_records(str(tmp_path / "records.ndjson.zst")) for r in c] == RECORDS
+
+
+def test_parquet_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+    _write(tmp_path / "records.parquet", RECORDS)
+    assert [r for c in iter_records(str(tmp_path / "records.parquet")) for r in c] == RECORDS
+
+
+def test_file_appears_only_when_closed(tmp_path):
+    path = tmp_path / "records.ndjson.gz"
+    writer = RecordWriter(str(path))
+    writer.write(RECORDS)
+    assert not path.exists()
+    writer.close()
+    assert path.exists() and not os.path.exists(f"{path}.part")
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        RecordWriter(str(tmp_path / "records.csv"))
+    with pytest.raises(ValueError):
+        RecordWriter(str(tmp_path / "records.parquet.gz"))
+
+
+def test_bad_line_names_its_position(tmp_path):
+    path = tmp_path / "records.ndjson"
+    path.write_text('{"_id": "a"}\n\n{broken\n')
+    with pytest.raises(ValueError, match=r"records\.ndjson:3"):
+        list(iter_records(str(path)))
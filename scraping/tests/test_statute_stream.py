@@ -0,0 +1,56 @@
+"""StatuteTextStream: the streamed text is StatuteDocument.text."""
+
+import pytest
+
+from scrape_legal_code import StatuteDocument, StatuteTextStream
+
+SMALL_PAGES = [
+    "",
+    "<html><head><title>Title 1 - X</title></head><body></body></html>",
+    # Navigation before the title content is dropped
+    "<html><head><title>Title 3 - X</title><script>var a = 1;</script></head><body>"
+    "<header>Pennsylvania General Assembly</header><nav>Home | Statutes</nav>"
+    "<p>Unofficial</p><p>TITLE 3<br>AGRICULTURE</p><p>§ 101. Short title.</p>"
+    "<p>&nbsp;&nbsp;(a)  This   title\n\nshall be   known.</p><footer>x</footer>"
+    "</body></html>",
+    # No marker in the first 500 characters: nothing is dropped
+    "<p>" + "word " * 200 + "</p><p>CHAPTER 1</p>",
+    # Entities, comments and self-closing tags between text nodes
+    "<p>TITLE 9</p><!-- note --><p>a &amp; b<br/>c&#167; 2</p><p>  </p>",
+]
+
+
+def _streamed(html, feed_size: int) -> str:
+    return "".join(StatuteTextStream().iter_text(html, feed_size=feed_size))
+
+
+@pytest.mark.parametrize("html", SMALL_PAGES)
+@pytest.mark.parametrize("feed_size", [1, 7, 4096])
+def test_small_pages(html, feed_size):
+    assert _streamed(html, feed_size) == StatuteDocument(html, "html.parser").text
+
+
+@pytest.mark.parametrize("feed_size", [997, 64 * 1024])
+def test_statute_fixture(statute_html, feed_size):
+    assert _streamed(statute_html, feed_size) == \
+        StatuteDocument(statute_html, "html.parser").text
+
+
+def test_statute_fixture_lxml(statute_html):
+    pytest.importorskip("lxml")
+    assert _streamed(statute_html, 64 * 1024) == StatuteDocument(statute_html, "lxml").text
+
+
+def test_title_name_and_head(statute_html):
+    stream = StatuteTextStream()
+    text = "".join(stream.iter_text(statute_html))
+    document = StatuteDocument(statute_html, "html.parser")
+    assert stream.title_name == document.title_name
+    assert stream.chars == len(text)
+    assert text.startswith(stream.head)
+
+
+def test_iterable_input(statute_html):
+    pieces = [statute_html[i:i + 5000] for i in range(0, len(statute_html), 5000)]
+    assert "".join(StatuteTextStream().iter_text(pieces)) == \
+        StatuteDocument(statute_html, "html.parser").text
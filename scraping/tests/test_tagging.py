@@ -0,0 +1,92 @@
+"""TopicTagger: whole words, singular or plural, case-insensitive."""
+
+import pytest
+
+from tagging import TopicTagger, load_taxonomy, word_forms
+
+TAXONOMY = {
+    "family":    ["child", "custody"],
+    "criminal":  ["penalty", "prison", "offense"],
+    "housing":   ["rent", "tenant", "real estate"],
+    "property":  ["property"],
+    "transit":   ["bus"],
+    "water":     ["water", "water supply"],
+    "utilities": ["water supply"],
+}
+
+
+@pytest.fixture(scope="module")
+def tagger():
+    return TopicTagger(TAXONOMY)
+
+
+@pytest.mark.parametrize("text, tags", [
+    ("The children were placed in custody.", ["family"]),
+    ("Penalties for the offense", ["criminal"]),
+    ("Taxes on properties", ["property"]),
+    ("Two buses", ["transit"]),
+    ("TENANTS and Rent", ["housing"]),
+])
+def test_plurals_and_case(tagger, text, tags):
+    assert tagger.tags(text) == tags
+
+
+@pytest.mark.parametrize("text", [
+    "the current account",          # rent
+    "a term of imprisonment",       # prison
+    "business hours",               # bus
+    "childhood",                    # child
+    "watershed",                    # water
+    "propertyless",                 # property
+])
+def test_whole_words_only(tagger, text):
+    assert tagger.tags(text) == []
+
+
+def test_multi_word_keywords(tagger):
+    assert tagger.tags("sale of real-estate") == ["housing"]
+    assert tagger.tags("real\nestates") == ["housing"]
+    assert tagger.tags("real property estate") == ["property"]
+    # "water supply" counts for both of its tags, and "water" for its own
+    assert tagger.tags("the water supplies") == ["utilities", "water"]
+
+
+def test_overlapping_multi_word_keywords():
+    tagger = TopicTagger({"housing": ["real estate"], "tax": ["estate tax", "tax"],
+                          "places": ["new york city", "york city"]})
+    assert tagger.tags("a real estate tax") == ["housing", "tax"]
+    assert tagger.keyword_counts("real estate taxes") == \
+        {"real estate": 1, "estate tax": 1, "tax": 1}
+    assert tagger.keyword_counts("New York City") == {"new york city": 1, "york city": 1}
+    assert TopicTagger({}).tags("anything") == []
+
+
+def test_counts_and_min_count(tagger):
+    text = "Rent, rents and a tenant. The child."
+    assert tagger.keyword_counts(text) == {"rent": 2, "tenant": 1, "child": 1}
+    assert tagger.counts(text) == {"housing": 3, "family": 1}
+    assert tagger.tags(text, min_count=2) == ["housing"]
+    assert tagger.tags("") == [] and tagger.counts("") == {}
+
+
+def test_matches_at_text_edges(tagger):
+    assert tagger.tags("rent") == ["housing"]
+    assert tagger.tags("(prison)") == ["criminal"]
+
+
+def test_word_forms():
+    assert word_forms("penalty") >= {"penalty", "penalties", "penaltys"}
+    assert "childs" in word_forms("child") and "children" in word_forms("child")
+    assert "daies" not in word_forms("day")
+
+
+def test_load_taxonomy(tmp_path):
+    good = tmp_path / "good.json"
+    good.write_text('{"housing": ["rent"]}')
+    assert load_taxonomy(str(good)) == {"housing": ["rent"]}
+    bad = tmp_path / "bad.json"
+    bad.write_text('{"housing": "rent"}')
+    with pytest.raises(ValueError):
+        load_taxonomy(str(bad))
+    with pytest.raises(ValueError):
+        load_taxonomy(str(tmp_path / "missing.json"))
@@ -0,0 +1,65 @@
+"""TokenChunker: streaming chunks match whole-text chunks."""
+
+import random
+
+import pytest
+
+from token_chunking import TokenChunker, TokenHistogram
+from tokens import CharRatioEstimator
+
+
+def _text(seed: int, sentences: int) -> str:
+    rng = random.Random(seed)
+    words = "the court shall order any person who under this section may".split()
+    out = []
+    for i in range(sentences):
+        n = rng.choice((3, 8, 15, 30, 400)) if i % 7 else 1200   # some over-long
+        out.append(" ".join(rng.choice(words) for _ in range(n)).capitalize() + ".")
+        if rng.random() < 0.1:
+            out.append("\n\n")
+    return " ".join(out)
+
+
+def _pieces(text: str, size: int):
+    return (text[i:i + size] for i in range(0, len(text), size))
+
+
+@pytest.fixture
+def chunker():
+    return TokenChunker(CharRatioEstimator(), target=120, max_tokens=200, overlap=24)
+
+
+@pytest.mark.parametrize("window", [64, 500, 4096, 64 * 1024])
+@pytest.mark.parametrize("piece", [1, 37, 1000])
+def test_iter_chunks_matches_chunk(chunker, window, piece):
+    text = _text(window + piece, 300)
+    assert list(chunker.iter_chunks(_pieces(text, piece), window=window)) == \
+        chunker.chunk(text)
+
+
+def test_iter_chunks_statute(chunker, statute_html):
+    from scrape_legal_code import StatuteDocument
+    text = StatuteDocument(statute_html).text[:300_000]
+    assert list(chunker.iter_chunks(_pieces(text, 8192), window=16 * 1024)) == \
+        chunker.chunk(text)
+
+
+def test_empty_and_short(chunker):
+    assert chunker.chunk("") == []
+    assert list(chunker.iter_chunks([])) == []
+    assert chunker.chunk("One sentence.") == ["One sentence."]
+
+
+def test_chunks_stay_under_max_tokens(chunker):
+    estimator = CharRatioEstimator()
+    for chunk in chunker.chunk(_text(1, 400)):
+        assert estimator.count(chunk) <= chunker.max_tokens
+
+
+def test_histogram():
+    hist = TokenHistogram(bin_width=64, limit=507)
+    hist.add([10, 20, 30, 100, 600])
+    assert hist.percentile(50) == 63          # upper edge of the 0–63 bucket
+    assert hist.percentile(100) == 600
+    assert hist.over == 1
+    assert TokenHistogram().summary() == "no chunks"
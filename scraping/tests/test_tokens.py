@@ -0,0 +1,27 @@
+"""Token estimators and --tokenizer specs."""
+
+import pytest
+
+from tokens import CharRatioEstimator, TOKENS_PER_CHAR, get_estimator, record_tokens
+
+
+def test_char_ratio():
+    estimator = CharRatioEstimator(0.5)
+    assert estimator.count("abcd") == 2
+    assert estimator.count_batch(["ab", "abcdef", ""]) == [1, 3, 0]
+
+
+@pytest.mark.parametrize("spec, ratio", [("chars", TOKENS_PER_CHAR), ("chars:0.3", 0.3)])
+def test_get_estimator_chars(spec, ratio):
+    assert get_estimator(spec).ratio == ratio
+
+
+@pytest.mark.parametrize("spec", ["nonsense", "hf", "chars:abc"])
+def test_get_estimator_rejects_bad_specs(spec):
+    with pytest.raises(ValueError):
+        get_estimator(spec)
+
+
+def test_record_tokens():
+    records = [{"text": "abcd"}, {"text": "ab"}, {"_id": "no-text"}]
+    assert record_tokens(CharRatioEstimator(0.5), records) == 3
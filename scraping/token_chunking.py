@@ -0,0 +1,297 @@
+"""
+token_chunking.py
+=================
+Chunks sized in embedding tokens instead of characters.
+
+Character budgets give chunks whose token counts swing with the text:
+dense statute prose packs far fewer tokens per character than a budget
+table full of numbers, so one kind of chunk wastes the model's context and
+the other overflows it.  ``TokenChunker`` packs whole sentences up to a
+token target instead, counted with the same pluggable estimator the rate
+limiter uses (tokens.py, ``--tokenizer``):
+
+    target      tokens each chunk is filled up to (``--chunk-tokens``)
+    max_tokens  the embedding model's input limit; a sentence longer than
+                this is split on its own
+    overlap     trailing tokens of a chunk repeated at the start of the next
+
+All sentences of the texts given to one ``spans_batch`` call are tokenized
+in a single ``count_batch`` call, so tokenizers with a batch API (tiktoken,
+Hugging Face) run once per title or matter rather than once per sentence.
+
+``TokenHistogram`` collects the token counts of the chunks a run produced,
+for tuning chunk sizes against the embedding quota.
+"""
+
+import bisect
+import math
+import os
+import re
+from collections import Counter
+from typing import Iterable, Iterator, Optional
+
+from tokens import TokenEstimator
+
+# ── Configuration ────────────────────────────────────────────────────────────
+# Tokens a chunk is filled up to when --chunk-tokens is given without a value
+DEFAULT_CHUNK_TOKENS = int(os.environ.get("CHUNK_TOKENS", "384"))
+
+# Embedding model input limit (multilingual-e5-large reads 507 tokens)
+MAX_CHUNK_TOKENS = int(os.environ.get("MAX_CHUNK_TOKENS", "507"))
+
+# Trailing tokens (whole sentences) carried into the next chunk
+CHUNK_OVERLAP_TOKENS = 48
+
+# A final chunk under this fraction of the target is merged into the
+# previous one
+MIN_CHUNK_FRACTION = 0.2
+
+# Streaming: characters of text chunked at a time
+STREAM_WINDOW_CHARS = 64 * 1024
+
+# Histogram bucket width in tokens
+HISTOGRAM_BIN = 64
+
+
+# ── Sentences ────────────────────────────────────────────────────────────────
+# Each match starts with the last character of a sentence; the separator
+# is the rest.  Leading with a character (not a lookbehind) lets the regex
+# engine skip straight to candidate positions.
+SENTENCE_RE = re.compile(
+    r'[.!?]\s+|'            # sentence-ending punctuation + space
+    r'\n\s*(?=\S)',          # paragraph breaks
+)
+
+
+def trim_span(text: str, start: int, end: int) -> tuple[int, int]:
+    """Narrow ``text[start:end]`` to exclude surrounding whitespace."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def sentence_spans(text: str, start: int = 0,
+                   end: Optional[int] = None) -> list[tuple[int, int]]:
+    """``(start, end)`` of every sentence-like segment of ``text[start:end]``,
+    trimmed of whitespace; empty segments are dropped."""
+    end = len(text) if end is None else end
+    spans = []
+    pos = start
+    for m in SENTENCE_RE.finditer(text, start, end):
+        s, e, pos = pos, m.start() + 1, m.end()
+        # Separators usually swallow the whitespace around a sentence
+        if s < e and (text[s].isspace() or text[e - 1].isspace()):
+            s, e = trim_span(text, s, e)
+        if s < e:
+            spans.append((s, e))
+    s, e = trim_span(text, pos, end)
+    if s < e:
+        spans.append((s, e))
+    return spans
+
+
+# ── Chunking ─────────────────────────────────────────────────────────────────
+class TokenChunker:
+    """Pack sentences into chunks of about ``target`` tokens (see module docstring)."""
+
+    def __init__(self, estimator: TokenEstimator,
+                 target: int = DEFAULT_CHUNK_TOKENS,
+                 max_tokens: int = MAX_CHUNK_TOKENS,
+                 overlap: int = CHUNK_OVERLAP_TOKENS):
+        self.estimator = estimator
+        self.max_tokens = max(1, max_tokens)
+        self.target = max(1, min(target, self.max_tokens))
+        self.overlap = max(0, min(overlap, self.target // 2))
+        self.min_tokens = int(self.target * MIN_CHUNK_FRACTION)
+
+    def spans_batch(self, texts: list[str]) -> list[list[tuple[int, int]]]:
+        """Chunk offsets for each text, tokenizing all their sentences at once."""
+        return self._spans_batch(texts, [sentence_spans(text) for text in texts])
+
+    def _spans_batch(self, texts: list[str],
+                     sentences: list[list[tuple[int, int]]]) -> list[list[tuple[int, int]]]:
+        # Each sentence is counted with the whitespace after it, so a
+        # chunk's tokens are the sum of its sentences'
+        pieces = []
+        for text, spans in zip(texts, sentences):
+            ends = [s for s, _ in spans[1:]] + [spans[-1][1]] if spans else []
+            pieces.extend(text[s:e] for (s, _), e in zip(spans, ends))
+        counts = iter(self.estimator.count_batch(pieces) if pieces else ())
+        return [self._pack(text, spans, [next(counts) for _ in spans])
+                for text, spans in zip(texts, sentences)]
+
+    def spans(self, text: str) -> list[tuple[int, int]]:
+        return self.spans_batch([text])[0]
+
+    def chunk_batch(self, texts: list[str]) -> list[list[str]]:
+        return [[text[s:e] for s, e in spans]
+                for text, spans in zip(texts, self.spans_batch(texts))]
+
+    def chunk(self, text: str) -> list[str]:
+        return self.chunk_batch([text])[0]
+
+    def iter_chunks(self, pieces: Iterable[str],
+                    window: int = STREAM_WINDOW_CHARS) -> Iterator[str]:
+        """Chunk text arriving in pieces, holding about ``window`` characters.
+
+        Yields the same chunks as ``chunk`` on the joined text.  Chunks that
+        reach the last sentence of the buffer (which may continue in the next
+        piece), and the one before them (a short remainder may still be
+        merged into it), are chunked again with the next window.
+        """
+        buf = ""
+        wanted = window
+        for piece in pieces:
+            buf += piece
+            if len(buf) < wanted:
+                continue
+            sentences = sentence_spans(buf)
+            if not sentences:
+                buf = ""
+                continue
+            spans = self._spans_batch([buf], [sentences])[0]
+            tail = sentences[-1][0]
+            done = next(i for i, (_, e) in enumerate(spans) if e > tail)
+            done = max(0, done - 1)
+            # Restart at a sentence, not in the middle of a split one
+            starts = [s for s, _ in sentences]
+            first = starts[bisect.bisect_right(starts, spans[done][0]) - 1]
+            while done and spans[done][0] > first:
+                done -= 1
+            for s, e in spans[:done]:
+                yield buf[s:e]
+            buf = buf[spans[done][0]:]
+            # A sentence longer than the window: wait for more of it
+            # rather than chunking the same text again for every piece
+            wanted = max(window, 2 * len(buf))
+        for s, e in self.spans(buf):
+            yield buf[s:e]
+
+    def _split(self, text: str, start: int, end: int,
+               tokens: int) -> list[tuple[int, int, int]]:
+        """Cut one over-long sentence into even pieces, at spaces where possible."""
+        pieces = math.ceil(tokens / self.target)
+        out = []
+        pos = start
+        while pos < end:
+            # Sized from what is left, so cuts moved back to a space don't
+            # pile up into a long last piece
+            size = math.ceil((end - pos) / max(1, pieces - len(out)))
+            cut = min(pos + size, end)
+            if cut < end:
+                space = text.rfind(" ", pos + size // 2, cut)
+                if space > pos:
+                    cut = space
+            s, e = trim_span(text, pos, cut)
+            if s < e:
+                out.append((s, e, math.ceil(tokens * (e - s) / (end - start))))
+            pos = cut
+        return out
+
+    def _pack(self, text: str, spans: list[tuple[int, int]],
+              counts: list[int]) -> list[tuple[int, int]]:
+        if not spans:
+            return []
+        if sum(counts) <= self.target:
+            return [(spans[0][0], spans[-1][1])]
+
+        chunks: list[tuple[int, int, int]] = []     # start, end, tokens
+        window: list[tuple[int, int]] = []          # (start, tokens) per sentence
+        tokens = 0
+        chunk_end = 0
+        carried = 0     # tokens of the current chunk already in the previous one
+
+        def flush():
+            nonlocal window, tokens, carried
+            chunks.append((window[0][0], chunk_end, tokens))
+            # Carry whole trailing sentences up to the overlap budget
+            keep, kept = 0, 0
+            for _, n in reversed(window[1:]):
+                if kept + n > self.overlap:
+                    break
+                keep, kept = keep + 1, kept + n
+            window = window[len(window) - keep:] if keep else []
+            tokens = carried = kept
+
+        for (s, e), n in zip(spans, counts):
+            if n > self.max_tokens:
+                # Overlap can't reach across the long sentence
+                if window:
+                    flush()
+                    window, tokens, carried = [], 0, 0
+                chunks.extend(self._split(text, s, e, n))
+                continue
+            if window and tokens + n > self.target:
+                flush()
+                if tokens + n > self.target:
+                    # No room to repeat the overlap before this sentence
+                    # (a chunk of nothing but overlap would be a duplicate)
+                    window, tokens, carried = [], 0, 0
+            window.append((s, n))
+            tokens += n
+            chunk_end = e
+
+        if window:
+            if chunks and tokens < self.min_tokens and \
+                    chunks[-1][2] + tokens - carried <= self.max_tokens:
+                start, _, last = chunks[-1]
+                chunks[-1] = (start, chunk_end, last + tokens - carried)
+            else:
+                chunks.append((window[0][0], chunk_end, tokens))
+        return [(s, e) for s, e, _ in chunks]
+
+
+# ── Histogram ────────────────────────────────────────────────────────────────
+class TokenHistogram:
+    """Token counts of the chunks a run produced, in ``bin_width`` buckets."""
+
+    def __init__(self, bin_width: int = HISTOGRAM_BIN, limit: int = MAX_CHUNK_TOKENS):
+        self.bin_width = bin_width
+        self.limit = limit
+        self.bins: Counter = Counter()
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.over = 0       # chunks the embedding model would truncate
+
+    def add(self, counts: Iterable[int]):
+        for n in counts:
+            self.bins[n // self.bin_width] += 1
+            self.count += 1
+            self.total += n
+            self.max = max(self.max, n)
+            if n > self.limit:
+                self.over += 1
+
+    def percentile(self, p: float) -> int:
+        """Upper edge of the bucket holding the ``p``-th percentile (at most
+        the largest count seen)."""
+        wanted = math.ceil(self.count * p / 100)
+        seen = 0
+        for b in sorted(self.bins):
+            seen += self.bins[b]
+            if seen >= wanted:
+                return min((b + 1) * self.bin_width - 1, self.max)
+        return 0
+
+    def summary(self) -> str:
+        if not self.count:
+            return "no chunks"
+        return (f"{self.count:,} chunks, {self.total / self.count:,.0f} tokens on "
+                f"average (p50 ≤{self.percentile(50)}, p90 ≤{self.percentile(90)}, "
+                f"max {self.max}); {self.over} over the {self.limit}-token limit")
+
+    def lines(self, width: int = 40) -> list[str]:
+        """One text bar per bucket."""
+        if not self.count:
+            return []
+        peak = max(self.bins.values())
+        out = []
+        for b in range(min(self.bins), max(self.bins) + 1):
+            n = self.bins.get(b, 0)
+            lo = b * self.bin_width
+            bar = "█" * math.ceil(n / peak * width) if n else ""
+            out.append(f"{lo:>5}–{lo + self.bin_width - 1:<5} {bar} {n:,}")
+        return out
@@ -0,0 +1,200 @@
+"""
+token_ledger.py
+===============
+Embedding-token budget shared by every scraper process on this host.
+
+Each ``TokenRateLimiter`` only sees its own upserts, so running both
+scrapers (or several workers) against one Pinecone project would together
+blow through the tokens-per-minute limit.  With a ``SharedTokenLedger`` the
+limiters draw from one rolling window kept in SQLite
+(``.cache/token-ledger.sqlite``); every admission is a short
+``BEGIN IMMEDIATE`` transaction, so SQLite's file lock serialises them
+across processes.  (File locks are unreliable on network filesystems — keep
+the ledger on local disk.)
+
+Sharing is fair but work-conserving: a process may always use its share
+(budget ÷ active processes), and may go beyond it only while no other
+process is waiting.  A 429 seen by one process pauses all of them.
+
+Per-process metrics (tokens, waits) live in the same file:
+
+    python token_ledger.py             # who is using the budget right now
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Optional
+
+# ── Configuration ────────────────────────────────────────────────────────────
+DEFAULT_LEDGER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                   ".cache", "token-ledger.sqlite")
+
+# Shortest wait handed back to a blocked caller (seconds)
+MIN_WAIT = 0.05
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS spend (
+    ts     REAL NOT NULL,
+    pid    INTEGER NOT NULL,
+    tokens INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS spend_ts ON spend (ts);
+CREATE TABLE IF NOT EXISTS procs (
+    pid          INTEGER PRIMARY KEY,
+    name         TEXT NOT NULL,
+    started      REAL NOT NULL,
+    last_seen    REAL NOT NULL,
+    waiting      INTEGER NOT NULL DEFAULT 0,
+    tokens       INTEGER NOT NULL DEFAULT 0,
+    waits        INTEGER NOT NULL DEFAULT 0,
+    wait_seconds REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+
+class SharedTokenLedger:
+    """One process's handle on the host-wide token window."""
+
+    def __init__(self, name: str, path: str = DEFAULT_LEDGER_PATH,
+                 window: float = 60.0):
+        self.name = name
+        self.path = path
+        self.window = window
+        self.pid = os.getpid()
+        self._waiting_since: Optional[float] = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO procs (pid, name, started, last_seen) "
+                "VALUES (?, ?, ?, ?)", (self.pid, name, now, now))
+
+    def acquire(self, tokens: int, limit: int) -> float:
+        """Charge ``tokens`` if the shared budget allows.
+
+        Returns 0 once charged, otherwise the seconds to wait before asking
+        again.
+        """
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                cutoff = now - self.window
+                db.execute("DELETE FROM spend WHERE ts <= ?", (cutoff,))
+                db.execute("UPDATE procs SET last_seen = ? WHERE pid = ?",
+                           (now, self.pid))
+
+                row = db.execute("SELECT value FROM meta WHERE key = 'paused_until'"
+                                 ).fetchone()
+                if row and row[0] > now:
+                    wait = row[0] - now
+                    self._mark_waiting(now)
+                    db.execute("COMMIT")
+                    return wait
+
+                total, = db.execute("SELECT COALESCE(SUM(tokens), 0) FROM spend"
+                                    ).fetchone()
+                own, = db.execute("SELECT COALESCE(SUM(tokens), 0) FROM spend "
+                                  "WHERE pid = ?", (self.pid,)).fetchone()
+                active, others_waiting = db.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(waiting AND pid != ?), 0) "
+                    "FROM procs WHERE last_seen > ?", (self.pid, cutoff),
+                ).fetchone()
+                share = limit / max(1, active)
+
+                fits = total + tokens <= limit
+                fair = own == 0 or own + tokens <= share or not others_waiting
+                if fits and fair:
+                    db.execute("INSERT INTO spend VALUES (?, ?, ?)",
+                               (now, self.pid, tokens))
+                    waited = now - self._waiting_since if self._waiting_since else 0.0
+                    db.execute(
+                        "UPDATE procs SET waiting = 0, tokens = tokens + ?, "
+                        "wait_seconds = wait_seconds + ? WHERE pid = ?",
+                        (tokens, waited, self.pid))
+                    self._waiting_since = None
+                    db.execute("COMMIT")
+                    return 0.0
+
+                if fits:
+                    # Over our share while others wait: until our oldest expires
+                    oldest, = db.execute("SELECT MIN(ts) FROM spend WHERE pid = ?",
+                                         (self.pid,)).fetchone()
+                else:
+                    oldest, = db.execute("SELECT MIN(ts) FROM spend").fetchone()
+                self._mark_waiting(now)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        if oldest is None:
+            return MIN_WAIT
+        return max(MIN_WAIT, oldest + self.window - now)
+
+    def _mark_waiting(self, now: float):
+        if self._waiting_since is None:
+            self._waiting_since = now
+            self._db.execute("UPDATE procs SET waiting = 1, waits = waits + 1 "
+                             "WHERE pid = ?", (self.pid,))
+
+    def pause(self, seconds: float):
+        """Hold every process off the budget (after a 429)."""
+        until = time.time() + seconds
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO meta VALUES ('paused_until', ?) ON CONFLICT(key) "
+                "DO UPDATE SET value = MAX(value, excluded.value)", (until,))
+
+    def metrics(self) -> dict:
+        """This process's totals: tokens charged, waits and time spent waiting."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT tokens, waits, wait_seconds FROM procs WHERE pid = ?",
+                (self.pid,)).fetchone()
+        tokens, waits, wait_seconds = row or (0, 0, 0.0)
+        return {"tokens": tokens, "waits": waits, "wait_seconds": wait_seconds}
+
+    def close(self):
+        """Leave the ledger so the others' fair share grows back."""
+        with self._lock:
+            self._db.execute("DELETE FROM procs WHERE pid = ?", (self.pid,))
+            self._db.close()
+
+
+def show(path: str = DEFAULT_LEDGER_PATH, window: float = 60.0):
+    """Print every registered process and its use of the shared window."""
+    db = sqlite3.connect(path, timeout=30)
+    db.executescript(_SCHEMA)
+    now = time.time()
+    in_window = dict(db.execute(
+        "SELECT pid, SUM(tokens) FROM spend WHERE ts > ? GROUP BY pid",
+        (now - window,)).fetchall())
+    rows = db.execute("SELECT pid, name, started, last_seen, waiting, tokens, "
+                      "waits, wait_seconds FROM procs ORDER BY started").fetchall()
+    if not rows:
+        print("No scraper processes registered.")
+    for pid, name, started, last_seen, waiting, tokens, waits, wait_s in rows:
+        state = "waiting" if waiting else "active"
+        if last_seen <= now - window:
+            state = "idle"
+        print(f"  {name:<12} pid {pid:<7} {state:<7} "
+              f"{in_window.get(pid, 0):>9,} tok/last {window:g}s  "
+              f"{tokens:>11,} total  {waits:>5} waits ({wait_s:,.0f}s)  "
+              f"up {(now - started) / 60:,.1f} min")
+    db.close()
+
+
+if __name__ == "__main__":
+    show(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_LEDGER_PATH)
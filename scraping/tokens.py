@@ -0,0 +1,114 @@
+"""
+tokens.py
+=========
+Token counting for Pinecone's integrated embedding model.
+
+Pinecone bills and rate-limits integrated inference in model tokens, so the
+scrapers' upsert budget is only as good as their token estimate.  Two kinds
+of estimator share one small interface (``count(text)`` and
+``count_batch(texts)``):
+
+    chars                     fixed chars → tokens ratio (no dependencies)
+    tiktoken:<encoding>       OpenAI tiktoken encoding, e.g. cl100k_base
+    hf:<name or tokenizer.json>
+                              Hugging Face ``tokenizers`` — point it at the
+                              embedding model's tokenizer for exact counts
+
+The tokenizer-backed ones are optional dependencies, imported on first use.
+Select one with ``--tokenizer`` or the ``TOKENIZER`` env variable.
+"""
+
+import os
+from typing import Iterable, Protocol
+
+# ── Configuration ────────────────────────────────────────────────────────────
+TOKENS_PER_CHAR = 0.30      # conservative estimate (~3.3 chars/token)
+
+DEFAULT_TOKENIZER = os.environ.get("TOKENIZER", "chars")
+
+
+class TokenEstimator(Protocol):
+    name: str
+    exact: bool     # counts come from a real tokenizer
+
+    def count(self, text: str) -> int: ...
+
+    def count_batch(self, texts: list[str]) -> list[int]: ...
+
+
+class CharRatioEstimator:
+    """Tokens ≈ characters × ``ratio``; errs on the high side."""
+
+    exact = False
+
+    def __init__(self, ratio: float = TOKENS_PER_CHAR):
+        self.ratio = ratio
+        self.name = f"chars×{ratio:g}"
+
+    def count(self, text: str) -> int:
+        return int(len(text) * self.ratio)
+
+    def count_batch(self, texts: list[str]) -> list[int]:
+        return [int(len(t) * self.ratio) for t in texts]
+
+
+class TiktokenEstimator:
+    """Counts with a tiktoken encoding (``pip install tiktoken``)."""
+
+    exact = True
+
+    def __init__(self, encoding: str = "cl100k_base"):
+        import tiktoken
+        self._enc = tiktoken.get_encoding(encoding)
+        self.name = f"tiktoken:{encoding}"
+
+    def count(self, text: str) -> int:
+        return len(self._enc.encode_ordinary(text))
+
+    def count_batch(self, texts: list[str]) -> list[int]:
+        return [len(ids) for ids in self._enc.encode_ordinary_batch(texts)]
+
+
+class HuggingFaceEstimator:
+    """Counts with a Hugging Face tokenizer (``pip install tokenizers``).
+
+    ``source`` is a local ``tokenizer.json`` or a Hub model name.
+    """
+
+    exact = True
+
+    def __init__(self, source: str):
+        from tokenizers import Tokenizer
+        if os.path.exists(source):
+            self._tok = Tokenizer.from_file(source)
+        else:
+            self._tok = Tokenizer.from_pretrained(source)
+        self.name = f"hf:{source}"
+
+    def count(self, text: str) -> int:
+        return len(self._tok.encode(text, add_special_tokens=False).ids)
+
+    def count_batch(self, texts: list[str]) -> list[int]:
+        # encode_batch tokenizes in parallel inside the Rust library
+        encodings = self._tok.encode_batch(texts, add_special_tokens=False)
+        return [len(e.ids) for e in encodings]
+
+
+def get_estimator(spec: str = DEFAULT_TOKENIZER) -> TokenEstimator:
+    """Build an estimator from a spec such as ``chars``, ``chars:0.28``,
+    ``tiktoken:cl100k_base`` or ``hf:/path/to/tokenizer.json``."""
+    kind, _, arg = spec.partition(":")
+    if kind == "chars":
+        return CharRatioEstimator(float(arg) if arg else TOKENS_PER_CHAR)
+    if kind == "tiktoken":
+        return TiktokenEstimator(arg or "cl100k_base")
+    if kind == "hf":
+        if not arg:
+            raise ValueError("hf tokenizer needs a name or tokenizer.json path")
+        return HuggingFaceEstimator(arg)
+    raise ValueError(f"unknown tokenizer {spec!r} (use chars, tiktoken:…, hf:…)")
+
+
+def record_tokens(estimator: TokenEstimator, records: Iterable[dict]) -> int:
+    """Embedding tokens for the ``text`` of a batch of records."""
+    return sum(estimator.count_batch([r.get("text", "") for r in records]))